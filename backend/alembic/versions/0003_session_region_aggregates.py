@@ -0,0 +1,70 @@
+"""store running region aggregates on sessions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+AGGREGATE_COLUMNS = [
+    "heel_kpa_sum",
+    "heel_kpa_sumsq",
+    "midfoot_kpa_sum",
+    "midfoot_kpa_sumsq",
+    "toe_kpa_sum",
+    "toe_kpa_sumsq",
+]
+
+
+def upgrade() -> None:
+    for column in AGGREGATE_COLUMNS:
+        op.add_column("sessions", sa.Column(column, sa.Float(), server_default="0", nullable=False))
+
+    # Backfill: mesma conversao volts -> kPa e mesmas regioes de session_store (HEEL=fsr2, MIDFOOT=fsr4, TOE=fsr1+fsr3).
+    op.execute(
+        """
+        UPDATE sessions AS s
+        SET sample_count = agg.n,
+            heel_kpa_sum = agg.heel_sum,
+            heel_kpa_sumsq = agg.heel_sumsq,
+            midfoot_kpa_sum = agg.midfoot_sum,
+            midfoot_kpa_sumsq = agg.midfoot_sumsq,
+            toe_kpa_sum = agg.toe_sum,
+            toe_kpa_sumsq = agg.toe_sumsq
+        FROM (
+            SELECT session_id,
+                   count(*) AS n,
+                   coalesce(sum(heel), 0) AS heel_sum,
+                   coalesce(sum(heel * heel), 0) AS heel_sumsq,
+                   coalesce(sum(midfoot), 0) AS midfoot_sum,
+                   coalesce(sum(midfoot * midfoot), 0) AS midfoot_sumsq,
+                   coalesce(sum(toe), 0) AS toe_sum,
+                   coalesce(sum(toe * toe), 0) AS toe_sumsq
+            FROM (
+                SELECT session_id,
+                       100 * power(greatest(coalesce((pressures->>'fsr2')::float8, 0), 0), 1.5) AS heel,
+                       100 * power(greatest(coalesce((pressures->>'fsr4')::float8, 0), 0), 1.5) AS midfoot,
+                       (
+                           100 * power(greatest(coalesce((pressures->>'fsr1')::float8, 0), 0), 1.5)
+                           + 100 * power(greatest(coalesce((pressures->>'fsr3')::float8, 0), 0), 1.5)
+                       ) / 2 AS toe
+                FROM pressure_samples
+            ) AS per_sample
+            GROUP BY session_id
+        ) AS agg
+        WHERE agg.session_id = s.id
+        """
+    )
+
+
+def downgrade() -> None:
+    for column in reversed(AGGREGATE_COLUMNS):
+        op.drop_column("sessions", column)
@@ -0,0 +1,22 @@
+"""index sessions by patient and start time for the history listing
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_sessions_patient_start", "sessions", ["patient_id", "start_time"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_patient_start", table_name="sessions")
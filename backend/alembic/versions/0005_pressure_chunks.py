@@ -0,0 +1,45 @@
+"""columnar pressure chunks and drop unused jsonb gin index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "pressure_chunks",
+        sa.Column("id", sa.String(length=36), primary_key=True),
+        sa.Column("session_id", sa.String(length=36), sa.ForeignKey("sessions.id"), nullable=False),
+        sa.Column("start_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("sample_count", sa.Integer(), nullable=False),
+        sa.Column("sensor_keys", postgresql.ARRAY(sa.String(length=16)), nullable=False),
+        sa.Column("offsets", sa.LargeBinary(), nullable=False),
+        sa.Column("values", sa.LargeBinary(), nullable=False),
+    )
+    op.create_index("ix_pressure_chunks_session_start", "pressure_chunks", ["session_id", "start_time"])
+    # Nenhuma consulta usa @> sobre pressures; o indice so encarecia cada INSERT.
+    op.drop_index("ix_pressure_samples_pressures_gin", table_name="pressure_samples")
+
+
+def downgrade() -> None:
+    op.create_index(
+        "ix_pressure_samples_pressures_gin",
+        "pressure_samples",
+        ["pressures"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.drop_index("ix_pressure_chunks_session_start", table_name="pressure_chunks")
+    op.drop_table("pressure_chunks")
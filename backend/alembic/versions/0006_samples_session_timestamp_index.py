@@ -0,0 +1,27 @@
+"""composite (session_id, timestamp) index for ranged sample reads
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_pressure_samples_session_timestamp", "pressure_samples", ["session_id", "timestamp"]
+    )
+    # O indice composto cobre as buscas so por session_id.
+    op.drop_index("ix_samples_session", table_name="pressure_samples")
+
+
+def downgrade() -> None:
+    op.create_index("ix_samples_session", "pressure_samples", ["session_id"])
+    op.drop_index("ix_pressure_samples_session_timestamp", table_name="pressure_samples")
@@ -0,0 +1,26 @@
+"""content hash of imported CSV sessions
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("sessions", sa.Column("source_sha256", sa.String(length=64), nullable=True))
+    # Unico: o mesmo CSV nunca vira duas sessoes (NULL para sessoes gravadas ao vivo).
+    op.create_index("ix_sessions_source_sha256", "sessions", ["source_sha256"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_sessions_source_sha256", table_name="sessions")
+    op.drop_column("sessions", "source_sha256")
@@ -1,15 +1,22 @@
 import asyncio
+import binascii
+import contextlib
 import json
 import os
-import queue
 import random
-import statistics
+import re
+import struct
 import threading
 import time
-from typing import Protocol
+from collections import deque
+from typing import Callable, NamedTuple, Protocol
 
+import numpy as np
 import serial
 
+from gait_analysis import MIN_STEP_SECONDS, PEAK_HEIGHT_FRACTION, SIGNAL_COLUMNS, tustin_coefficients
+from metrics import Counter, GaugeCallback, Histogram
+
 USE_BLUETOOTH = os.getenv("USE_BLUETOOTH", "0").lower() in {"1", "true", "yes"}
 PORTA = os.getenv("ARDUINO_PORT", "COM6")
 PORTA_LIST = [
@@ -24,7 +31,6 @@ BT_CHARACTERISTIC = os.getenv("ESP32_BT_CHARACTERISTIC")
 BT_TIMEOUT = float(os.getenv("ESP32_BT_TIMEOUT", "10"))
 ALLOW_SIMULATED = os.getenv("ALLOW_SIMULATED_DATA", "0").lower() in {"1", "true", "yes"}
 INITIAL_SENSOR_COUNT = int(os.getenv("SENSOR_COUNT", "7"))
-SENSOR_KEYS = [f"fsr{i}" for i in range(INITIAL_SENSOR_COUNT)]
 DEFAULT_DISABLED_SENSORS: set[str] = set()
 _extra_disabled = {
     sensor.strip()
@@ -50,42 +56,191 @@ BASELINE_OFFSET_TOLERANCE = float(os.getenv("BASELINE_OFFSET_TOLERANCE", "0.02")
 OUTLIER_FACTOR = float(os.getenv("SENSOR_OUTLIER_FACTOR", "4.0"))
 OUTLIER_TRIGGER_COUNT = int(os.getenv("SENSOR_OUTLIER_TRIGGER_COUNT", "60"))
 OUTLIER_MIN_THRESHOLD = float(os.getenv("SENSOR_OUTLIER_MIN_VOLTAGE", "0.4"))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "256"))
+# Protocolo binario opcional: sync | seq | timestamp do dispositivo (ms) | N x ADC uint16 | CRC-16/CCITT
+BINARY_SYNC = b"\xa5\x5a"
+BINARY_SENSOR_COUNT = int(os.getenv("BINARY_SENSOR_COUNT", str(INITIAL_SENSOR_COUNT)))
+ADC_MAX_VALUE = float(os.getenv("ADC_MAX_VALUE", "4095"))
+ADC_REFERENCE_VOLTAGE = float(os.getenv("ADC_REFERENCE_VOLTAGE", "3.3"))
+READ_CHUNK_SIZE = 4096
+MAX_TEXT_LINE = 4096
+# ~60 s de historico a 100 Hz
+HISTORY_CAPACITY = int(os.getenv("PRESSURE_HISTORY_CAPACITY", "6000"))
+LIVE_CADENCE_STEPS = int(os.getenv("LIVE_CADENCE_STEPS", "8"))
+LIVE_NOMINAL_PERIOD = float(os.getenv("LIVE_NOMINAL_PERIOD", "0.1"))  # delay(100) do firmware
+LIVE_MAX_GAP_SECONDS = float(os.getenv("LIVE_MAX_GAP_SECONDS", "1.0"))
+LIVE_MAX_STEP_INTERVAL = float(os.getenv("LIVE_MAX_STEP_INTERVAL", "2.5"))
+# Dispositivo configurado pelo ambiente (ARDUINO_PORT(S) ou BLE); o que usa /pressao e a gravacao padrao.
+DEFAULT_DEVICE_ID = os.getenv("DEFAULT_DEVICE_ID", "default")
+# Reconexao com backoff exponencial (com jitter) entre estes limites, em segundos.
+RECONNECT_MIN_SECONDS = float(os.getenv("READER_RECONNECT_MIN_SECONDS", "0.5"))
+RECONNECT_MAX_SECONDS = float(os.getenv("READER_RECONNECT_MAX_SECONDS", "30"))
+# O ESP32 reinicia ao abrir a porta (DTR): espera o boot antes de descartar o que chegou.
+SERIAL_SETTLE_SECONDS = float(os.getenv("SERIAL_SETTLE_SECONDS", "2"))
+# Intervalo de consulta da porta onde o event loop nao observa descritores (Windows).
+SERIAL_POLL_SECONDS = float(os.getenv("SERIAL_POLL_SECONDS", "0.005"))
+MAX_DEVICES = int(os.getenv("MAX_DEVICES", "64"))
+DEVICE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,40}$")
+TRANSPORTS = ("serial", "ble")
 
-if USE_BLUETOOTH:
+READER_BYTES = Counter("gaitvision_reader_bytes_total", "Bytes lidos do dispositivo.", ("device",))
+READER_FRAMES = Counter("gaitvision_reader_frames_total", "Quadros publicados pelo leitor.", ("device", "format"))
+READER_PARSE_ERRORS = Counter(
+    "gaitvision_reader_parse_errors_total", "Pacotes descartados pelo leitor.", ("device", "reason")
+)
+READER_RESYNC_BYTES = Counter(
+    "gaitvision_reader_resync_bytes_total",
+    "Bytes pulados procurando um quadro binario valido (sync falso ou CRC).",
+    ("device",),
+)
+READER_CONNECTS = Counter(
+    "gaitvision_reader_connect_attempts_total", "Tentativas de conexao com o dispositivo.", ("device", "result")
+)
+READER_READ_ERRORS = Counter(
+    "gaitvision_reader_read_errors_total", "Quedas da conexao durante a leitura.", ("device",)
+)
+READER_PUBLISH_SECONDS = Histogram(
+    "gaitvision_reader_publish_latency_seconds",
+    "Tempo entre a leitura dos bytes e a publicacao do quadro filtrado.",
+    ("device",),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+def _load_bleak_client():
     try:
         from bleak import BleakClient
     except ImportError as exc:  # pragma: no cover - import guard
         raise RuntimeError("bleak nao instalado. Adicione 'bleak' ao requirements e reinstale.") from exc
+    return BleakClient
+
+
+if USE_BLUETOOTH:
+    _load_bleak_client()
+
+
+class DeviceConfig(NamedTuple):
+    device_id: str
+    transport: str = "serial"
+    # Portas tentadas em ordem (a primeira que abrir e usada).
+    ports: tuple[str, ...] = ()
+    baudrate: int = BAUDRATE
+    bt_address: str | None = None
+    bt_characteristic: str | None = None
+
+    @property
+    def target(self) -> str:
+        return (self.bt_address or "") if self.transport == "ble" else ",".join(self.ports)
+
+
+def _default_device_config() -> DeviceConfig:
+    if USE_BLUETOOTH:
+        return DeviceConfig(DEFAULT_DEVICE_ID, "ble", bt_address=BT_ADDRESS, bt_characteristic=BT_CHARACTERISTIC)
+    return DeviceConfig(DEFAULT_DEVICE_ID, "serial", tuple(PORTA_LIST), BAUDRATE)
 
 
 class _Connection(Protocol):
-    def readline(self) -> bytes: ...
-    def close(self) -> None: ...
+    # Conexao ja entregando bytes ao callback no event loop; ``lost`` recebe a excecao se ela cair.
+    port_name: str
+    lost: asyncio.Future
+
+    async def close(self) -> None: ...
 
 
 class _SerialConnection:
-    def __init__(self) -> None:
-        if not PORTA_LIST:
+    """Porta serial nao bloqueante lida pelo event loop do app (``add_reader`` no descritor, sem thread).
+
+    Onde o loop nao observa descritores (ProactorEventLoop do Windows) a porta e consultada a cada
+    ``SERIAL_POLL_SECONDS``, no mesmo loop.
+    """
+
+    def __init__(self, serial_port: serial.Serial, port_name: str, on_data: Callable[[memoryview], None]) -> None:
+        self._serial = serial_port
+        self.port_name = port_name
+        self._on_data = on_data
+        self._loop = asyncio.get_running_loop()
+        self.lost = self._loop.create_future()
+        self._chunk = memoryview(bytearray(READ_CHUNK_SIZE))
+        self._fd: int | None = None
+        self._poller: asyncio.Task | None = None
+        try:
+            fd = serial_port.fileno()
+            self._loop.add_reader(fd, self._read_ready)
+            self._fd = fd
+        except (AttributeError, NotImplementedError, OSError):
+            self._poller = self._loop.create_task(self._poll())
+
+    @classmethod
+    async def open(
+        cls, ports: tuple[str, ...], baudrate: int, on_data: Callable[[memoryview], None]
+    ) -> "_SerialConnection":
+        if not ports:
             raise RuntimeError("Nenhuma porta serial configurada. Defina ARDUINO_PORT ou ARDUINO_PORTS.")
         last_error: Exception | None = None
-        for port_name in PORTA_LIST:
+        for port_name in ports:
+            serial_port = None
             try:
-                serial_port = serial.Serial(port_name, BAUDRATE, timeout=0.2)
-                time.sleep(2)
+                serial_port = serial.Serial(port_name, baudrate, timeout=0)
+                await asyncio.sleep(SERIAL_SETTLE_SECONDS)
                 serial_port.reset_input_buffer()
-                self._serial = serial_port
-                self.port_name = port_name
-                print(f"Conectado ao dispositivo serial na porta {port_name}")
-                return
+            except asyncio.CancelledError:
+                if serial_port is not None:
+                    serial_port.close()
+                raise
             except Exception as exc:
+                if serial_port is not None:
+                    serial_port.close()
                 last_error = exc
                 print(f"Falha ao conectar na porta {port_name}: {exc}")
-        raise RuntimeError(f"Nao foi possivel conectar nas portas {PORTA_LIST}. Ultimo erro: {last_error}")
+                continue
+            print(f"Conectado ao dispositivo serial na porta {port_name}")
+            return cls(serial_port, port_name, on_data)
+        raise RuntimeError(f"Nao foi possivel conectar nas portas {list(ports)}. Ultimo erro: {last_error}")
 
-    def readline(self) -> bytes:
-        return self._serial.readline()
+    def _read_ready(self) -> None:
+        try:
+            count = os.readv(self._fd, (self._chunk,))
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError as exc:
+            self._connection_lost(exc)
+            return
+        if not count:
+            # Pronto para leitura sem dados: o dispositivo sumiu (cabo USB removido).
+            self._connection_lost(ConnectionError("Porta serial fechada pelo dispositivo"))
+            return
+        try:
+            self._on_data(self._chunk[:count])
+        except Exception as exc:
+            self._connection_lost(exc)
 
-    def close(self) -> None:
+    async def _poll(self) -> None:
+        serial_port = self._serial
+        try:
+            while True:
+                waiting = min(serial_port.in_waiting, READ_CHUNK_SIZE)
+                if waiting:
+                    count = serial_port.readinto(self._chunk[:waiting])
+                    self._on_data(self._chunk[:count])
+                await asyncio.sleep(SERIAL_POLL_SECONDS)
+        except Exception as exc:
+            self._connection_lost(exc)
+
+    def _connection_lost(self, exc: Exception) -> None:
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+        if not self.lost.done():
+            self.lost.set_exception(exc)
+
+    async def close(self) -> None:
+        if not self.lost.done():
+            self.lost.cancel()
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+        if self._poller is not None:
+            self._poller.cancel()
         try:
             self._serial.close()
         except Exception:
@@ -93,272 +248,890 @@ class _SerialConnection:
 
 
 class _BluetoothConnection:
-    def __init__(self) -> None:
-        if not BT_ADDRESS:
+    """Cliente bleak no event loop do app: cada notificacao vai direto para o decodificador, sem fila."""
+
+    def __init__(self, address: str, characteristic: str, on_data: Callable[[bytearray], None]) -> None:
+        self.port_name = address
+        self._characteristic = characteristic
+        self._on_data = on_data
+        self.lost = asyncio.get_running_loop().create_future()
+        self._client = _load_bleak_client()(
+            address, timeout=BT_TIMEOUT, disconnected_callback=self._handle_disconnect
+        )
+
+    @classmethod
+    async def open(
+        cls, address: str | None, characteristic: str | None, on_data: Callable[[bytearray], None]
+    ) -> "_BluetoothConnection":
+        if not address:
             raise RuntimeError("ESP32_BT_ADDRESS nao configurado para conexao Bluetooth.")
-        if not BT_CHARACTERISTIC:
+        if not characteristic:
             raise RuntimeError("ESP32_BT_CHARACTERISTIC nao configurado para leitura via BLE.")
+        connection = cls(address, characteristic, on_data)
+        try:
+            await connection._client.connect()
+            await connection._client.start_notify(characteristic, connection._handle_notification)
+        except BaseException:
+            await connection.close()
+            raise
+        return connection
 
-        self._queue: queue.Queue[bytes] = queue.Queue()
-        self._buffer = bytearray()
-        self._loop = asyncio.new_event_loop()
-        self._client: BleakClient | None = None
-
-        self._loop_thread = threading.Thread(target=self._run_loop, daemon=True)
-        self._loop_thread.start()
-
-        # Conecta de forma bloqueante para manter API semelhante ao serial
-        fut = asyncio.run_coroutine_threadsafe(self._connect(), self._loop)
-        fut.result(timeout=BT_TIMEOUT + 2)
-
-    def _run_loop(self) -> None:
-        asyncio.set_event_loop(self._loop)
-        self._loop.run_forever()
-
-    def _handle_notification(self, _: int, data: bytes) -> None:
-        # Junta bytes recebidos e quebra por linha
-        self._buffer.extend(data)
-        while b"\n" in self._buffer:
-            line, _, remainder = self._buffer.partition(b"\n")
-            self._buffer = bytearray(remainder)
-            self._queue.put(line + b"\n")
-
-    async def _connect(self) -> None:
-        self._client = BleakClient(BT_ADDRESS, timeout=BT_TIMEOUT)
-        await self._client.connect()
-        await self._client.start_notify(BT_CHARACTERISTIC, self._handle_notification)
-
-    async def _disconnect(self) -> None:
-        if self._client:
-            try:
-                await self._client.stop_notify(BT_CHARACTERISTIC)
-            except Exception:
-                pass
-            try:
-                await self._client.disconnect()
-            except Exception:
-                pass
-
-    def readline(self) -> bytes:
+    def _handle_notification(self, _, data: bytearray) -> None:
+        # O bleak chama no event loop; o enquadramento (texto, JSON ou binario) fica a cargo do _PacketDecoder
         try:
-            return self._queue.get(timeout=1.0)
-        except queue.Empty:
-            return b""
+            self._on_data(data)
+        except Exception as exc:
+            self._set_lost(exc)
 
-    def close(self) -> None:
+    def _handle_disconnect(self, _client) -> None:
+        self._set_lost(ConnectionError("Dispositivo BLE desconectado"))
+
+    def _set_lost(self, exc: Exception) -> None:
+        if not self.lost.done():
+            self.lost.set_exception(exc)
+
+    async def close(self) -> None:
+        # Um aviso de desconexao depois daqui nao deve virar excecao sem ninguem esperando.
+        if not self.lost.done():
+            self.lost.cancel()
         try:
-            fut = asyncio.run_coroutine_threadsafe(self._disconnect(), self._loop)
-            fut.result(timeout=BT_TIMEOUT)
+            await self._client.stop_notify(self._characteristic)
         except Exception:
             pass
-        finally:
-            self._loop.call_soon_threadsafe(self._loop.stop)
-            self._loop_thread.join(timeout=1)
-
-
-_last_data = None
-_stop_flag = False
-_data_lock = threading.Lock()
-_data_event = threading.Event()
-_sensor_baseline: dict[str, float | None] = {sensor: None for sensor in SENSOR_KEYS}
-_noise_counters: dict[str, int] = {sensor: 0 for sensor in SENSOR_KEYS}
-_auto_disabled: set[str] = set()
-_outlier_counters: dict[str, int] = {sensor: 0 for sensor in SENSOR_KEYS}
-
-
-def _ensure_sensor_registry(count: int) -> None:
-    """Expande a lista de sensores caso novas leituras tenham mais colunas."""
-    if count <= len(SENSOR_KEYS):
-        return
-    current_len = len(SENSOR_KEYS)
-    for idx in range(current_len, count):
-        sensor = f"fsr{idx}"
-        SENSOR_KEYS.append(sensor)
-        _sensor_baseline[sensor] = None
-        _noise_counters[sensor] = 0
-        _outlier_counters[sensor] = 0
-
-
-def _open_connection_blocking() -> _Connection:
-    while not _stop_flag:
         try:
-            if USE_BLUETOOTH:
-                conn = _BluetoothConnection()
-                print(f"Conectado ao ESP32 via Bluetooth BLE ({BT_ADDRESS} / char {BT_CHARACTERISTIC})")
-            else:
-                conn = _SerialConnection()
-                print(f"Conectado ao dispositivo serial na porta {PORTA}")
-            return conn
-        except Exception as e:
-            target = BT_ADDRESS if USE_BLUETOOTH else PORTA
-            print(f"Nao foi possivel conectar a {target}: {e}. Tentando novamente em 1 segundo...")
-            time.sleep(1)
+            await asyncio.wait_for(self._client.disconnect(), BT_TIMEOUT)
+        except Exception:
+            pass
+
+
+_BINARY_HEADER = struct.Struct("<2sHI")
+_BINARY_DTYPE = np.dtype(
+    [
+        ("sync", "V2"),
+        ("seq", "<u2"),
+        ("device_ms", "<u4"),
+        ("adc", "<u2", (BINARY_SENSOR_COUNT,)),
+        ("crc", "<u2"),
+    ]
+)
+BINARY_FRAME_SIZE = _BINARY_DTYPE.itemsize
+_ADC_TO_VOLTS = ADC_REFERENCE_VOLTAGE / ADC_MAX_VALUE
 
 
-def _parse_packet(line: str):
+def encode_binary_frame(seq: int, device_ms: int, adc_values) -> bytes:
+    """Monta um quadro binario (usado pelo firmware/emulador; o leitor so decodifica)."""
+    body = _BINARY_HEADER.pack(BINARY_SYNC, seq & 0xFFFF, device_ms & 0xFFFFFFFF) + struct.pack(
+        f"<{BINARY_SENSOR_COUNT}H", *adc_values
+    )
+    return body + struct.pack("<H", binascii.crc_hqx(body, 0xFFFF))
+
+
+def _binary_frame_valid(buffer: bytearray, offset: int) -> bool:
+    end = offset + BINARY_FRAME_SIZE
+    if buffer[offset : offset + 2] != BINARY_SYNC:
+        return False
+    expected = buffer[end - 2] | (buffer[end - 1] << 8)
+    return binascii.crc_hqx(buffer[offset : end - 2], 0xFFFF) == expected
+
+
+class BinaryBlock:
+    """Sequencia de quadros binarios consecutivos ja convertidos para volts."""
+
+    __slots__ = ("seq", "device_ms", "volts")
+
+    def __init__(self, buffer: bytearray, offset: int, count: int) -> None:
+        frames = np.frombuffer(buffer, dtype=_BINARY_DTYPE, count=count, offset=offset)
+        # Copias: o bytearray de origem sera reduzido logo em seguida.
+        self.seq = frames["seq"].copy()
+        self.device_ms = frames["device_ms"].copy()
+        self.volts = frames["adc"] * _ADC_TO_VOLTS
+
+
+class _PacketDecoder:
+    """Separa o fluxo de bytes em linhas de texto/JSON e blocos de quadros binarios (auto-deteccao)."""
+
+    def __init__(self, resync_counter=None) -> None:
+        self._buffer = bytearray()
+        self._resync_counter = resync_counter
+
+    def feed(self, data) -> list:
+        buffer = self._buffer
+        buffer += data
+        packets: list = []
+        pos = 0
+        skipped = 0
+        size = len(buffer)
+        while pos < size:
+            if buffer[pos] == BINARY_SYNC[0]:
+                if size - pos < BINARY_FRAME_SIZE:
+                    break
+                if not _binary_frame_valid(buffer, pos):
+                    pos += 1  # sync falso ou CRC invalido: ressincroniza byte a byte
+                    skipped += 1
+                    continue
+                run_end = pos + BINARY_FRAME_SIZE
+                while run_end + BINARY_FRAME_SIZE <= size and _binary_frame_valid(buffer, run_end):
+                    run_end += BINARY_FRAME_SIZE
+                packets.append(BinaryBlock(buffer, pos, (run_end - pos) // BINARY_FRAME_SIZE))
+                pos = run_end
+                continue
+            newline = buffer.find(b"\n", pos)
+            sync = buffer.find(BINARY_SYNC[:1], pos, size if newline == -1 else newline)
+            if sync != -1:
+                # lixo antes de um quadro binario
+                pos = sync
+                continue
+            if newline == -1:
+                if size - pos > MAX_TEXT_LINE:
+                    pos = size
+                break
+            packets.append(bytes(buffer[pos:newline]))
+            pos = newline + 1
+        del buffer[:pos]
+        if skipped and self._resync_counter is not None:
+            self._resync_counter.inc(skipped)
+        return packets
+
+
+class _PressureHistory:
+    """Ring buffer pre-alocado (timestamps x sensores) escrito pelo leitor e lido pelas rotas (threadpool)."""
+
+    def __init__(self, capacity: int, sensor_count: int) -> None:
+        self._capacity = capacity
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros((capacity, sensor_count), dtype=np.float32)
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def ensure_sensors(self, count: int) -> None:
+        with self._lock:
+            current = self._values.shape[1]
+            if count <= current:
+                return
+            grown = np.zeros((self._capacity, count), dtype=np.float32)
+            grown[:, :current] = self._values
+            self._values = grown
+
+    def append(self, timestamp: float, values) -> None:
+        with self._lock:
+            row = self._next
+            self._timestamps[row] = timestamp
+            self._values[row, : len(values)] = values
+            self._next = (row + 1) % self._capacity
+            self._size = min(self._size + 1, self._capacity)
+
+    def _ordered(self, array: np.ndarray, first: int) -> np.ndarray:
+        # Copia contigua das posicoes logicas [first, size), da mais antiga para a mais recente.
+        begin = (self._next - self._size + first) % self._capacity
+        end = begin + (self._size - first)
+        if end <= self._capacity:
+            return array[begin:end].copy()
+        return np.concatenate((array[begin:], array[: end - self._capacity]))
+
+    def window(self, seconds: float) -> tuple[np.ndarray, np.ndarray]:
+        cutoff = time.time() - seconds
+        with self._lock:
+            timestamps = self._ordered(self._timestamps, 0)
+            first = int(np.searchsorted(timestamps, cutoff, side="left"))
+            return timestamps[first:], self._ordered(self._values, first)
+
+
+class _LiveGaitMetrics:
+    """Metricas do main_analise.m atualizadas a cada quadro com estado O(1).
+
+    Como o filtro e linear, filtra-se direto a soma de fsr1..fsr4 (igual a somar as colunas filtradas).
     """
-    Converte uma linha recebida em um dicionario de leituras.
-    Aceita tanto JSON ({"fsr0": 1.0}) quanto valores separados por tab/espaco.
+
+    def __init__(self, sensor_keys: list[str]) -> None:
+        self._lock = threading.Lock()
+        # Mesma lista do dispositivo: cresce quando o firmware passa a mandar mais colunas.
+        self._sensor_keys = sensor_keys
+        self._columns: list[int] = []
+        self._columns_for = -1
+        self.reset()
+
+    def _signal_columns(self) -> list[int]:
+        keys = self._sensor_keys
+        if len(keys) != self._columns_for:
+            self._columns = [keys.index(key) for key in SIGNAL_COLUMNS if key in keys]
+            self._columns_for = len(keys)
+        return self._columns
+
+    def reset(self) -> None:
+        with self._lock:
+            self._period = LIVE_NOMINAL_PERIOD
+            self._period_count = 0
+            self._coeffs_period = LIVE_NOMINAL_PERIOD
+            self._b, self._a = tustin_coefficients(LIVE_NOMINAL_PERIOD)
+            self._z1 = self._z2 = 0.0
+            self._last_time: float | None = None
+            self._last_output = 0.0
+            self._rising = False
+            self._peak_max = 0.0
+            self._last_step: float | None = None
+            self._intervals: deque[float] = deque(maxlen=LIVE_CADENCE_STEPS)
+            self._started_at: float | None = None
+            self.impulse = 0.0
+            self.max_loading_rate: float | None = None
+            self.step_count = 0
+            self.frame_count = 0
+
+    def _filter(self, value: float) -> float:
+        # Biquad em forma direta II transposta (mesmo resultado do lsim com estado inicial nulo).
+        b0, b1, b2 = self._b
+        _, a1, a2 = self._a
+        output = b0 * value + self._z1
+        self._z1 = b1 * value - a1 * output + self._z2
+        self._z2 = b2 * value - a2 * output
+        return output
+
+    def _track_period(self, dt: float) -> None:
+        # Media simples nos primeiros intervalos, depois media movel exponencial.
+        self._period_count += 1
+        self._period += max(0.05, 1.0 / self._period_count) * (dt - self._period)
+        if abs(self._period - self._coeffs_period) > 0.1 * self._coeffs_period:
+            self._coeffs_period = self._period
+            self._b, self._a = tustin_coefficients(self._period)
+
+    def update(self, timestamp: float, filtered: np.ndarray) -> None:
+        total = 0.0
+        for column in self._signal_columns():
+            value = float(filtered[column])
+            if value == value:
+                total += value
+        with self._lock:
+            self.frame_count += 1
+            dt = None if self._last_time is None else timestamp - self._last_time
+            if dt is not None and not 0 < dt <= LIVE_MAX_GAP_SECONDS:
+                # Lacuna ou relogio reiniciado: recomeca a integracao sem contar o intervalo.
+                dt = None
+            if dt is not None:
+                self._track_period(dt)
+            output = self._filter(total)
+            if self._started_at is None:
+                self._started_at = timestamp
+            if dt is not None:
+                self.impulse += 0.5 * dt * (output + self._last_output)
+                rate = (output - self._last_output) / dt
+                if self.max_loading_rate is None or rate > self.max_loading_rate:
+                    self.max_loading_rate = rate
+                self._detect_step(output)
+            self._peak_max = max(self._peak_max, output)
+            self._last_output = output
+            self._last_time = timestamp
+
+    def _detect_step(self, output: float) -> None:
+        # Pico = fim de uma subida; altura e distancia minimas como no findpeaks do script.
+        previous = self._last_output
+        if output > previous:
+            self._rising = True
+            return
+        if not self._rising:
+            return
+        self._rising = False
+        if previous < PEAK_HEIGHT_FRACTION * self._peak_max or previous <= 0:
+            return
+        peak_time = self._last_time
+        if self._last_step is not None:
+            interval = peak_time - self._last_step
+            if interval < MIN_STEP_SECONDS:
+                return
+            # Pausas longas recomecam a contagem em vez de derrubar a cadencia.
+            if interval <= LIVE_MAX_STEP_INTERVAL:
+                self._intervals.append(interval)
+        self._last_step = peak_time
+        self.step_count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cadence = None
+            if self._intervals:
+                ordered = sorted(self._intervals)
+                middle = len(ordered) // 2
+                median = ordered[middle] if len(ordered) % 2 else 0.5 * (ordered[middle - 1] + ordered[middle])
+                cadence = 1.0 / median
+            elapsed = 0.0 if self._started_at is None else self._last_time - self._started_at
+            return {
+                "cadence_hz": cadence,
+                "impulse": self.impulse,
+                "max_loading_rate": self.max_loading_rate,
+                "step_count": self.step_count,
+                "frame_count": self.frame_count,
+                "elapsed_seconds": elapsed,
+            }
+
+
+class FrameSubscription(asyncio.Queue):
+    """Fila asyncio limitada de um cliente do stream; quando cheia descarta os quadros mais antigos.
+
+    ``get()`` devolve ``None`` quando o dispositivo deixa de existir (o stream deve terminar).
     """
-    if line.startswith("{") and line.endswith("}"):
-        data = json.loads(line)
-        if isinstance(data, dict):
-            return data
-        return None
-    parts = line.split()
-    if not parts:
-        return None
-    if len(parts) > len(SENSOR_KEYS):
-        _ensure_sensor_registry(len(parts))
-        print(f"Detectados {len(parts)} sensores. Ajustando registro automaticamente.")
-    if len(parts) < len(SENSOR_KEYS):
-        # linha incompleta, ignora para evitar desalinhamento
-        return None
-    values = [float(value) for value in parts]
-    return {sensor: values[idx] for idx, sensor in enumerate(SENSOR_KEYS)}
 
+    def __init__(self, maxlen: int) -> None:
+        super().__init__(maxlen)
+        self.dropped = 0
+        self.closed = False
 
-def _is_foot_active(payload: dict[str, float]) -> bool:
-    active = sum(1 for value in payload.values() if value >= CONTACT_MIN_VOLTAGE)
-    return active >= MIN_ACTIVE_SENSORS
+    def push(self, frame: dict | None) -> None:
+        # O leitor publica no mesmo event loop: put_nowait acorda quem espera em get() sem troca de thread.
+        if self.closed:
+            return
+        if self.full():
+            self.get_nowait()
+            self.dropped += 1
+        self.put_nowait(frame)
 
+    def close(self) -> None:
+        self.push(None)
+        self.closed = True
 
-def _apply_baseline(payload: dict[str, float], *, learn: bool, foot_active: bool) -> dict[str, float]:
-    corrected: dict[str, float] = {}
-    for sensor in SENSOR_KEYS:
-        value = float(payload.get(sensor, 0.0))
-        baseline = _sensor_baseline.get(sensor)
-        if baseline is None:
-            if learn and not foot_active:
-                baseline = value
-            else:
-                baseline = 0.0
-            _sensor_baseline[sensor] = baseline
-        if learn and not foot_active:
-            baseline = baseline + (value - baseline) * BASELINE_LEARN_RATE
-            _sensor_baseline[sensor] = baseline
-        corrected_value = value - baseline
-        if corrected_value < BASELINE_OFFSET_TOLERANCE:
-            corrected_value = 0.0
-        corrected[sensor] = corrected_value
-    return corrected
-
-
-def _update_noise_detection(payload: dict[str, float], *, foot_active: bool) -> None:
-    if foot_active:
-        for sensor in SENSOR_KEYS:
-            _noise_counters[sensor] = 0
-        return
-    for sensor, value in payload.items():
-        if value > NOISE_THRESHOLD_VOLTAGE:
-            _noise_counters[sensor] = _noise_counters.get(sensor, 0) + 1
-            if _noise_counters[sensor] >= NOISE_TRIGGER_COUNT:
-                _auto_disabled.add(sensor)
-        else:
-            _noise_counters[sensor] = max(_noise_counters.get(sensor, 0) - 1, 0)
-
-
-def _update_outlier_detection(payload: dict[str, float]) -> None:
-    magnitudes = [abs(value) for value in payload.values() if value != 0]
-    if len(magnitudes) < 3:
-        for sensor in SENSOR_KEYS:
-            _outlier_counters[sensor] = 0
-        return
-    median_val = statistics.median(magnitudes)
-    deviations = [abs(value - median_val) for value in magnitudes]
-    mad = statistics.median(deviations) or 0.0
-    threshold = max(OUTLIER_MIN_THRESHOLD, median_val + OUTLIER_FACTOR * mad)
-
-    for sensor, value in payload.items():
-        magnitude = abs(value)
-        if magnitude > threshold:
-            _outlier_counters[sensor] = _outlier_counters.get(sensor, 0) + 1
-            if _outlier_counters[sensor] >= OUTLIER_TRIGGER_COUNT:
-                if sensor not in _auto_disabled:
-                    print(
-                        f"Sensor {sensor} desativado automaticamente (valor {magnitude:.3f} excedeu {threshold:.3f})."
+
+def _sensor_disabled_by_config(sensor: str) -> bool:
+    return sensor in DISABLED_SENSORS or bool(ALLOWED_SENSORS and sensor not in ALLOWED_SENSORS)
+
+
+def _reconnect_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter: metade do intervalo fixa e metade aleatoria."""
+    ceiling = min(RECONNECT_MAX_SECONDS, RECONNECT_MIN_SECONDS * 2 ** min(attempt, 32))
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+def _sorted_median(ordered: list[float]) -> float:
+    middle = len(ordered) // 2
+    if len(ordered) % 2:
+        return ordered[middle]
+    return (ordered[middle - 1] + ordered[middle]) / 2
+
+
+class PressureDevice:
+    """Uma palmilha: tarefa de leitura no event loop do app, filtros, historico, metricas ao vivo e assinantes proprios.
+
+    Nada e compartilhado entre dispositivos, entao pe esquerdo e direito (ou varios pacientes) nao
+    interferem no baseline nem na desativacao automatica de sensores um do outro.
+    """
+
+    def __init__(self, config: DeviceConfig) -> None:
+        self.config = config
+        self.device_id = config.device_id
+        self.sensor_keys = [f"fsr{i}" for i in range(INITIAL_SENSOR_COUNT)]
+        sensor_count = len(self.sensor_keys)
+        self._history = _PressureHistory(HISTORY_CAPACITY, sensor_count)
+        self._live_metrics = _LiveGaitMetrics(self.sensor_keys)
+        self._last_data = None
+        self._data_event = asyncio.Event()
+        # Estado dos filtros em listas indexadas pela posicao do sensor em sensor_keys (None = baseline ainda nao
+        # aprendido). Com ~7 sensores, laco Python sobre listas custa menos por quadro que chamadas NumPy.
+        self._sensor_baseline: list[float | None] = [None] * sensor_count
+        self._noise_counters = [0] * sensor_count
+        self._outlier_counters = [0] * sensor_count
+        self.auto_disabled: set[str] = set()
+        self._disabled_columns = self._disabled_sensor_columns()
+        self._subscribers: tuple[FrameSubscription, ...] = ()
+        self._frame_listeners: tuple = ()
+        self._subscribers_lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+        self._decoder = _PacketDecoder()
+        self.connected_port: str | None = None
+        self.frame_count = 0
+        self.last_frame_at: float | None = None
+        # Filhos ja rotulados: o caminho quente nao procura rotulos a cada quadro.
+        self._bytes_metric = READER_BYTES.labels(self.device_id)
+        self._frames_text = READER_FRAMES.labels(self.device_id, "text")
+        self._frames_json = READER_FRAMES.labels(self.device_id, "json")
+        self._frames_binary = READER_FRAMES.labels(self.device_id, "binary")
+        self._parse_invalid = READER_PARSE_ERRORS.labels(self.device_id, "invalid")
+        self._parse_incomplete = READER_PARSE_ERRORS.labels(self.device_id, "incomplete")
+        self._resync_metric = READER_RESYNC_BYTES.labels(self.device_id)
+        self._read_errors = READER_READ_ERRORS.labels(self.device_id)
+        self._publish_latency = READER_PUBLISH_SECONDS.labels(self.device_id)
+
+    def _log(self, message: str) -> None:
+        print(message if self.device_id == DEFAULT_DEVICE_ID else f"[{self.device_id}] {message}")
+
+    # --- ciclo de vida ---
+
+    def start(self) -> None:
+        """Cria a tarefa de leitura no event loop atual e retorna na hora (conexao e novas tentativas ficam nela)."""
+        if self.running:
+            return
+        # Primitivas asyncio pertencem ao loop em que sao usadas: recria para o loop que vai ler.
+        self._data_event = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run(), name=f"reader-{self.device_id}")
+
+    async def stop(self) -> None:
+        """Cancela a tarefa de leitura e espera a conexao fechar (imediato, mesmo no meio de uma conexao)."""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def status(self) -> dict:
+        config = self.config
+        return {
+            "id": self.device_id,
+            "transport": config.transport,
+            "ports": list(config.ports),
+            "bt_address": config.bt_address,
+            "running": self.running,
+            "connected": self.connected_port is not None,
+            "connected_port": self.connected_port,
+            "sensors": list(self.sensor_keys),
+            "auto_disabled": sorted(self.auto_disabled),
+            "frame_count": self.frame_count,
+            "last_frame_at": self.last_frame_at,
+            "stream_clients": len(self._subscribers),
+        }
+
+    # --- assinantes ---
+
+    def subscribe_frames(self, maxlen: int = STREAM_QUEUE_SIZE) -> FrameSubscription:
+        """Registra um assinante (no event loop do leitor) que recebe todos os quadros filtrados com ``await get()``."""
+        subscription = FrameSubscription(maxlen)
+        with self._subscribers_lock:
+            self._subscribers = (*self._subscribers, subscription)
+        return subscription
+
+    def unsubscribe_frames(self, subscription: FrameSubscription) -> None:
+        with self._subscribers_lock:
+            self._subscribers = tuple(sub for sub in self._subscribers if sub is not subscription)
+
+    def close_subscribers(self) -> None:
+        """Encerra os streams abertos (cada ``get()`` pendente recebe ``None``)."""
+        with self._subscribers_lock:
+            subscribers, self._subscribers = self._subscribers, ()
+        for subscription in subscribers:
+            subscription.close()
+
+    def add_frame_listener(self, callback) -> None:
+        """Registra um callback sincrono chamado no event loop a cada quadro (deve ser rapido e nao bloquear)."""
+        with self._subscribers_lock:
+            self._frame_listeners = (*self._frame_listeners, callback)
+
+    def remove_frame_listener(self, callback) -> None:
+        with self._subscribers_lock:
+            self._frame_listeners = tuple(listener for listener in self._frame_listeners if listener != callback)
+
+    def _publish_frame(self, frame: dict) -> None:
+        # Copy-on-write: as tuplas de ouvintes e assinantes sao lidas sem lock a cada quadro.
+        for listener in self._frame_listeners:
+            try:
+                listener(frame)
+            except Exception as exc:
+                self._log(f"Erro em ouvinte de quadros: {exc}")
+        for subscription in self._subscribers:
+            subscription.push(frame)
+
+    # --- filtros ---
+
+    def _disabled_sensor_columns(self) -> list[int]:
+        return [
+            idx
+            for idx, sensor in enumerate(self.sensor_keys)
+            if sensor in self.auto_disabled or _sensor_disabled_by_config(sensor)
+        ]
+
+    def _ensure_sensor_registry(self, count: int) -> None:
+        """Expande a lista de sensores caso novas leituras tenham mais colunas."""
+        current_len = len(self.sensor_keys)
+        if count <= current_len:
+            return
+        extra = count - current_len
+        for idx in range(current_len, count):
+            self.sensor_keys.append(f"fsr{idx}")
+        self._sensor_baseline.extend([None] * extra)
+        self._noise_counters.extend([0] * extra)
+        self._outlier_counters.extend([0] * extra)
+        self._disabled_columns = self._disabled_sensor_columns()
+        self._history.ensure_sensors(count)
+
+    def parse_packet(self, line: str | bytes):
+        """
+        Converte um pacote recebido em um dicionario de leituras.
+        Aceita JSON ({"fsr0": 1.0}), valores separados por tab/espaco ou um quadro binario completo.
+        """
+        sensor_keys = self.sensor_keys
+        if isinstance(line, (bytes, bytearray)):
+            if len(line) == BINARY_FRAME_SIZE and line[:2] == BINARY_SYNC:
+                packet = bytearray(line)
+                if not _binary_frame_valid(packet, 0):
+                    raise ValueError("CRC invalido no quadro binario")
+                self._ensure_sensor_registry(BINARY_SENSOR_COUNT)
+                volts = BinaryBlock(packet, 0, 1).volts[0]
+                return {sensor_keys[idx]: float(value) for idx, value in enumerate(volts)}
+            line = line.decode("utf-8", errors="ignore").strip()
+        if line.startswith("{") and line.endswith("}"):
+            data = json.loads(line)
+            if isinstance(data, dict):
+                return data
+            return None
+        parts = line.split()
+        if not parts:
+            return None
+        if len(parts) > len(sensor_keys):
+            self._ensure_sensor_registry(len(parts))
+            self._log(f"Detectados {len(parts)} sensores. Ajustando registro automaticamente.")
+        if len(parts) < len(sensor_keys):
+            # linha incompleta, ignora para evitar desalinhamento
+            return None
+        values = [float(value) for value in parts]
+        return {sensor: values[idx] for idx, sensor in enumerate(sensor_keys)}
+
+    def _payload_to_values(self, payload: dict[str, float]) -> list[float]:
+        return [float(payload.get(sensor, 0.0)) for sensor in self.sensor_keys]
+
+    def _apply_baseline(self, values: list[float], *, learn: bool, foot_active: bool) -> list[float]:
+        baseline = self._sensor_baseline
+        learning = learn and not foot_active
+        corrected = []
+        for idx, value in enumerate(values):
+            current = baseline[idx]
+            if current is None:
+                current = value if learning else 0.0
+                baseline[idx] = current
+            if learning:
+                current = current + (value - current) * BASELINE_LEARN_RATE
+                baseline[idx] = current
+            corrected_value = value - current
+            # NaN passa adiante (comparacao falsa), como no filtro original
+            corrected.append(0.0 if corrected_value < BASELINE_OFFSET_TOLERANCE else corrected_value)
+        return corrected
+
+    def _auto_disable(self, idx: int) -> None:
+        self.auto_disabled.add(self.sensor_keys[idx])
+        self._disabled_columns = self._disabled_sensor_columns()
+
+    def _update_noise_detection(self, corrected: list[float], *, foot_active: bool) -> None:
+        counters = self._noise_counters
+        if foot_active:
+            counters[:] = [0] * len(counters)
+            return
+        for idx, value in enumerate(corrected):
+            if value > NOISE_THRESHOLD_VOLTAGE:
+                counters[idx] += 1
+                if counters[idx] >= NOISE_TRIGGER_COUNT and self.sensor_keys[idx] not in self.auto_disabled:
+                    self._auto_disable(idx)
+            elif counters[idx]:
+                counters[idx] -= 1
+
+    def _update_outlier_detection(self, corrected: list[float]) -> None:
+        counters = self._outlier_counters
+        magnitudes = sorted(abs(value) for value in corrected if value != 0)
+        if len(magnitudes) < 3:
+            counters[:] = [0] * len(counters)
+            return
+        median_val = _sorted_median(magnitudes)
+        mad = _sorted_median(sorted(abs(value - median_val) for value in magnitudes)) or 0.0
+        threshold = max(OUTLIER_MIN_THRESHOLD, median_val + OUTLIER_FACTOR * mad)
+
+        for idx, value in enumerate(corrected):
+            magnitude = abs(value)
+            if magnitude > threshold:
+                counters[idx] += 1
+                if counters[idx] >= OUTLIER_TRIGGER_COUNT and self.sensor_keys[idx] not in self.auto_disabled:
+                    self._log(
+                        f"Sensor {self.sensor_keys[idx]} desativado automaticamente "
+                        f"(valor {magnitude:.3f} excedeu {threshold:.3f})."
                     )
-                _auto_disabled.add(sensor)
-        else:
-            _outlier_counters[sensor] = 0
-
-
-def _apply_disabled_sensors(payload: dict[str, float]) -> dict[str, float]:
-    disabled = DISABLED_SENSORS | _auto_disabled
-    if ALLOWED_SENSORS:
-        for sensor in SENSOR_KEYS:
-            if sensor not in ALLOWED_SENSORS:
-                disabled.add(sensor)
-    if not disabled:
-        return payload
-    filtered = dict(payload)
-    for sensor in disabled:
-        if sensor in filtered:
-            filtered[sensor] = 0.0
-    return filtered
-
-
-def _apply_sensor_filters(payload: dict[str, float], *, learn: bool = True) -> dict[str, float]:
-    structured = {sensor: float(payload.get(sensor, 0.0)) for sensor in SENSOR_KEYS}
-    foot_active = _is_foot_active(structured)
-    corrected = _apply_baseline(structured, learn=learn, foot_active=foot_active)
-    if learn:
-        _update_noise_detection(corrected, foot_active=foot_active)
-        _update_outlier_detection(corrected)
-    return _apply_disabled_sensors(corrected)
-
-
-def _serial_loop():
-    global _last_data
-    while not _stop_flag:
-        conn = _open_connection_blocking()
-        while not _stop_flag:
+                    self._auto_disable(idx)
+            else:
+                counters[idx] = 0
+
+    def _filter_values(self, values: list[float], *, learn: bool = True) -> list[float]:
+        """Baseline, ruido, outliers e sensores desativados sobre uma lista indexada por sensor_keys."""
+        foot_active = sum(1 for value in values if value >= CONTACT_MIN_VOLTAGE) >= MIN_ACTIVE_SENSORS
+        corrected = self._apply_baseline(values, learn=learn, foot_active=foot_active)
+        if learn:
+            self._update_noise_detection(corrected, foot_active=foot_active)
+            self._update_outlier_detection(corrected)
+        for idx in self._disabled_columns:
+            corrected[idx] = 0.0
+        return corrected
+
+    def apply_sensor_filters(self, payload: dict[str, float], *, learn: bool = True) -> dict[str, float]:
+        filtered = self._filter_values(self._payload_to_values(payload), learn=learn)
+        return dict(zip(self.sensor_keys, filtered))
+
+    def apply_sensor_filters_batch(self, frames: np.ndarray, *, learn: bool = True) -> np.ndarray:
+        """
+        Filtra um bloco (quadros x sensores, colunas na ordem de sensor_keys) de uma vez.
+        Com learn=True o estado evolui quadro a quadro, exatamente como no caminho unitario;
+        com learn=False o bloco inteiro e corrigido em operacoes vetorizadas.
+        """
+        block = np.asarray(frames, dtype=np.float64)
+        if block.ndim != 2:
+            raise ValueError("Bloco de quadros deve ser bidimensional")
+        self._ensure_sensor_registry(block.shape[1])
+        if block.shape[1] < len(self.sensor_keys):
+            block = np.pad(block, ((0, 0), (0, len(self.sensor_keys) - block.shape[1])))
+
+        if not learn:
+            baseline = self._sensor_baseline
+            baseline[:] = [0.0 if value is None else value for value in baseline]
+            corrected = block - np.array(baseline, dtype=np.float64)
+            corrected[corrected < BASELINE_OFFSET_TOLERANCE] = 0.0
+            corrected[:, self._disabled_columns] = 0.0
+            return corrected
+
+        # Cada quadro depende do estado deixado pelo anterior: o bloco passa pelo caminho unitario linha a linha.
+        return np.array([self._filter_values(row) for row in block.tolist()], dtype=np.float64).reshape(block.shape)
+
+    # --- leitura ---
+
+    def _publish_filtered(self, filtered: list[float], received_at: float, extra: dict | None = None) -> None:
+        data = dict(zip(self.sensor_keys, filtered))
+        self._last_data = data
+        self._data_event.set()
+        self._history.append(received_at, filtered)
+        # Quadros binarios de um mesmo bloco chegam juntos: o relogio do dispositivo da o passo real.
+        device_ms = extra.get("device_ms") if extra else None
+        self._live_metrics.update(received_at if device_ms is None else device_ms / 1000.0, filtered)
+        frame = {"timestamp": received_at, "pressao": data}
+        if extra:
+            frame.update(extra)
+        self._publish_frame(frame)
+
+    def _handle_packet(self, packet, read_at: float) -> None:
+        """Publica os quadros do pacote; ``read_at`` (perf_counter) e quando os bytes sairam da porta."""
+        received_at = time.time()
+        if isinstance(packet, BinaryBlock):
+            filtered = self.apply_sensor_filters_batch(packet.volts)
+            for row, seq, device_ms in zip(filtered.tolist(), packet.seq.tolist(), packet.device_ms.tolist()):
+                self._publish_filtered(row, received_at, {"seq": seq, "device_ms": device_ms})
+                self._publish_latency.observe(time.perf_counter() - read_at)
+            self._frames_binary.inc(len(filtered))
+            self.frame_count += len(filtered)
+            self.last_frame_at = received_at
+            return
+        line = packet.decode("utf-8", errors="ignore").strip()
+        if not line:
+            return
+        data = self.parse_packet(line)
+        if data is None:
+            self._parse_incomplete.inc()
+            return
+        self._publish_filtered(self._filter_values(self._payload_to_values(data)), received_at)
+        self._publish_latency.observe(time.perf_counter() - read_at)
+        (self._frames_json if line[0] == "{" else self._frames_text).inc()
+        self.frame_count += 1
+        self.last_frame_at = received_at
+
+    def _receive(self, data) -> None:
+        """Chamado no event loop a cada leitura da conexao: decodifica e publica na hora."""
+        read_at = time.perf_counter()
+        self._bytes_metric.inc(len(data))
+        for packet in self._decoder.feed(data):
             try:
-                raw_line = conn.readline().decode("utf-8", errors="ignore").strip()
-                if not raw_line:
-                    continue
-                data = _parse_packet(raw_line)
-                if data is not None:
-                    data = _apply_sensor_filters(data)
-                    with _data_lock:
-                        _last_data = data
-                    _data_event.set()
+                self._handle_packet(packet, read_at)
             except (json.JSONDecodeError, UnicodeDecodeError, ValueError):
-                continue
+                self._parse_invalid.inc()
+
+    async def _open_connection(self) -> _Connection:
+        config = self.config
+        attempt = 0
+        while True:
+            # Decodificador novo a cada conexao: restos da anterior nao se misturam (o BLE notifica antes de retornar).
+            self._decoder = _PacketDecoder(self._resync_metric)
+            try:
+                if config.transport == "ble":
+                    conn = await _BluetoothConnection.open(config.bt_address, config.bt_characteristic, self._receive)
+                    self._log(
+                        f"Conectado ao ESP32 via Bluetooth BLE ({config.bt_address} / char {config.bt_characteristic})"
+                    )
+                else:
+                    conn = await _SerialConnection.open(config.ports, config.baudrate, self._receive)
+                self.connected_port = conn.port_name
+                READER_CONNECTS.labels(self.device_id, "ok").inc()
+                return conn
             except Exception as e:
-                print("Erro na leitura do dispositivo:", e)
-                try:
-                    conn.close()
-                except Exception:
-                    pass
-                break
+                READER_CONNECTS.labels(self.device_id, "error").inc()
+                delay = _reconnect_delay(attempt)
+                attempt += 1
+                self._log(f"Nao foi possivel conectar a {config.target}: {e}. Tentando novamente em {delay:.1f} s...")
+                await asyncio.sleep(delay)
+
+    async def _run(self) -> None:
+        # Cancelar a tarefa (stop) interrompe qualquer espera: conexao, settle, backoff ou leitura.
+        while True:
+            conn = await self._open_connection()
+            try:
+                await conn.lost
+            except Exception as e:
+                self._read_errors.inc()
+                self._log(f"Erro na leitura do dispositivo: {e}")
+            finally:
+                self.connected_port = None
+                await conn.close()
 
+    # --- consulta ---
 
-# inicia thread assim que o modulo e importado
-threading.Thread(target=_serial_loop, daemon=True).start()
+    def _generate_fake_data(self) -> dict:
+        """Retorna leituras simuladas para todos os sensores."""
+        fake = {}
+        for sensor in self.sensor_keys:
+            fake[sensor] = 2.5 + 2.5 * random.uniform(-0.9, 0.9)
+            fake[sensor] = max(0, min(5, fake[sensor]))  # garante entre 0 e 5 V
+        return self.apply_sensor_filters(fake, learn=False)
 
+    def generate_fake_frame(self) -> dict:
+        """Quadro simulado no mesmo formato publicado pelo stream."""
+        return {"timestamp": time.time(), "pressao": self._generate_fake_data()}
 
-def _generate_fake_data():
-    """Retorna leituras simuladas para os 7 sensores."""
-    fake = {}
-    for sensor in SENSOR_KEYS:
-        fake[sensor] = 2.5 + 2.5 * random.uniform(-0.9, 0.9)
-        fake[sensor] = max(0, min(5, fake[sensor]))  # garante entre 0 e 5 V
-    return _apply_sensor_filters(fake, learn=False)
+    def read_pressure_window(self, seconds: float) -> tuple[np.ndarray, np.ndarray, list[str]]:
+        """
+        Retorna (timestamps, valores, sensores) dos quadros dos ultimos `seconds` segundos.
+        `valores` tem uma linha por quadro e uma coluna por sensor, na ordem de `sensores`.
+        """
+        timestamps, values = self._history.window(seconds)
+        keys = list(self.sensor_keys)
+        return timestamps, values[:, : len(keys)], keys
 
+    def read_gait_metrics(self) -> dict:
+        """Cadencia, impulso e taxa de carga acumulados desde o ultimo reset, sem reler amostras."""
+        return self._live_metrics.snapshot()
 
-def read_pressure_data(timeout=1.0, allow_simulated=ALLOW_SIMULATED):
-    """
-    Retorna o ultimo pacote recebido do Arduino.
-    Se nada chegar dentro do timeout e allow_simulated=True, devolve dados fake.
-    """
-    got_data = _data_event.wait(timeout)
-    if got_data:
-        with _data_lock:
-            if _last_data is not None:
-                data_copy = dict(_last_data)
-                _data_event.clear()
-                return dict(data_copy)
-    if allow_simulated:
-        return _generate_fake_data()
-    return None
+    def reset_gait_metrics(self) -> None:
+        self._live_metrics.reset()
+
+    def reset_filters(self) -> None:
+        """Esquece baselines, contadores e sensores desativados automaticamente (como um dispositivo recem-criado)."""
+        sensor_count = len(self.sensor_keys)
+        self._sensor_baseline = [None] * sensor_count
+        self._noise_counters = [0] * sensor_count
+        self._outlier_counters = [0] * sensor_count
+        self.auto_disabled.clear()
+        self._disabled_columns = self._disabled_sensor_columns()
+
+    async def read_pressure_data(self, timeout=1.0, allow_simulated=ALLOW_SIMULATED):
+        """
+        Retorna o ultimo pacote recebido do dispositivo (aguarda no event loop, sem ocupar uma thread).
+        Se nada chegar dentro do timeout e allow_simulated=True, devolve dados fake.
+        """
+        try:
+            await asyncio.wait_for(self._data_event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            if self._last_data is not None:
+                self._data_event.clear()
+                return dict(self._last_data)
+        if allow_simulated:
+            return self._generate_fake_data()
+        return None
+
+
+class DeviceManager:
+    """Registro de dispositivos: cada um tem sua tarefa de leitura e seu estado, acessados por id."""
+
+    def __init__(self, max_devices: int = MAX_DEVICES) -> None:
+        self.max_devices = max_devices
+        self._devices: dict[str, PressureDevice] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _validate(config: DeviceConfig) -> None:
+        if not DEVICE_ID_PATTERN.match(config.device_id):
+            raise ValueError("Id do dispositivo deve ter de 1 a 40 letras, números, '-' ou '_'")
+        if config.transport not in TRANSPORTS:
+            raise ValueError(f"Transporte inválido: {config.transport}")
+        if config.transport == "serial" and not config.ports:
+            raise ValueError("Informe ao menos uma porta serial")
+        if config.transport == "ble" and not (config.bt_address and config.bt_characteristic):
+            raise ValueError("Informe o endereço e a característica BLE")
+
+    def add(self, config: DeviceConfig, *, start: bool = True) -> PressureDevice:
+        self._validate(config)
+        with self._lock:
+            if config.device_id in self._devices:
+                raise ValueError(f"Dispositivo já cadastrado: {config.device_id}")
+            if len(self._devices) >= self.max_devices:
+                raise ValueError(f"Limite de {self.max_devices} dispositivos atingido")
+            for other in self._devices.values():
+                if config.transport == "serial" and set(config.ports) & set(other.config.ports):
+                    raise ValueError(f"Porta já usada pelo dispositivo {other.device_id}")
+                if config.transport == "ble" and config.bt_address == other.config.bt_address:
+                    raise ValueError(f"Endereço BLE já usado pelo dispositivo {other.device_id}")
+            device = PressureDevice(config)
+            self._devices[config.device_id] = device
+        if start:
+            device.start()
+        return device
+
+    def get(self, device_id: str) -> PressureDevice:
+        device = self._devices.get(device_id)
+        if device is None:
+            raise ValueError("Dispositivo não encontrado")
+        return device
+
+    async def remove(self, device_id: str) -> None:
+        if device_id == DEFAULT_DEVICE_ID:
+            raise ValueError("O dispositivo padrão não pode ser removido")
+        with self._lock:
+            device = self._devices.pop(device_id, None)
+        if device is None:
+            raise ValueError("Dispositivo não encontrado")
+        await device.stop()
+        device.close_subscribers()
+
+    def list(self) -> list[dict]:
+        return [device.status() for device in list(self._devices.values())]
+
+    def __iter__(self):
+        return iter(list(self._devices.values()))
+
+    def start_all(self) -> None:
+        """Inicia a leitura de todos os dispositivos no event loop atual (o do app, no lifespan)."""
+        for device in self:
+            device.start()
+
+    async def stop_all(self) -> None:
+        await asyncio.gather(*(device.stop() for device in self))
+
+
+devices = DeviceManager()
+default_device = devices.add(_default_device_config(), start=False)
+# O registro de sensores do dispositivo padrao (cresce se o firmware mandar mais colunas).
+SENSOR_KEYS = default_device.sensor_keys
+
+GaugeCallback(
+    "gaitvision_sensor_auto_disabled",
+    "1 para sensores desativados automaticamente (ruido ou outlier).",
+    lambda: {
+        (device.device_id, sensor): float(sensor in device.auto_disabled)
+        for device in devices
+        for sensor in device.sensor_keys
+    },
+    ("device", "sensor"),
+)
+GaugeCallback(
+    "gaitvision_reader_connected",
+    "1 enquanto o dispositivo esta conectado.",
+    lambda: {(device.device_id,): float(device.connected_port is not None) for device in devices},
+    ("device",),
+)
+GaugeCallback(
+    "gaitvision_stream_subscribers",
+    "Clientes conectados ao stream SSE.",
+    lambda: {(device.device_id,): float(len(device._subscribers)) for device in devices},
+    ("device",),
+)
+
+# API de modulo: o dispositivo padrao, para o codigo que so conhece uma palmilha.
+subscribe_frames = default_device.subscribe_frames
+unsubscribe_frames = default_device.unsubscribe_frames
+add_frame_listener = default_device.add_frame_listener
+remove_frame_listener = default_device.remove_frame_listener
+generate_fake_frame = default_device.generate_fake_frame
+read_pressure_window = default_device.read_pressure_window
+read_gait_metrics = default_device.read_gait_metrics
+reset_gait_metrics = default_device.reset_gait_metrics
+read_pressure_data = default_device.read_pressure_data
+apply_sensor_filters_batch = default_device.apply_sensor_filters_batch
+_apply_sensor_filters = default_device.apply_sensor_filters
+_parse_packet = default_device.parse_packet
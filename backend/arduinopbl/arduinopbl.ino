@@ -2,8 +2,44 @@
 
 BluetoothSerial SerialBT;
 
+// 1 = envia quadros binarios compactos (sync 0xA5 0x5A | seq | millis | 7 x ADC uint16 | CRC-16/CCITT)
+#define BINARY_PROTOCOL 0
+
 const int fsrPins[7] = {34, 35, 32, 33, 25, 26, 27}; // pinos analógicos
 float tensao[7];
+uint16_t leituras[7];
+uint16_t sequencia = 0;
+
+uint16_t crc16Ccitt(const uint8_t *data, size_t len) {
+  uint16_t crc = 0xFFFF;
+  for (size_t i = 0; i < len; i++) {
+    crc ^= (uint16_t)data[i] << 8;
+    for (int b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
+void enviaQuadroBinario() {
+  uint8_t quadro[10 + 2 * 7];
+  uint32_t agora = millis();
+  size_t pos = 0;
+  quadro[pos++] = 0xA5;
+  quadro[pos++] = 0x5A;
+  quadro[pos++] = sequencia & 0xFF;
+  quadro[pos++] = sequencia >> 8;
+  for (int i = 0; i < 4; i++) quadro[pos++] = (agora >> (8 * i)) & 0xFF;
+  for (int i = 0; i < 7; i++) {
+    quadro[pos++] = leituras[i] & 0xFF;
+    quadro[pos++] = leituras[i] >> 8;
+  }
+  uint16_t crc = crc16Ccitt(quadro, pos);
+  quadro[pos++] = crc & 0xFF;
+  quadro[pos++] = crc >> 8;
+  SerialBT.write(quadro, pos);
+  sequencia++;
+}
 
 void setup() {
   Serial.begin(115200);   // serial normal (pra debug)
@@ -20,9 +56,16 @@ void loop() {
   // Lê os sensores
   for (int i = 0; i < 7; i++) {
     int leitura = analogRead(fsrPins[i]);
+    leituras[i] = leitura;
     tensao[i] = (leitura / 4095.0) * 3.3;
   }
 
+#if BINARY_PROTOCOL
+  enviaQuadroBinario();
+  delay(100);
+  return;
+#endif
+
   // Envia pro Serial Plotter OU Bluetooth (formato tabulado)
   for (int i = 0; i < 7; i++) {
     SerialBT.print(tensao[i], 3);
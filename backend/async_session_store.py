@@ -0,0 +1,101 @@
+"""Variante async do session_store sobre o engine asyncpg.
+
+As regras de negocio continuam em session_store: cada funcao roda via ``AsyncSession.run_sync`` na sessao da
+requisicao (``db.get_async_session``), entao o I/O do banco nao bloqueia o event loop. O trabalho de CPU
+(decodificacao das amostras, reducao LTTB, analise de marcha) vai para uma thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ingest_queue import (
+    close_session_ingest,
+    enqueue_sample,
+    flush_ingest,
+    reopen_session_ingest,
+    use_write_behind,
+)
+import session_store as store
+from session_store import SessionNotFound
+
+T = TypeVar("T")
+
+
+async def _run(db: AsyncSession, fn: Callable[..., T], *args, **kwargs) -> T:
+    return await db.run_sync(lambda sync_db: fn(*args, db=sync_db, **kwargs))
+
+
+async def list_patients(db: AsyncSession) -> List[Dict]:
+    return await _run(db, store.list_patients)
+
+
+async def get_patient(db: AsyncSession, patient_id: str) -> Dict:
+    return await _run(db, store.get_patient, patient_id)
+
+
+async def create_patient(
+    db: AsyncSession, name: str, *, identifier: Optional[str] = None, age: Optional[int] = None
+) -> Dict:
+    return await _run(db, store.create_patient, name, identifier=identifier, age=age)
+
+
+async def start_session(db: AsyncSession, patient_id: str, note: Optional[str] = None) -> Dict:
+    return await _run(db, store.start_session, patient_id, note)
+
+
+async def append_sample(
+    db: AsyncSession, session_id: str, sensor_readings: Dict[str, float], timestamp: Optional[str] = None
+) -> Dict:
+    if use_write_behind():
+        # O estado da sessao vem do cache do session_store; o quadro so chega ao banco no proximo flush.
+        if not await _run(db, store.is_session_open, session_id):
+            raise ValueError("Sessão já foi finalizada")
+        return enqueue_sample(session_id, sensor_readings, timestamp)
+    return await _run(db, store.append_sample, session_id, sensor_readings, timestamp=timestamp)
+
+
+async def append_samples(db: AsyncSession, session_id: str, samples: List[Dict]) -> Dict:
+    return await _run(db, store.append_samples, session_id, samples)
+
+
+async def end_session(db: AsyncSession, session_id: str) -> Dict:
+    # Fecha a sessao na fila antes do flush: um quadro aceito entre o flush e o commit do end_session
+    # ficaria para um lote que o banco recusa. Depois grava os quadros ainda na fila e encerra.
+    close_session_ingest(session_id)
+    try:
+        await asyncio.to_thread(flush_ingest, session_id)
+        return await _run(db, store.end_session, session_id)
+    except BaseException:
+        reopen_session_ingest(session_id)
+        raise
+
+
+async def list_sessions(db: AsyncSession, patient_id: str) -> List[Dict]:
+    return await _run(db, store.list_sessions, patient_id)
+
+
+async def get_session(
+    db: AsyncSession,
+    session_id: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: Optional[int] = None,
+) -> Dict:
+    # No event loop so as consultas; decodificar as linhas (~25 ms a cada 10k) atrasaria os leitores e o SSE.
+    summary, raw = await _run(db, store.load_session_detail, session_id, start=start, end=end)
+    return await asyncio.to_thread(store.session_detail, summary, raw, max_points)
+
+
+async def get_session_summary(db: AsyncSession, session_id: str) -> Dict:
+    return await _run(db, store.get_session_summary, session_id)
+
+
+async def get_session_analysis(db: AsyncSession, session_id: str) -> Dict:
+    raw = await _run(db, store.load_analysis_rows, session_id)
+    return await asyncio.to_thread(store.analyze_session_rows, session_id, raw)
@@ -0,0 +1,348 @@
+"""Microbenchmarks dos caminhos quentes do leitor e do session_store, com baseline salvo para comparar commits.
+
+Uso:
+    python benchmark.py                       # mede e compara com benchmark_baseline.json
+    python benchmark.py --save                # grava o resultado como novo baseline
+    python benchmark.py -k parse --skip-db    # apenas benchmarks com "parse" no nome, sem banco
+
+Os benchmarks de banco usam DATABASE_URL (aponte para um banco local descartavel): criam um paciente
+"benchmark", gravam e leem sessoes e apagam tudo ao final.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+BASELINE_PATH = Path(__file__).resolve().parent / "benchmark_baseline.json"
+# Tempo minimo medido por repeticao e repeticoes por benchmark (vale o melhor tempo).
+MIN_TIME = float(os.getenv("BENCHMARK_MIN_TIME", "0.2"))
+REPEAT = int(os.getenv("BENCHMARK_REPEAT", "5"))
+BENCH_PATIENT_NAME = "benchmark"
+
+
+class Benchmark(NamedTuple):
+    name: str
+    # Monta os dados sinteticos e devolve a funcao medida (sem argumentos).
+    setup: Callable[[], Callable[[], object]]
+    uses_db: bool = False
+
+
+class Result(NamedTuple):
+    name: str
+    seconds_per_call: float
+
+    @property
+    def ops_per_second(self) -> float:
+        return 1.0 / self.seconds_per_call if self.seconds_per_call else float("inf")
+
+
+def _sensor_keys() -> List[str]:
+    return [f"fsr{i}" for i in range(7)]
+
+
+def _synthetic_volts(count: int, seed: int = 0) -> np.ndarray:
+    """Passos simulados: meia senoide por sensor com ruido baixo (nao aciona desativacao automatica)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(count) * 0.01
+    phase = np.linspace(0, np.pi, 7)
+    wave = np.clip(np.sin(2 * np.pi * t[:, None] - phase[None, :]), 0, None) * 2.0
+    return (wave + rng.normal(0, 0.01, wave.shape)).clip(0, 3.3).round(3)
+
+
+def _bench_parse_text() -> Callable[[], object]:
+    from arduino_reader import _parse_packet
+
+    line = "\t".join(f"{value:.3f}" for value in _synthetic_volts(1)[0] + 0.5)
+    return lambda: _parse_packet(line)
+
+
+def _bench_parse_json() -> Callable[[], object]:
+    from arduino_reader import _parse_packet
+
+    line = json.dumps(dict(zip(_sensor_keys(), (_synthetic_volts(1)[0] + 0.5).tolist())))
+    return lambda: _parse_packet(line)
+
+
+def _bench_sensor_filters() -> Callable[[], object]:
+    from arduino_reader import _apply_sensor_filters
+
+    payloads = [dict(zip(_sensor_keys(), row)) for row in _synthetic_volts(1000).tolist()]
+    state = {"idx": 0}
+
+    def run() -> object:
+        state["idx"] = (state["idx"] + 1) % len(payloads)
+        return _apply_sensor_filters(payloads[state["idx"]])
+
+    return run
+
+
+def _bench_summarize(count: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from models import Session as DbSession
+        from session_store import _accumulate_regions, summarize_session
+
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        session = DbSession(
+            id="bench",
+            patient_id="bench",
+            note=None,
+            start_time=start,
+            end_time=start + timedelta(seconds=count * 0.01),
+            sample_count=count,
+            max_pressure_kpa=0.0,
+        )
+        readings = [dict(zip(_sensor_keys(), row)) for row in _synthetic_volts(count).tolist()]
+        _accumulate_regions(session, readings)
+        return lambda: summarize_session(session)
+
+    return setup
+
+
+def _synthetic_rows(count: int) -> list:
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    return [
+        (start + timedelta(seconds=idx * 0.01), dict(zip(_sensor_keys(), row)))
+        for idx, row in enumerate(_synthetic_volts(count).tolist())
+    ]
+
+
+def _bench_rows_to_frames(count: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from sample_chunks import rows_to_frames
+
+        rows = _synthetic_rows(count)
+        return lambda: rows_to_frames(rows)
+
+    return setup
+
+
+def _bench_frames_to_samples(count: int) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from sample_chunks import frames_to_samples, rows_to_frames
+
+        frames = rows_to_frames(_synthetic_rows(count))
+        return lambda: frames_to_samples(frames)
+
+    return setup
+
+
+def _bench_session(sample_count: int = 0) -> str:
+    """Abre uma sessao do paciente de benchmark, opcionalmente ja com amostras gravadas em lotes."""
+    from session_store import append_samples, create_patient, start_session
+
+    patient = create_patient(BENCH_PATIENT_NAME)
+    session_id = start_session(patient["id"])["id"]
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    volts = _synthetic_volts(sample_count).tolist()
+    for offset in range(0, sample_count, 2000):
+        batch = [
+            {
+                "sensor_readings": dict(zip(_sensor_keys(), row)),
+                "timestamp": start + timedelta(seconds=(offset + idx) * 0.01),
+            }
+            for idx, row in enumerate(volts[offset : offset + 2000])
+        ]
+        append_samples(session_id, batch)
+    return session_id
+
+
+def _bench_append_sample() -> Callable[[], object]:
+    from session_store import append_sample
+
+    session_id = _bench_session()
+    payload = dict(zip(_sensor_keys(), _synthetic_volts(1)[0].tolist()))
+    return lambda: append_sample(session_id, payload)
+
+
+def _bench_get_session(max_points: Optional[int]) -> Callable[[], Callable[[], object]]:
+    def setup() -> Callable[[], object]:
+        from session_store import get_session
+
+        session_id = _bench_session(10_000)
+        return lambda: get_session(session_id, max_points=max_points)
+
+    return setup
+
+
+def cleanup_database() -> None:
+    """Remove pacientes, sessoes e amostras criados pelos benchmarks."""
+    from sqlalchemy import delete, select
+
+    from db import SessionLocal
+    from models import Patient, PressureChunk, PressureSample, Session as DbSession
+
+    with SessionLocal() as db:
+        patients = select(Patient.id).where(Patient.name == BENCH_PATIENT_NAME)
+        sessions = select(DbSession.id).where(DbSession.patient_id.in_(patients))
+        db.execute(delete(PressureSample).where(PressureSample.session_id.in_(sessions)))
+        db.execute(delete(PressureChunk).where(PressureChunk.session_id.in_(sessions)))
+        db.execute(delete(DbSession).where(DbSession.patient_id.in_(patients)))
+        db.execute(delete(Patient).where(Patient.name == BENCH_PATIENT_NAME))
+        db.commit()
+
+
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("parse_packet_text", _bench_parse_text),
+    Benchmark("parse_packet_json", _bench_parse_json),
+    Benchmark("apply_sensor_filters", _bench_sensor_filters),
+    Benchmark("summarize_session_1k", _bench_summarize(1_000)),
+    Benchmark("summarize_session_10k", _bench_summarize(10_000)),
+    Benchmark("summarize_session_100k", _bench_summarize(100_000)),
+    Benchmark("rows_to_frames_10k", _bench_rows_to_frames(10_000)),
+    Benchmark("frames_to_samples_10k", _bench_frames_to_samples(10_000)),
+    Benchmark("append_sample_db", _bench_append_sample, uses_db=True),
+    Benchmark("get_session_10k_db", _bench_get_session(None), uses_db=True),
+    Benchmark("get_session_10k_lttb1000_db", _bench_get_session(1000), uses_db=True),
+]
+
+
+def _calibration() -> float:
+    """Chamadas/s de um laco Python fixo: normaliza baselines gravados em maquinas diferentes."""
+    timer = timeit.Timer("sum(range(1000))")
+    number, _ = timer.autorange()
+    return number / min(timer.repeat(REPEAT, number))
+
+
+def measure(func: Callable[[], object]) -> float:
+    """Melhor tempo por chamada entre REPEAT repeticoes de pelo menos MIN_TIME segundos."""
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= MIN_TIME:
+            break
+        number = max(number * 2, int(number * MIN_TIME / max(elapsed, 1e-9)) + 1)
+    best = min([elapsed, *timer.repeat(REPEAT - 1, number)])
+    return best / number
+
+
+def run(benchmarks: List[Benchmark]) -> List[Result]:
+    results = []
+    try:
+        for bench in benchmarks:
+            func = bench.setup()
+            func()  # aquece caches e imports
+            results.append(Result(bench.name, measure(func)))
+            print(f"  {bench.name:<30} {results[-1].seconds_per_call * 1e6:>12.2f} us/chamada")
+    finally:
+        if any(bench.uses_db for bench in benchmarks):
+            cleanup_database()
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=BASELINE_PATH.parent,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def save_baseline(path: Path, results: List[Result], calibration: float) -> None:
+    payload = {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "calibration_ops": calibration,
+        "results": {result.name: {"ops_per_second": result.ops_per_second} for result in results},
+    }
+    # Mantem benchmarks do baseline anterior que nao foram executados agora (ex.: --skip-db).
+    if path.exists():
+        previous = json.loads(path.read_text(encoding="utf-8"))
+        payload["results"] = {**previous.get("results", {}), **payload["results"]}
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def compare(
+    results: List[Result], baseline: Dict, tolerance: float, calibration: Optional[float] = None
+) -> List[str]:
+    """Imprime a razao de vazao (atual / baseline) e devolve as regressoes.
+
+    Com ``calibration``, o baseline e escalado pela razao entre as calibracoes (baseline de outra maquina).
+    """
+    scale = calibration / baseline.get("calibration_ops", calibration) if calibration else 1.0
+    print(f"\nBaseline {baseline.get('commit') or '?'} ({baseline.get('created_at', '?')}), escala x{scale:.2f}")
+    print(f"  {'benchmark':<30} {'ops/s':>12} {'baseline':>12} {'razao':>7}")
+    regressions = []
+    for result in results:
+        entry = baseline.get("results", {}).get(result.name)
+        if not entry:
+            print(f"  {result.name:<30} {result.ops_per_second:>12.1f} {'-':>12} {'-':>7}")
+            continue
+        ratio = result.ops_per_second / (entry["ops_per_second"] * scale)
+        flag = ""
+        if ratio < 1 - tolerance:
+            flag = "  <- regressao"
+            regressions.append(result.name)
+        baseline_ops = entry["ops_per_second"]
+        print(f"  {result.name:<30} {result.ops_per_second:>12.1f} {baseline_ops:>12.1f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", "--filter", help="Executa apenas benchmarks cujo nome contem este texto.")
+    parser.add_argument("--skip-db", action="store_true", help="Ignora os benchmarks que usam o banco.")
+    parser.add_argument("--save", action="store_true", help="Grava o resultado como baseline.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Arquivo de baseline (JSON).")
+    parser.add_argument(
+        "--normalize",
+        action="store_true",
+        help="Escala o baseline pela calibracao (baseline gravado em outra maquina; mais ruidoso).",
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Queda de vazao tolerada antes de acusar regressao (0.2 = 20%%)."
+    )
+    args = parser.parse_args(argv)
+
+    selected = [
+        bench
+        for bench in BENCHMARKS
+        if (not args.filter or args.filter in bench.name) and not (args.skip_db and bench.uses_db)
+    ]
+    if not selected:
+        print("Nenhum benchmark selecionado.")
+        return 1
+
+    print(f"Executando {len(selected)} benchmarks (python {platform.python_version()})")
+    started = time.perf_counter()
+    calibration = _calibration()
+    results = run(selected)
+    print(f"Concluido em {time.perf_counter() - started:.1f} s")
+
+    if args.save:
+        save_baseline(args.baseline, results, calibration)
+        print(f"Baseline gravado em {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"Sem baseline em {args.baseline}; use --save para criar.")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, baseline, args.tolerance, calibration if args.normalize else None)
+    if regressions:
+        print(f"\nRegressoes acima de {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
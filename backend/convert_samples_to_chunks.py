@@ -0,0 +1,60 @@
+"""Converte amostras gravadas linha a linha (pressure_samples) para blocos colunares (pressure_chunks)."""
+
+from __future__ import annotations
+
+import argparse
+
+from sqlalchemy import delete, insert, select
+
+from db import SessionLocal
+from models import PressureChunk, PressureSample, Session
+from sample_chunks import pack_chunks
+
+DELETE_BATCH = 5000
+
+
+def convert_session(db_session, session_id: str) -> int:
+    """Empacota as linhas da sessao em blocos e remove as linhas convertidas, numa unica transacao."""
+    rows = db_session.execute(
+        select(PressureSample.id, PressureSample.timestamp, PressureSample.pressures)
+        .where(PressureSample.session_id == session_id)
+        .order_by(PressureSample.timestamp)
+    ).all()
+    if not rows:
+        return 0
+    chunks = pack_chunks(session_id, [(timestamp, pressures or {}) for _, timestamp, pressures in rows])
+    db_session.execute(insert(PressureChunk), chunks)
+    # Remove apenas as linhas lidas: amostras que cheguem durante a conversao continuam intactas.
+    ids = [row_id for row_id, _, _ in rows]
+    for start in range(0, len(ids), DELETE_BATCH):
+        db_session.execute(delete(PressureSample).where(PressureSample.id.in_(ids[start : start + DELETE_BATCH])))
+    db_session.commit()
+    return len(rows)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--session-id", action="append", help="Converte apenas esta sessao (pode repetir).")
+    parser.add_argument(
+        "--include-open", action="store_true", help="Tambem converte sessoes ainda em andamento."
+    )
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db_session:
+        stmt = select(Session.id).where(Session.id.in_(select(PressureSample.session_id).distinct()))
+        if args.session_id:
+            stmt = stmt.where(Session.id.in_(args.session_id))
+        if not args.include_open:
+            stmt = stmt.where(Session.end_time.is_not(None))
+        session_ids = list(db_session.scalars(stmt))
+
+        total = 0
+        for session_id in session_ids:
+            converted = convert_session(db_session, session_id)
+            total += converted
+            print(f"Sessão {session_id}: {converted} amostras convertidas em blocos")
+        print(f"Total de amostras convertidas: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,35 @@
 
 from __future__ import annotations
 
+import argparse
 import csv
+import hashlib
+import heapq
+import json
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import Dict, Iterator, List, NamedTuple, Optional
 
+import numpy as np
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
 
-from db import SessionLocal
-from models import Patient, Physiotherapist, PressureSample, Session
+from db import SessionLocal, engine
+from models import Patient, Physiotherapist, PressureChunk, PressureSample, Session
+from parquet_io import ParquetFrameWriter
+from sample_chunks import decode_chunk
 
 TARGET_PATIENTS = {"controle", "paciente avc"}
 SENSOR_KEYS = [f"fsr{i}" for i in range(7)]
 OUTPUT_DIR = Path(__file__).resolve().parent.parent / "data-analysis" / "input"
+# Linhas buscadas por ida ao cursor do servidor; limita a memoria por sessao exportada.
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+EXPORT_WORKERS = int(os.getenv("EXPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "csv").lower()
+EXPORT_FORMATS = ("csv", "parquet")
+MANIFEST_NAME = ".export_manifest.json"
 
 
 def slugify(name: str) -> str:
@@ -30,126 +44,339 @@ def slugify(name: str) -> str:
     return slug or "sessao"
 
 
-def load_target_sessions(db_session) -> list[Session]:
+class TargetSession(NamedTuple):
+    session_id: str
+    label: str
+    sample_count: int
+    end_time: Optional[datetime]
+
+
+class ExportTarget(NamedTuple):
+    session_id: str
+    label: str
+    seq_number: int
+    output_format: str = "csv"
+
+    @property
+    def file_name(self) -> str:
+        return f"{slugify(self.label)}_sessao_{self.seq_number}.{self.output_format}"
+
+
+class ExportResult(NamedTuple):
+    path: Path
+    rows: int
+    size: int
+    mtime_ns: int
+    sha256: str
+
+
+def load_target_sessions(db_session) -> list[TargetSession]:
+    """Sessoes alvo em ordem de inicio, com a marca d'agua (contagem/termino), sem carregar amostras."""
     stmt = (
-        select(Session)
-        .options(
-            selectinload(Session.samples),
-            selectinload(Session.patient),
-            selectinload(Session.physiotherapist),
-        )
+        select(Session.id, Patient.name, Physiotherapist.name, Session.sample_count, Session.end_time)
         .join(Patient, Session.patient_id == Patient.id)
         .join(Physiotherapist, Session.physiotherapist_id == Physiotherapist.id)
+        .order_by(Session.start_time, Session.id)
     )
     if TARGET_PATIENTS:
         stmt = stmt.where(Patient.name.in_(TARGET_PATIENTS))
-    return list(db_session.scalars(stmt).all())
-
-
-def _coerce_datetime(value, *, default: datetime) -> datetime:
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except ValueError:
-            return default
-    return default
+    return [
+        TargetSession(session_id, patient_name or physio_name or "sessao", sample_count or 0, end_time)
+        for session_id, patient_name, physio_name, sample_count, end_time in db_session.execute(stmt)
+    ]
 
 
-def _delta_seconds(raw_ts, start_raw, start_dt: datetime) -> float:
-    """Normaliza timestamp (ms ou s) para segundos desde o início.
+def plan_exports(
+    sessions: list[TargetSession], manifest: Optional[Dict] = None, output_format: str = "csv"
+) -> list[ExportTarget]:
+    """Numera as sessoes por rotulo (paciente) na ordem cronologica.
 
-    - Para valores numéricos, converte milissegundos em segundos com heurística explícita.
-    - Para datetime/string, usa o delta em segundos.
+    Com manifesto, sessoes ja exportadas (ou com numero reservado) mantem o numero e as novas continuam a
+    sequencia do rotulo.
     """
+    manifest = manifest or {}
+    known = {**manifest.get("reserved", {}), **manifest.get("sessions", {})}
+    counters: defaultdict[str, int] = defaultdict(int)
+    for entry in known.values():
+        counters[entry["label"]] = max(counters[entry["label"]], entry["seq_number"])
+    targets = []
+    for session in sessions:
+        entry = known.get(session.session_id)
+        if entry:
+            targets.append(ExportTarget(session.session_id, session.label, entry["seq_number"], output_format))
+            continue
+        counters[session.label] += 1
+        targets.append(ExportTarget(session.session_id, session.label, counters[session.label], output_format))
+    return targets
+
+
+def _watermark(session: TargetSession) -> Dict:
+    return {
+        "sample_count": session.sample_count,
+        "end_time": session.end_time.isoformat() if session.end_time else None,
+    }
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_unchanged(session: TargetSession, entry: Optional[Dict], output_format: str = "csv") -> bool:
+    if not entry or {key: entry.get(key) for key in ("sample_count", "end_time")} != _watermark(session):
+        return False
+    output_path = OUTPUT_DIR / entry["file"]
+    if output_path.suffix != f".{output_format}" or not output_path.exists():
+        return False
+    stat = output_path.stat()
+    # Tamanho e mtime descartam rapido o arquivo mexido; o hash pega a edicao que mantem os dois.
+    # Manifestos antigos nao tem mtime_ns: nesse caso o hash decide sozinho.
+    if stat.st_size != entry["size"] or entry.get("mtime_ns", stat.st_mtime_ns) != stat.st_mtime_ns:
+        return False
+    return _file_sha256(output_path) == entry.get("sha256")
+
+
+def load_manifest() -> Dict:
+    path = OUTPUT_DIR / MANIFEST_NAME
+    if not path.exists():
+        return {"sessions": {}}
+    with path.open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_manifest(manifest: Dict) -> None:
+    path = OUTPUT_DIR / MANIFEST_NAME
+    partial_path = path.with_name(path.name + ".partial")
+    with partial_path.open("w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    partial_path.replace(path)
+
+
+def _iter_row_samples(db_session, session_id: str) -> Iterator[tuple[float, list]]:
+    result = db_session.execute(
+        select(PressureSample.timestamp, PressureSample.pressures)
+        .where(PressureSample.session_id == session_id)
+        .order_by(PressureSample.timestamp)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    for timestamp, pressures in result:
+        pressures = pressures or {}
+        yield timestamp.timestamp(), [pressures.get(key) for key in SENSOR_KEYS]
+
+
+def _iter_chunk_samples(db_session, session_id: str) -> Iterator[tuple[float, list]]:
+    result = db_session.execute(
+        select(
+            PressureChunk.start_time,
+            PressureChunk.sample_count,
+            PressureChunk.sensor_keys,
+            PressureChunk.offsets,
+            PressureChunk.values,
+        )
+        .where(PressureChunk.session_id == session_id)
+        .order_by(PressureChunk.start_time)
+        .execution_options(yield_per=max(1, EXPORT_BATCH_SIZE // 1000))
+    )
+    for chunk in result:
+        # Um bloco por vez: decodifica a matriz inteira e solta antes do proximo.
+        frames = decode_chunk(*chunk)
+        column = {key: idx for idx, key in enumerate(frames.keys)}
+        picks = [column.get(key) for key in SENSOR_KEYS]
+        for timestamp, row in zip(frames.timestamps.tolist(), frames.values.tolist()):
+            values = []
+            for idx in picks:
+                value = None if idx is None else row[idx]
+                values.append(value if value == value else None)
+            yield timestamp, values
+
+
+def iter_session_rows(db_session, session_id: str) -> Iterator[list]:
+    """Linhas [segundos desde o inicio, fsr0..fsr6] em ordem de tempo, lidas em fluxo do banco."""
+    merged = heapq.merge(
+        _iter_row_samples(db_session, session_id),
+        _iter_chunk_samples(db_session, session_id),
+        key=lambda sample: sample[0],
+    )
+    start: Optional[float] = None
+    for timestamp, values in merged:
+        if start is None:
+            start = timestamp
+        yield [round(timestamp - start, 6), *values]
+
+
+class _HashingWriter:
+    """Arquivo de texto que calcula o SHA-256 do conteudo enquanto escreve."""
+
+    def __init__(self, handle) -> None:
+        self._handle = handle
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str) -> int:
+        self.digest.update(text.encode("utf-8"))
+        return self._handle.write(text)
+
+
+def _write_csv(db_session, target: ExportTarget, path: Path) -> tuple[int, str]:
+    written = 0
+    with path.open("w", newline="", encoding="utf-8") as csvfile:
+        hashing = _HashingWriter(csvfile)
+        writer = csv.writer(hashing)
+        writer.writerow(["timestamp", *SENSOR_KEYS])
+        for row in iter_session_rows(db_session, target.session_id):
+            writer.writerow(row)
+            written += 1
+    return written, hashing.digest.hexdigest()
+
+
+def _session_metadata(db_session, target: ExportTarget) -> Dict[str, str]:
+    session_obj = db_session.get(Session, target.session_id)
+    patient = session_obj.patient
+    metadata = {
+        "session_id": target.session_id,
+        "seq_number": target.seq_number,
+        "patient": target.label,
+        "patient_id": session_obj.patient_id,
+        "start_time": session_obj.start_time.isoformat() if session_obj.start_time else "",
+        "end_time": session_obj.end_time.isoformat() if session_obj.end_time else "",
+    }
+    if patient is not None:
+        metadata["patient_identifier"] = patient.identifier or ""
+        metadata["patient_age"] = "" if patient.age is None else patient.age
+    return metadata
+
+
+def _write_parquet(db_session, target: ExportTarget, path: Path) -> tuple[int, str]:
+    written = 0
+    batch: list[list] = []
+    with ParquetFrameWriter(path, SENSOR_KEYS, _session_metadata(db_session, target)) as writer:
+
+        def flush() -> None:
+            # None -> NaN -> nulo no Parquet
+            block = np.array(batch, dtype=np.float64)
+            writer.write_batch(block[:, 0], block[:, 1:])
+            batch.clear()
+
+        for row in iter_session_rows(db_session, target.session_id):
+            batch.append(row)
+            written += 1
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+    return written, _file_sha256(path)
+
+
+def export_session(db_session, target: ExportTarget) -> ExportResult | None:
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    output_path = OUTPUT_DIR / target.file_name
+    partial_path = output_path.with_name(output_path.name + ".partial")
 
-    if isinstance(raw_ts, (int, float)) and isinstance(start_raw, (int, float)):
-        delta = float(raw_ts) - float(start_raw)
-        # Se a escala vier em milissegundos (valores grandes ou passos > 20 ms),
-        # convertemos para segundos.
-        if abs(start_raw) > 1e5 or abs(delta) > 20.0:
-            return delta / 1000.0
-        return delta
+    write = _write_parquet if target.output_format == "parquet" else _write_csv
+    written, sha256 = write(db_session, target, partial_path)
+    if not written:
+        partial_path.unlink()
+        return None
+    partial_path.replace(output_path)
+    stat = output_path.stat()
+    return ExportResult(output_path, written, stat.st_size, stat.st_mtime_ns, sha256)
 
-    current_ts = _coerce_datetime(raw_ts, default=start_dt)
-    return (current_ts - start_dt).total_seconds()
 
+def _init_worker() -> None:
+    # Conexoes herdadas do processo pai (fork) nao podem ser reutilizadas pelo filho.
+    engine.dispose(close=False)
 
-def samples_to_rows(samples: Iterable[PressureSample]) -> list[dict]:
-    ordered = sorted(samples, key=lambda s: s.timestamp or datetime.utcnow())
-    if not ordered:
-        return []
-    start_raw = ordered[0].timestamp or datetime.utcnow()
-    start_ts = _coerce_datetime(start_raw, default=datetime.utcnow())
 
-    # Faça a normalização de tempo de forma consistente para a sessão inteira.
-    numeric_timestamps = [
-        s.timestamp for s in ordered if isinstance(s.timestamp, (int, float))
-    ]
-    use_numeric_path = len(numeric_timestamps) == len(ordered)
-    if use_numeric_path:
-        start_val = float(numeric_timestamps[0])
-        deltas = [float(ts) - start_val for ts in numeric_timestamps]
-        scale = 1000.0 if (abs(start_val) > 1e5 or max(abs(d) for d in deltas[1:] or [0.0]) > 20.0) else 1.0
-        timestamps_seconds = [d / scale for d in deltas]
-    else:
-        timestamps_seconds = [
-            _delta_seconds(s.timestamp or start_raw, start_raw, start_ts) for s in ordered
-        ]
-
-    rows = []
-    for sample, delta_seconds in zip(ordered, timestamps_seconds):
-        pressures = sample.pressures or {}
-        row = {"timestamp": float(delta_seconds)}
-        for key in SENSOR_KEYS:
-            row[key] = pressures.get(key)
-        rows.append(row)
-    return rows
-
-
-def export_session(session_obj: Session, seq_number: int) -> Path | None:
-    rows = samples_to_rows(session_obj.samples)
-    if not rows:
-        return None
+def _export_in_worker(target: ExportTarget) -> tuple[ExportTarget, Optional[ExportResult]]:
+    with SessionLocal() as db_session:
+        return target, export_session(db_session, target)
 
-    label_source = (session_obj.patient.name if session_obj.patient else None) or (
-        session_obj.physiotherapist.name if session_obj.physiotherapist else "sessao"
-    )
-    file_name = f"{slugify(label_source)}_sessao_{seq_number}.csv"
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    output_path = OUTPUT_DIR / file_name
 
-    with output_path.open("w", newline="", encoding="utf-8") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=["timestamp", *SENSOR_KEYS])
-        writer.writeheader()
-        writer.writerows(rows)
+def export_targets(
+    targets: List[ExportTarget], workers: int = EXPORT_WORKERS
+) -> Iterator[tuple[ExportTarget, Optional[ExportResult]]]:
+    """Exporta cada sessao de forma independente; com workers > 1, em processos paralelos."""
+    if workers <= 1 or len(targets) <= 1:
+        for target in targets:
+            yield _export_in_worker(target)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(_export_in_worker, targets)
 
-    return output_path
 
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--workers", type=int, default=EXPORT_WORKERS, help="Processos exportando sessoes em paralelo."
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Exporta apenas sessoes encerradas que mudaram desde o ultimo manifesto.",
+    )
+    parser.add_argument(
+        "--format",
+        choices=EXPORT_FORMATS,
+        default=EXPORT_FORMAT,
+        help="csv (lido pelo main_analise.m) ou parquet (colunar, float32; requer pyarrow).",
+    )
+    args = parser.parse_args(argv)
 
-def main() -> None:
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     with SessionLocal() as db_session:
         sessions = load_target_sessions(db_session)
-        if not sessions:
-            print("Nenhuma sessão encontrada para os filtros configurados.")
-            return
-
-        counters: defaultdict[str, int] = defaultdict(int)
-        exported = 0
-        for session_obj in sessions:
-            label = (session_obj.patient.name if session_obj.patient else None) or (
-                session_obj.physiotherapist.name if session_obj.physiotherapist else "sessao"
-            )
-            counters[label] += 1
-            result_path = export_session(session_obj, counters[label])
-            if result_path:
-                exported += 1
-                print(f"Exportada sessão {session_obj.id} -> {result_path}")
-
-        print(f"Total de sessões exportadas: {exported}")
+    if not sessions:
+        print("Nenhuma sessão encontrada para os filtros configurados.")
+        return
+
+    manifest = load_manifest() if args.incremental else {"sessions": {}}
+    known = manifest["sessions"]
+    # Todas as sessoes sao numeradas em ordem de inicio, como numa exportacao completa; so depois se filtra.
+    planned = plan_exports(sessions, manifest, args.format)
+    targets = planned
+    if args.incremental:
+        # Sessoes em andamento ainda vao mudar; as inalteradas ja estao no disco.
+        pending = {
+            s.session_id
+            for s in sessions
+            if s.end_time is not None and not is_unchanged(s, known.get(s.session_id), args.format)
+        }
+        targets = [target for target in planned if target.session_id in pending]
+        print(f"Sessões inalteradas ou em andamento: {len(sessions) - len(targets)}")
+    by_id = {session.session_id: session for session in sessions}
+
+    started = datetime.now()
+    exported = 0
+    try:
+        for target, result in export_targets(targets, args.workers):
+            if not result:
+                continue
+            exported += 1
+            known[target.session_id] = {
+                "label": target.label,
+                "seq_number": target.seq_number,
+                "file": result.path.name,
+                "rows": result.rows,
+                "size": result.size,
+                "mtime_ns": result.mtime_ns,
+                "sha256": result.sha256,
+                **_watermark(by_id[target.session_id]),
+            }
+            print(f"Exportada sessão {target.session_id} -> {result.path}")
+    finally:
+        # Sessoes ainda nao exportadas (em andamento, sem amostras) guardam o numero para a proxima execucao.
+        manifest["reserved"] = {
+            target.session_id: {"label": target.label, "seq_number": target.seq_number}
+            for target in planned
+            if target.session_id not in known
+        }
+        save_manifest(manifest)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Total de sessões exportadas: {exported} ({elapsed:.1f} s)")
 
 
 if __name__ == "__main__":
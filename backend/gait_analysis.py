@@ -0,0 +1,356 @@
+"""Metricas de marcha equivalentes ao data-analysis/main_analise.m, vetorizadas com NumPy/SciPy.
+
+Reproduz o filtro de 2a ordem discretizado por Tustin, impulso trapezoidal, taxa de carga maxima,
+selecao do trecho ativo, cadencia por picos/FFT e a classificacao calcanhar vs ponta.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import math
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from parquet_io import TIMESTAMP_COLUMN, read_column_names, read_columns
+
+ZETA = 0.7
+WN = 6.0  # rad/s, levemente subamortecido para suavizacao
+SIGNAL_COLUMNS = ("fsr1", "fsr2", "fsr3", "fsr4")
+HEEL_SENSOR = "fsr2"  # calcanhar (corrigido)
+TOE_SENSORS = ("fsr1", "fsr3")  # dedao / antepe medial e antepe lateral
+ALIVE_THRESHOLD = 1e-3
+ACTIVE_FRACTION = 0.05
+PEAK_HEIGHT_FRACTION = 0.2
+MIN_STEP_SECONDS = 0.3
+
+DATA_ANALYSIS_DIR = Path(__file__).resolve().parent.parent / "data-analysis"
+INPUT_DIR = DATA_ANALYSIS_DIR / "input"
+OUTPUT_PATH = DATA_ANALYSIS_DIR / "output" / "resumo_python.csv"
+REFERENCE_PATH = DATA_ANALYSIS_DIR / "output" / "resumo_final.csv"
+RESUMO_HEADER = ["Paciente", "Cadencia_Hz", "Impulso_Total", "Taxa_Carga_Max", "Classificacao_Pisada"]
+
+
+class GaitMetrics(NamedTuple):
+    cadence_hz: float
+    impulse: float
+    max_loading_rate: float
+    classification: str
+    sample_count: int
+
+
+def _round_half_away(value: float) -> int:
+    # round do Octave arredonda .5 para longe do zero (np.round usa o par mais proximo)
+    return int(math.floor(value + 0.5)) if value >= 0 else -int(math.floor(-value + 0.5))
+
+
+def tustin_coefficients(ts: float, zeta: float = ZETA, wn: float = WN) -> tuple[np.ndarray, np.ndarray]:
+    """Coeficientes (b, a) de c2d(tf(wn^2, [1 2*zeta*wn wn^2]), Ts, 'tustin')."""
+    k = 2.0 / ts
+    wn2 = wn * wn
+    a0 = k * k + 2.0 * zeta * wn * k + wn2
+    b = np.array([wn2, 2.0 * wn2, wn2]) / a0
+    a = np.array([a0, 2.0 * wn2 - 2.0 * k * k, k * k - 2.0 * zeta * wn * k + wn2]) / a0
+    return b, a
+
+
+def _longest_active_segment(total: np.ndarray) -> slice:
+    active = total > ACTIVE_FRACTION * np.max(total)
+    if not active.any():
+        return slice(0, len(total))
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    longest = int(np.argmax(ends - starts))
+    return slice(int(starts[longest]), int(ends[longest]) + 1)
+
+
+def _fft_cadence(segment: np.ndarray, fs: float) -> float:
+    n = len(segment)
+    if n < 4:
+        return math.nan
+    windowed = (segment - segment.mean()) * np.hanning(n)
+    spectrum = np.abs(np.fft.fft(windowed) / n)
+    half = slice(1, n // 2)  # ignora DC
+    return float(np.argmax(spectrum[half]) + 1) * fs / n
+
+
+def find_peaks_octave(data: np.ndarray, min_height: float, min_distance: int) -> np.ndarray:
+    """Indices dos picos como o findpeaks do pacote signal do Octave (altura, distancia e largura minimas).
+
+    Os indices saem em ordem crescente, como no findpeaks do MATLAB.
+    """
+    n = len(data)
+    if n < 3:
+        return np.empty(0, dtype=np.intp)
+    # Troca de sinal da 1a derivada (<= cobre sinais sobreamostrados) e 2a derivada negativa.
+    forward = np.diff(data)
+    df1 = np.concatenate(([forward[0]], forward))
+    second = np.diff(data, 2)
+    df2 = np.concatenate(([second[0], second[0]], second))
+    candidates = (df1 * np.append(df1[1:], 0.0) <= 0) & (np.append(df2[1:], 0.0) < 0)
+    idx = np.flatnonzero(candidates)
+    idx = idx[data[idx] >= min_height]
+    if len(idx) == 0:
+        return idx
+
+    # Picos mais proximos que min_distance de um pico mais alto sao descartados.
+    by_height = idx[np.argsort(-data[idx], kind="stable")]
+    keep = np.ones(len(by_height), dtype=bool)
+    for i, peak in enumerate(by_height):
+        if keep[i]:
+            close = np.abs(by_height[i + 1 :] - peak) < min_distance
+            keep[i + 1 :] &= ~close
+    idx = np.sort(by_height[keep])
+
+    # Filtro de largura por parabola ajustada em torno de cada pico (inclusive o vertice do Octave).
+    accepted = []
+    half_window = min_distance / 2.0
+    for peak in idx:
+        lo = _round_half_away(max(peak + 1 - half_window, 1)) - 1
+        hi = _round_half_away(min(peak + 1 + half_window, n)) - 1
+        window = np.arange(lo, hi + 1)
+        values = data[window]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if np.any(values > data[peak]):
+                coeffs = np.polyfit(window + 1.0, values, 2)
+                vertex = -coeffs[1] ** 2 / (2.0 * coeffs[0])
+                height = np.polyval(coeffs, vertex)
+            else:
+                height = data[peak]
+                vertex = peak + 1.0
+                offsets = (window + 1.0 - vertex) ** 2
+                denom = float(offsets @ offsets)
+                curvature = float(offsets @ (values - height)) / denom if denom else 0.0
+                coeffs = np.array([curvature, -2.0 * curvature * vertex, height + curvature * vertex**2])
+            width = math.sqrt(abs(1.0 / coeffs[0])) + vertex if coeffs[0] else math.inf
+        if (
+            width < 1
+            or coeffs[0] > 0
+            or height < min_height
+            or data[peak] < 0.99 * height
+            or abs(peak + 1.0 - vertex) > half_window
+        ):
+            continue
+        accepted.append(peak)
+    return np.asarray(accepted, dtype=np.intp)
+
+
+def analyze_signals(
+    t: Sequence[float],
+    signals: np.ndarray,
+    names: Sequence[str],
+    *,
+    detect_milliseconds: bool = True,
+) -> GaitMetrics:
+    """Calcula as metricas de uma sessao a partir dos tempos e das colunas fsr1..fsr4 (ordem livre)."""
+    t = np.asarray(t, dtype=np.float64).ravel()
+    if len(t) < 2:
+        raise ValueError("Sessão possui dados insuficientes para análise")
+    signals = np.nan_to_num(np.asarray(signals, dtype=np.float64).reshape(len(t), -1))
+    names = [name.lower() for name in names]
+    if not names:
+        raise ValueError("Nenhuma das colunas fsr1..fsr4 encontrada")
+
+    t = t - t[0]
+    ts = float(np.median(np.diff(t)))
+    # Timestamps em ms (ex.: Arduino): passo medio > 5 s ou amplitude total > 1000.
+    if detect_milliseconds and (ts > 5 or t.max() > 1e3):
+        t = t / 1000.0
+        ts = float(np.median(np.diff(t)))
+    fs = 1.0 / ts
+
+    # Import tardio: scipy.signal leva ~1 s para carregar e o leitor/API so precisam dele na analise.
+    from scipy.signal import lfilter
+
+    b, a = tustin_coefficients(ts)
+    filtered = lfilter(b, a, signals, axis=0)
+    total = filtered.sum(axis=1)
+
+    dt = np.diff(t)
+    step = np.diff(total)
+    impulse = float(np.sum(0.5 * dt * (total[1:] + total[:-1])))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = step / dt
+    rates = rates[~np.isnan(rates)]
+    max_loading_rate = float(rates.max()) if len(rates) else -math.inf
+
+    active = _longest_active_segment(total)
+    t_seg = t[active]
+    segment = total[active]
+    cadence_fft = _fft_cadence(segment, fs)
+
+    min_height = PEAK_HEIGHT_FRACTION * float(segment.max())
+    if min_height <= 0:
+        min_height = 0.1
+    min_distance = max(1, _round_half_away(MIN_STEP_SECONDS / ts))
+    peaks = find_peaks_octave(segment, min_height, min_distance)
+    cadence_time = 1.0 / float(np.median(np.diff(t_seg[peaks]))) if len(peaks) >= 2 else math.nan
+
+    if not math.isnan(cadence_time):
+        cadence = cadence_time
+    elif not math.isnan(cadence_fft):
+        cadence = cadence_fft
+    else:
+        cadence = 0.0
+
+    peak_times = t[np.argmax(filtered, axis=0)]
+    alive = filtered.max(axis=0) > ALIVE_THRESHOLD
+
+    def _peak_time(name: str) -> float:
+        if name in names:
+            col = names.index(name)
+            if alive[col]:
+                return float(peak_times[col])
+        return math.nan
+
+    heel_time = _peak_time(HEEL_SENSOR)
+    toe_times = [time for time in map(_peak_time, TOE_SENSORS) if not math.isnan(time)]
+    if math.isnan(heel_time) or not toe_times:
+        classification = "Indefinida"
+    elif heel_time <= min(toe_times):
+        classification = "Normal"
+    else:
+        classification = "Invertida"
+
+    return GaitMetrics(cadence, impulse, max_loading_rate, classification, len(t))
+
+
+def select_signal_columns(keys: Sequence[str]) -> List[int]:
+    return [i for i, key in enumerate(keys) if key.lower() in SIGNAL_COLUMNS]
+
+
+def analyze_parquet(path: Path) -> GaitMetrics:
+    """Mesmo calculo do analyze_csv lendo so timestamp e fsr1..fsr4 do Parquet (memory-map)."""
+    names = [name for name in read_column_names(path) if name.lower() in SIGNAL_COLUMNS]
+    if not names:
+        raise ValueError(f"Nenhuma das colunas fsr1..fsr4 encontrada em {path.name}")
+    columns = read_columns(path, [TIMESTAMP_COLUMN, *names])
+    # Nulos viram 0, como os campos vazios do CSV.
+    return analyze_signals(columns[TIMESTAMP_COLUMN], np.column_stack([columns[name] for name in names]), names)
+
+
+def analyze_file(path: Path) -> GaitMetrics:
+    return analyze_parquet(path) if path.suffix == ".parquet" else analyze_csv(path)
+
+
+def analyze_csv(path: Path) -> GaitMetrics:
+    with path.open(newline="", encoding="utf-8") as csvfile:
+        headers = [header.strip() for header in next(csv.reader(csvfile))]
+    lowered = [header.lower() for header in headers]
+    if "timestamp" not in lowered:
+        raise ValueError(f'Coluna "timestamp" nao encontrada em {path.name}')
+    columns = select_signal_columns(headers)
+    if not columns:
+        raise ValueError(f"Nenhuma das colunas fsr1..fsr4 encontrada em {path.name}")
+    # Campos vazios viram 0, como no dlmread do Octave.
+    matrix = np.genfromtxt(path, delimiter=",", skip_header=1, filling_values=0.0, ndmin=2)
+    return analyze_signals(
+        matrix[:, lowered.index("timestamp")], matrix[:, columns], [headers[i] for i in columns]
+    )
+
+
+def _format_number(value: float) -> str:
+    if math.isinf(value):
+        return "Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return f"{value:.6f}"
+
+
+def write_resumo(path: Path, rows: List[tuple[str, GaitMetrics]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile, lineterminator="\n")
+        writer.writerow(RESUMO_HEADER)
+        for name, metrics in rows:
+            writer.writerow(
+                [
+                    name,
+                    _format_number(metrics.cadence_hz),
+                    _format_number(metrics.impulse),
+                    _format_number(metrics.max_loading_rate),
+                    metrics.classification,
+                ]
+            )
+
+
+def compare_resumo(rows: List[tuple[str, GaitMetrics]], reference: Path, rel_tol: float) -> int:
+    """Compara com o resumo_final.csv do Octave e devolve o numero de divergencias."""
+    with reference.open(newline="", encoding="utf-8") as csvfile:
+        expected = {row["Paciente"]: row for row in csv.DictReader(csvfile)}
+    mismatches = 0
+    for name, metrics in rows:
+        row = expected.pop(name, None)
+        if row is None:
+            print(f"{name}: ausente em {reference.name}")
+            mismatches += 1
+            continue
+        pairs = [
+            ("Cadencia_Hz", metrics.cadence_hz),
+            ("Impulso_Total", metrics.impulse),
+            ("Taxa_Carga_Max", metrics.max_loading_rate),
+        ]
+        for column, value in pairs:
+            ref = float(row[column])
+            if not (math.isclose(value, ref, rel_tol=rel_tol, abs_tol=1e-6) or (math.isnan(value) and math.isnan(ref))):
+                print(f"{name}: {column} = {value:.6f}, esperado {ref:.6f}")
+                mismatches += 1
+        if metrics.classification != row["Classificacao_Pisada"]:
+            print(f"{name}: classificacao {metrics.classification}, esperado {row['Classificacao_Pisada']}")
+            mismatches += 1
+    for name in expected:
+        print(f"{name}: presente apenas em {reference.name}")
+        mismatches += 1
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", type=Path, default=INPUT_DIR, help="Pasta com os CSVs exportados.")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH, help="Resumo gerado (mesmo formato do Octave).")
+    parser.add_argument(
+        "--compare",
+        nargs="?",
+        type=Path,
+        const=REFERENCE_PATH,
+        help="Compara com o resumo_final.csv gerado pelo main_analise.m.",
+    )
+    parser.add_argument("--rel-tol", type=float, default=1e-4, help="Tolerancia relativa da comparacao.")
+    parser.add_argument(
+        "--recursive", action="store_true", help="Inclui subpastas (o main_analise.m le so o nivel superior)."
+    )
+    args = parser.parse_args(argv)
+
+    glob = args.input.rglob if args.recursive else args.input.glob
+    files = sorted([*glob("*.csv"), *glob("*.parquet")])
+    if not files:
+        print(f"Nenhum CSV ou Parquet encontrado em {args.input}.")
+        return
+
+    rows: List[tuple[str, GaitMetrics]] = []
+    for path in files:
+        try:
+            metrics = analyze_file(path)
+        except ValueError as exc:
+            print(f"Arquivo {path.name} ignorado: {exc}")
+            continue
+        rows.append((path.stem, metrics))
+        print(f"Processado {path.name}")
+
+    write_resumo(args.output, rows)
+    print(f"Resumo salvo em {args.output}")
+
+    if args.compare:
+        mismatches = compare_resumo(rows, args.compare, args.rel_tol)
+        if mismatches:
+            print(f"{mismatches} divergencias em relacao a {args.compare}")
+            sys.exit(1)
+        print(f"Resultados equivalentes a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
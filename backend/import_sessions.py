@@ -0,0 +1,242 @@
+"""Importa CSVs de sessoes (timestamp,fsr0..fsr6) para o banco com COPY, em paralelo por arquivo."""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import os
+import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from db import SessionLocal, engine
+from export_analysis import OUTPUT_DIR
+from models import Patient, Session
+from session_store import create_patient, write_sample_rows
+
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Mesmo padrao de nome gravado pelo export_analysis.py: <paciente>_sessao_<n>.csv
+FILE_PATTERN = re.compile(r"^(?P<label>.+)_sessao_(?P<seq>\d+)\.csv$", re.IGNORECASE)
+# Intervalo entre sessoes consecutivas do mesmo paciente (o CSV so tem tempos relativos).
+SESSION_GAP = timedelta(seconds=1)
+
+
+class ImportFile(NamedTuple):
+    path: Path
+    patient_name: str
+    seq_number: int
+    sha256: str
+    rows: int
+    duration: float
+    # 1.0 para segundos; 0.001 quando o arquivo veio em milissegundos (mesma heuristica do gait_analysis)
+    time_scale: float
+
+
+class ImportTarget(NamedTuple):
+    source: ImportFile
+    patient_id: str
+    physiotherapist_id: str
+    start_time: datetime
+
+
+def parse_file_name(path: Path) -> Optional[tuple[str, int]]:
+    """``paciente_avc_sessao_2.csv`` -> ("paciente avc", 2); o inverso do slugify do exportador."""
+    match = FILE_PATTERN.match(path.name)
+    if not match:
+        return None
+    return match.group("label").replace("_", " ").strip(), int(match.group("seq"))
+
+
+def scan_file(path: Path) -> Optional[ImportFile]:
+    """Le o arquivo uma vez: SHA-256 do conteudo, numero de linhas e ultimo timestamp."""
+    parsed = parse_file_name(path)
+    if parsed is None:
+        return None
+    digest = hashlib.sha256()
+    rows = 0
+    last_line = b""
+    with path.open("rb") as handle:
+        header = handle.readline()
+        digest.update(header)
+        if not header.decode("utf-8-sig").lower().startswith("timestamp"):
+            return None
+        for line in handle:
+            digest.update(line)
+            if line.strip():
+                rows += 1
+                last_line = line
+    if not rows:
+        return None
+    last = float(last_line.split(b",", 1)[0])
+    mean_step = last / (rows - 1) if rows > 1 else 0.0
+    time_scale = 0.001 if mean_step > 5 or last > 1e3 else 1.0
+    return ImportFile(path, parsed[0], parsed[1], digest.hexdigest(), rows, last * time_scale, time_scale)
+
+
+def _get_or_create_patient(db_session, name: str) -> tuple[str, str]:
+    patient = db_session.scalars(select(Patient).where(Patient.name == name).order_by(Patient.created_at)).first()
+    if patient is None:
+        patient = db_session.get(Patient, create_patient(name, db=db_session)["id"])
+    return patient.id, patient.physiotherapist_id
+
+
+def plan_imports(db_session, files: List[ImportFile], base_time: datetime) -> tuple[List[ImportTarget], int]:
+    """Descarta arquivos ja importados (mesmo hash) e posiciona as sessoes de cada paciente em sequencia.
+
+    Pacientes sao criados aqui, num unico processo, para que os workers nunca criem o mesmo paciente.
+    """
+    hashes = {item.sha256 for item in files}
+    known = set(db_session.scalars(select(Session.source_sha256).where(Session.source_sha256.in_(hashes))))
+    by_patient: defaultdict[str, List[ImportFile]] = defaultdict(list)
+    skipped = 0
+    for item in sorted(files, key=lambda f: (f.patient_name, f.seq_number, str(f.path))):
+        if item.sha256 in known:
+            skipped += 1
+            continue
+        known.add(item.sha256)
+        by_patient[item.patient_name].append(item)
+
+    targets = []
+    for name, items in by_patient.items():
+        patient_id, physio_id = _get_or_create_patient(db_session, name)
+        start = base_time
+        for item in items:
+            targets.append(ImportTarget(item, patient_id, physio_id, start))
+            start += timedelta(seconds=item.duration) + SESSION_GAP
+    return targets, skipped
+
+
+def iter_row_batches(target: ImportTarget, session_id: str) -> Iterator[List[Dict]]:
+    """Linhas no formato do session_store (timestamp absoluto, pressoes por sensor), em lotes."""
+    source = target.source
+    batch: List[Dict] = []
+    with source.path.open(newline="", encoding="utf-8-sig") as handle:
+        reader = csv.reader(handle)
+        keys = [key.strip() for key in next(reader)[1:]]
+        for row in reader:
+            if not row or not row[0].strip():
+                continue
+            offset = float(row[0]) * source.time_scale
+            pressures = {}
+            for key, value in zip(keys, row[1:]):
+                value = value.strip()
+                if value and value.lower() != "nan":
+                    pressures[key] = float(value)
+            batch.append(
+                {
+                    "session_id": session_id,
+                    "timestamp": target.start_time + timedelta(seconds=offset),
+                    "pressures": pressures,
+                }
+            )
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def import_file(db_session, target: ImportTarget) -> Optional[str]:
+    """Cria a sessao encerrada e grava as amostras com COPY, tudo numa unica transacao."""
+    source = target.source
+    session = Session(
+        patient_id=target.patient_id,
+        physiotherapist_id=target.physiotherapist_id,
+        note=f"Importada de {source.path.name}",
+        start_time=target.start_time,
+        end_time=target.start_time + timedelta(seconds=source.duration),
+        source_sha256=source.sha256,
+    )
+    db_session.add(session)
+    try:
+        db_session.flush()
+        for batch in iter_row_batches(target, session.id):
+            write_sample_rows(db_session, session, batch, use_copy=True)
+        session_id = session.id
+        db_session.commit()
+    except IntegrityError:
+        # Outro processo importou o mesmo conteudo ao mesmo tempo.
+        db_session.rollback()
+        return None
+    return session_id
+
+
+def _init_worker() -> None:
+    # Conexoes herdadas do processo pai (fork) nao podem ser reutilizadas pelo filho.
+    engine.dispose(close=False)
+
+
+def _import_in_worker(target: ImportTarget) -> tuple[ImportTarget, Optional[str]]:
+    with SessionLocal() as db_session:
+        return target, import_file(db_session, target)
+
+
+def import_targets(
+    targets: List[ImportTarget], workers: int = IMPORT_WORKERS
+) -> Iterator[tuple[ImportTarget, Optional[str]]]:
+    if workers <= 1 or len(targets) <= 1:
+        for target in targets:
+            yield _import_in_worker(target)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(_import_in_worker, targets)
+
+
+def collect_files(paths: List[Path]) -> List[Path]:
+    files = []
+    for path in paths:
+        files.extend(sorted(path.rglob("*.csv")) if path.is_dir() else [path])
+    return files
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "paths", nargs="*", type=Path, default=[OUTPUT_DIR], help="Arquivos ou pastas (padrao: data-analysis/input)."
+    )
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="Processos importando em paralelo.")
+    parser.add_argument(
+        "--start",
+        type=datetime.fromisoformat,
+        default=None,
+        help="Inicio da primeira sessao de cada paciente (ISO 8601, padrao: agora).",
+    )
+    args = parser.parse_args(argv)
+
+    base_time = args.start or datetime.now(timezone.utc)
+    if base_time.tzinfo is None:
+        base_time = base_time.replace(tzinfo=timezone.utc)
+
+    paths = collect_files(args.paths)
+    files = [item for item in (scan_file(path) for path in paths) if item is not None]
+    for path in sorted(set(paths) - {item.path for item in files}):
+        print(f"Ignorado (nome fora do padrao <paciente>_sessao_<n>.csv ou sem linhas): {path}")
+
+    with SessionLocal() as db_session:
+        targets, skipped = plan_imports(db_session, files, base_time)
+        db_session.commit()
+    print(f"Arquivos ja importados (mesmo conteudo): {skipped}")
+
+    started = datetime.now()
+    imported = rows = 0
+    for target, session_id in import_targets(targets, args.workers):
+        if session_id is None:
+            print(f"Ignorado (importado em paralelo): {target.source.path}")
+            continue
+        imported += 1
+        rows += target.source.rows
+        print(f"Importado {target.source.path} -> sessao {session_id} ({target.source.rows} amostras)")
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Total de sessões importadas: {imported} ({rows} amostras, {elapsed:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+"""Ingestao write-behind: os quadros de /data vao para uma fila em memoria e sao gravados em lotes com COPY."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from db import is_transient_error
+from metrics import GaugeCallback
+from session_store import SESSION_STATUS_CACHE_SIZE, append_samples
+
+INGEST_MODE = os.getenv("INGEST_MODE", "sync").lower()
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "50000"))
+INGEST_FLUSH_MS = float(os.getenv("INGEST_FLUSH_MS", "200"))
+INGEST_FLUSH_ROWS = int(os.getenv("INGEST_FLUSH_ROWS", "2000"))
+
+
+def use_write_behind() -> bool:
+    return INGEST_MODE == "queued"
+
+
+class IngestQueueFull(RuntimeError):
+    """A fila atingiu INGEST_QUEUE_SIZE quadros pendentes (o banco nao esta acompanhando)."""
+
+
+class _WriteBehindQueue:
+    """Fila limitada por sessao; uma thread grava a cada INGEST_FLUSH_MS ou quando ha INGEST_FLUSH_ROWS pendentes."""
+
+    def __init__(self, capacity: int, flush_interval: float, flush_rows: int) -> None:
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._pending: Dict[str, List[Dict]] = {}
+        self._depth = 0
+        # Sessoes encerradas (ou encerrando): put recusa, senao o quadro iria para um lote que o banco rejeita.
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+        self._cond = threading.Condition()
+        # Serializa as gravacoes: flush(session_id) so retorna depois de qualquer lote ja retirado da fila.
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {
+            "enqueued_total": 0,
+            "written_total": 0,
+            "dropped_total": 0,
+            "rejected_total": 0,
+            "flush_count": 0,
+            "flush_errors": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    def put(self, session_id: str, sample: Dict) -> int:
+        with self._cond:
+            if session_id in self._closed:
+                raise ValueError("Sessão já foi finalizada")
+            if self._depth >= self.capacity:
+                self._stats["rejected_total"] += 1
+                raise IngestQueueFull("Fila de ingestão cheia, tente novamente")
+            self._pending.setdefault(session_id, []).append(sample)
+            self._depth += 1
+            self._stats["enqueued_total"] += 1
+            if self._depth >= self.flush_rows:
+                self._cond.notify()
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            return self._depth
+
+    def close_session(self, session_id: str) -> None:
+        with self._cond:
+            self._closed[session_id] = None
+            self._closed.move_to_end(session_id)
+            while len(self._closed) > SESSION_STATUS_CACHE_SIZE:
+                self._closed.popitem(last=False)
+
+    def reopen_session(self, session_id: str) -> None:
+        with self._cond:
+            self._closed.pop(session_id, None)
+
+    def _take(self, session_id: Optional[str]) -> Dict[str, List[Dict]]:
+        with self._cond:
+            if session_id is None:
+                batches, self._pending = self._pending, {}
+            else:
+                batch = self._pending.pop(session_id, None)
+                batches = {session_id: batch} if batch else {}
+            self._depth -= sum(len(batch) for batch in batches.values())
+            return batches
+
+    def _restore(self, session_id: str, batch: List[Dict]) -> None:
+        with self._cond:
+            self._pending.setdefault(session_id, [])[:0] = batch
+            self._depth += len(batch)
+
+    def flush(self, session_id: Optional[str] = None) -> int:
+        """Grava o que esta pendente (de todas as sessoes ou de uma) e devolve o numero de linhas gravadas."""
+        with self._flush_lock:
+            batches = self._take(session_id)
+            if not batches:
+                return 0
+            started = time.perf_counter()
+            written = 0
+            try:
+                for sid, batch in batches.items():
+                    try:
+                        append_samples(sid, batch, use_copy=True)
+                    except Exception as exc:
+                        if not is_transient_error(exc):
+                            # Sessao inexistente/finalizada ou dados rejeitados (DataError, IntegrityError):
+                            # repetir falharia sempre e travaria a fila de todas as sessoes.
+                            print(f"Descartando {len(batch)} amostras da sessao {sid}: {exc}")
+                            with self._cond:
+                                self._stats["dropped_total"] += len(batch)
+                            continue
+                        # Falha de conexao: devolve este lote e os seguintes para a fila.
+                        remaining = list(batches)
+                        for pending_sid in remaining[remaining.index(sid) :]:
+                            self._restore(pending_sid, batches[pending_sid])
+                        with self._cond:
+                            self._stats["flush_errors"] += 1
+                        raise
+                    written += len(batch)
+            finally:
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                with self._cond:
+                    self._stats["written_total"] += written
+                    self._stats["flush_count"] += 1
+                    self._stats["last_flush_ms"] = elapsed_ms
+                    self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], elapsed_ms)
+                    self._stats["total_flush_ms"] += elapsed_ms
+            return written
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._depth >= self.flush_rows or self._stop.is_set(), self.flush_interval
+                )
+            try:
+                self.flush()
+            except Exception as exc:
+                print(f"Erro ao gravar a fila de ingestao: {exc}")
+                # Evita repetir a falha sem pausa enquanto o banco estiver fora.
+                self._stop.wait(self.flush_interval)
+
+    def close(self) -> None:
+        with self._cond:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+            depth = self._depth
+        flushes = stats["flush_count"]
+        stats["avg_flush_ms"] = stats["total_flush_ms"] / flushes if flushes else 0.0
+        for key in ("last_flush_ms", "max_flush_ms", "avg_flush_ms", "total_flush_ms"):
+            stats[key] = round(stats[key], 3)
+        return {"mode": INGEST_MODE, "queue_depth": depth, "queue_capacity": self.capacity, **stats}
+
+
+_queue = _WriteBehindQueue(INGEST_QUEUE_SIZE, INGEST_FLUSH_MS / 1000, INGEST_FLUSH_ROWS)
+GaugeCallback(
+    "gaitvision_ingest_queue_depth", "Amostras aguardando gravacao na fila write-behind.", lambda: {(): _queue._depth}
+)
+
+
+def enqueue_sample(session_id: str, sensor_readings: Dict[str, float], timestamp: Optional[str] = None) -> Dict:
+    """Enfileira um quadro e retorna na hora; sem timestamp, usa o horario de chegada (nao o da gravacao)."""
+    sample = {"sensor_readings": sensor_readings, "timestamp": timestamp or datetime.now(timezone.utc)}
+    depth = _queue.put(session_id, sample)
+    return {"session_id": session_id, "queued": True, "queue_depth": depth}
+
+
+def close_session_ingest(session_id: str) -> None:
+    """Passa a recusar quadros da sessao; chamado antes do flush final do /end."""
+    _queue.close_session(session_id)
+
+
+def reopen_session_ingest(session_id: str) -> None:
+    """Desfaz close_session_ingest quando o encerramento falha (a sessao continua aberta)."""
+    _queue.reopen_session(session_id)
+
+
+def flush_ingest(session_id: Optional[str] = None) -> int:
+    return _queue.flush(session_id)
+
+
+def close_ingest() -> None:
+    """Para a thread de gravacao e grava o que restou na fila (desligamento do servidor)."""
+    _queue.close()
+
+
+def ingest_stats() -> Dict:
+    return _queue.stats()
@@ -1,24 +1,72 @@
+import asyncio
+import json
+import math
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Annotated, Dict, List, Literal, Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, field_validator
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from arduino_reader import read_pressure_data
-from session_store import (
+from arduino_reader import (
+    ALLOW_SIMULATED,
+    BAUDRATE,
+    DEFAULT_DEVICE_ID,
+    DeviceConfig,
+    HISTORY_CAPACITY,
+    PressureDevice,
+    default_device,
+    devices,
+)
+from db import async_engine, get_async_session
+from ingest_queue import IngestQueueFull, close_ingest, ingest_stats
+from metrics import CONTENT_TYPE, RequestMetricsMiddleware, render_metrics
+from session_recorder import (
+    RecordingFlushFailed,
+    is_recording,
+    recording_sessions,
+    start_recording,
+    stop_all_recordings,
+    stop_recording,
+)
+from async_session_store import (
+    SessionNotFound,
     append_sample,
+    append_samples,
     create_patient,
     end_session,
     get_patient,
     get_session,
+    get_session_analysis,
+    get_session_summary,
     list_patients,
     list_sessions,
     start_session,
 )
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Importar o app nao abre portas: os leitores sao tarefas deste event loop e so existem enquanto o app roda.
+    devices.start_all()
+    yield
+    await devices.stop_all()
+    # Garante que nenhum quadro gravado no servidor fique apenas em memoria (join + flush fora do event loop).
+    await asyncio.to_thread(stop_all_recordings)
+    await asyncio.to_thread(close_ingest)
+    await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Sessao do banco por requisicao (uma conexao do pool so enquanto a requisicao usa o banco).
+RequestDb = Annotated[AsyncSession, Depends(get_async_session)]
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +75,17 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    try:
+        return await request_validation_exception_handler(request, exc)
+    except ValueError:
+        # Entrada com NaN/Infinity: o JSON estrito da resposta nao consegue ecoar o valor recebido.
+        errors = [{key: value for key, value in error.items() if key not in ("input", "ctx")} for error in exc.errors()]
+        return JSONResponse(status_code=422, content={"detail": jsonable_encoder(errors)})
 
 
 class PatientPayload(BaseModel):
@@ -37,81 +96,304 @@ class PatientPayload(BaseModel):
 
 class SessionPayload(BaseModel):
     note: Optional[str] = Field(default=None, max_length=240)
+    # Grava no servidor todos os quadros do leitor, sem depender do navegador.
+    server_capture: bool = False
+    # Dispositivo gravado e cujas metricas ao vivo zeram (padrao: o configurado no ambiente).
+    device_id: str = DEFAULT_DEVICE_ID
 
 
 class SamplePayload(BaseModel):
     sensor_readings: Dict[str, float]
     timestamp: Optional[datetime] = None
 
+    @field_validator("sensor_readings")
+    @classmethod
+    def _finite_readings(cls, readings: Dict[str, float]) -> Dict[str, float]:
+        # NaN/Infinity passam pelo JSON do FastAPI, mas nao sao jsonb valido.
+        if not all(math.isfinite(value) for value in readings.values()):
+            raise ValueError("Leituras devem ser números finitos")
+        return readings
+
+
+class SampleBatchPayload(BaseModel):
+    samples: List[SamplePayload] = Field(..., min_length=1, max_length=2000)
+
+
+class DevicePayload(BaseModel):
+    id: str = Field(..., min_length=1, max_length=40)
+    transport: Literal["serial", "ble"] = "serial"
+    # Portas tentadas em ordem, como ARDUINO_PORTS.
+    ports: List[str] = Field(default_factory=list, max_length=8)
+    baudrate: int = Field(default=BAUDRATE, gt=0)
+    bt_address: Optional[str] = Field(default=None, max_length=60)
+    bt_characteristic: Optional[str] = Field(default=None, max_length=60)
+
+
+def _get_device(device_id: str) -> PressureDevice:
+    try:
+        return devices.get(device_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
 
 @app.get("/")
 def root():
     return {"message": "API da GaitVision ativa 🚀"}
 
 
-@app.get("/pressao")
-def get_pressao():
+async def _read_pressao(device: PressureDevice) -> dict:
     try:
-        data = read_pressure_data()
+        data = await device.read_pressure_data()
         return {"pressao": data}
     except Exception as exc:
         return {"error": str(exc)}
 
 
+def _pressao_window(device: PressureDevice, seconds: float) -> dict:
+    timestamps, values, sensors = device.read_pressure_window(seconds)
+    return {
+        "sensors": sensors,
+        "capacity": HISTORY_CAPACITY,
+        "timestamps": timestamps.tolist(),
+        "values": dict(zip(sensors, values.T.tolist())),
+    }
+
+
+STREAM_KEEPALIVE_SECONDS = 15.0
+SIMULATED_STREAM_INTERVAL = 0.1
+
+
+def _stream_pressao(device: PressureDevice) -> StreamingResponse:
+    subscription = device.subscribe_frames()
+    timeout = SIMULATED_STREAM_INTERVAL if ALLOW_SIMULATED else STREAM_KEEPALIVE_SECONDS
+
+    async def events():
+        try:
+            while True:
+                try:
+                    frame = await asyncio.wait_for(subscription.get(), timeout)
+                except asyncio.TimeoutError:
+                    if not ALLOW_SIMULATED:
+                        yield ": keepalive\n\n"
+                        continue
+                    frame = device.generate_fake_frame()
+                if frame is None:
+                    # Dispositivo removido: encerra o stream em vez de mandar keepalives para sempre.
+                    break
+                yield f"data: {json.dumps(frame)}\n\n"
+        finally:
+            device.unsubscribe_frames(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/pressao")
+async def get_pressao():
+    return await _read_pressao(default_device)
+
+
+@app.get("/pressao/window")
+def get_pressao_window(seconds: float = Query(5.0, gt=0, le=600)):
+    """Historico recente em formato colunar (uma lista por sensor)."""
+    return _pressao_window(default_device, seconds)
+
+
+@app.get("/pressao/metrics")
+def get_pressao_metrics():
+    """Cadencia, impulso e taxa de carga calculados ao vivo pelo leitor desde o inicio da sessao."""
+    return default_device.read_gait_metrics()
+
+
+@app.get("/pressao/stream")
+async def stream_pressao():
+    """Server-Sent Events com todos os quadros filtrados do leitor (sem polling)."""
+    return _stream_pressao(default_device)
+
+
+@app.get("/devices")
+def api_list_devices():
+    return devices.list()
+
+
+@app.post("/devices")
+async def api_add_device(payload: DevicePayload):
+    config = DeviceConfig(
+        payload.id,
+        payload.transport,
+        tuple(port.strip() for port in payload.ports if port.strip()),
+        payload.baudrate,
+        payload.bt_address,
+        payload.bt_characteristic,
+    )
+    try:
+        # Rota async: a tarefa de leitura precisa ser criada no event loop do app.
+        return devices.add(config).status()
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/devices/{device_id}")
+def api_get_device(device_id: str):
+    return _get_device(device_id).status()
+
+
+@app.delete("/devices/{device_id}")
+async def api_remove_device(device_id: str):
+    _get_device(device_id)
+    sessions = recording_sessions(device_id)
+    if sessions:
+        # Remover agora deixaria a gravacao presa a um dispositivo que nunca mais manda quadros.
+        raise HTTPException(
+            status_code=400, detail=f"Dispositivo em uso pela gravação da sessão {sessions[0]}; encerre-a antes"
+        )
+    try:
+        await devices.remove(device_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return {"id": device_id, "removed": True}
+
+
+@app.get("/devices/{device_id}/pressao")
+async def get_device_pressao(device_id: str):
+    return await _read_pressao(_get_device(device_id))
+
+
+@app.get("/devices/{device_id}/pressao/window")
+def get_device_pressao_window(device_id: str, seconds: float = Query(5.0, gt=0, le=600)):
+    return _pressao_window(_get_device(device_id), seconds)
+
+
+@app.get("/devices/{device_id}/pressao/metrics")
+def get_device_pressao_metrics(device_id: str):
+    return _get_device(device_id).read_gait_metrics()
+
+
+@app.get("/devices/{device_id}/pressao/stream")
+async def stream_device_pressao(device_id: str):
+    return _stream_pressao(_get_device(device_id))
+
+
+@app.get("/ingest/metrics")
+def get_ingest_metrics():
+    """Profundidade da fila write-behind e latencia dos flushes (INGEST_MODE=queued)."""
+    return ingest_stats()
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Contadores e histogramas no formato texto do Prometheus (leitor, requisicoes, banco)."""
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+
 @app.get("/patients")
-def api_list_patients():
-    return list_patients()
+async def api_list_patients(db: RequestDb):
+    return await list_patients(db)
 
 
 @app.post("/patients")
-def api_create_patient(payload: PatientPayload):
+async def api_create_patient(payload: PatientPayload, db: RequestDb):
     try:
-        return create_patient(payload.name, identifier=payload.identifier, age=payload.age)
+        return await create_patient(db, payload.name, identifier=payload.identifier, age=payload.age)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.get("/patients/{patient_id}")
-def api_get_patient(patient_id: str):
+async def api_get_patient(patient_id: str, db: RequestDb):
     try:
-        return get_patient(patient_id)
+        return await get_patient(db, patient_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
 @app.post("/patients/{patient_id}/sessions")
-def api_start_session(patient_id: str, payload: SessionPayload):
+async def api_start_session(patient_id: str, payload: SessionPayload, db: RequestDb):
     try:
-        return start_session(patient_id, payload.note)
+        device = devices.get(payload.device_id)
+        summary = await start_session(db, patient_id, payload.note)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+    device.reset_gait_metrics()
+    if payload.server_capture:
+        start_recording(summary["id"], device.device_id)
+    return {**summary, "server_capture": is_recording(summary["id"]), "device_id": device.device_id}
 
 
 @app.get("/patients/{patient_id}/sessions")
-def api_list_sessions(patient_id: str):
-    return list_sessions(patient_id)
+async def api_list_sessions(patient_id: str, db: RequestDb):
+    return await list_sessions(db, patient_id)
 
 
 @app.post("/sessions/{session_id}/data")
-def api_append_sample(session_id: str, payload: SamplePayload):
+async def api_append_sample(session_id: str, payload: SamplePayload, db: RequestDb):
     try:
         timestamp = payload.timestamp.isoformat() if payload.timestamp else None
-        return append_sample(session_id, payload.sensor_readings, timestamp=timestamp)
+        return await append_sample(db, session_id, payload.sensor_readings, timestamp=timestamp)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except IngestQueueFull as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+
+@app.post("/sessions/{session_id}/data/batch")
+async def api_append_samples(session_id: str, payload: SampleBatchPayload, db: RequestDb):
+    try:
+        samples = [
+            {
+                "sensor_readings": sample.sensor_readings,
+                "timestamp": sample.timestamp.isoformat() if sample.timestamp else None,
+            }
+            for sample in payload.samples
+        ]
+        return await append_samples(db, session_id, samples)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.post("/sessions/{session_id}/end")
-def api_end_session(session_id: str):
+async def api_end_session(session_id: str, db: RequestDb):
     try:
-        return end_session(session_id)
+        # Descarrega o buffer do gravador (thread propria) sem bloquear o event loop.
+        await asyncio.to_thread(stop_recording, session_id)
+        return await end_session(db, session_id)
+    except RecordingFlushFailed as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
 @app.get("/sessions/{session_id}")
-def api_get_session(session_id: str):
+async def api_get_session(
+    session_id: str,
+    db: RequestDb,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    max_points: Optional[int] = Query(None, ge=3, le=20000),
+):
     try:
-        return get_session(session_id)
+        result = await get_session(db, session_id, start=start, end=end, max_points=max_points)
+        return {**result, "server_capture": is_recording(session_id)}
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.get("/sessions/{session_id}/summary")
+async def api_get_session_summary(session_id: str, db: RequestDb):
+    try:
+        return {**await get_session_summary(db, session_id), "server_capture": is_recording(session_id)}
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.get("/sessions/{session_id}/analysis")
+async def api_get_session_analysis(session_id: str, db: RequestDb):
+    try:
+        return await get_session_analysis(db, session_id)
+    except SessionNotFound as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
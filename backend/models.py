@@ -1,8 +1,8 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from uuid import uuid4
 
-from sqlalchemy import Column, DateTime, Float, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from db import Base
@@ -12,13 +12,17 @@ def _uuid() -> str:
     return str(uuid4())
 
 
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Physiotherapist(Base):
     __tablename__ = "physiotherapists"
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     email: Mapped[str] = mapped_column(String(120), unique=True, index=True)
     name: Mapped[str] = mapped_column(String(120))
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
     patients: Mapped[list["Patient"]] = relationship("Patient", back_populates="physiotherapist")
 
@@ -31,7 +35,7 @@ class Patient(Base):
     name: Mapped[str] = mapped_column(String(120))
     identifier: Mapped[str | None] = mapped_column(String(60), nullable=True)
     age: Mapped[int | None] = mapped_column(Integer, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
 
     physiotherapist: Mapped[Physiotherapist] = relationship("Physiotherapist", back_populates="patients")
     sessions: Mapped[list["Session"]] = relationship("Session", back_populates="patient")
@@ -39,29 +43,66 @@ class Patient(Base):
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("ix_sessions_patient_start", "patient_id", "start_time"),
+        Index("ix_sessions_source_sha256", "source_sha256", unique=True),
+    )
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
     patient_id: Mapped[str] = mapped_column(String(36), ForeignKey("patients.id"), index=True)
     physiotherapist_id: Mapped[str] = mapped_column(String(36), ForeignKey("physiotherapists.id"), index=True)
     note: Mapped[str | None] = mapped_column(Text, nullable=True)
-    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
     end_time: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
     sample_count: Mapped[int] = mapped_column(Integer, default=0)
     max_pressure_kpa: Mapped[float] = mapped_column(Float, default=0)
+    # Somas acumuladas (kPa) por regiao para calcular media e variancia sem reler as amostras
+    heel_kpa_sum: Mapped[float] = mapped_column(Float, default=0)
+    heel_kpa_sumsq: Mapped[float] = mapped_column(Float, default=0)
+    midfoot_kpa_sum: Mapped[float] = mapped_column(Float, default=0)
+    midfoot_kpa_sumsq: Mapped[float] = mapped_column(Float, default=0)
+    toe_kpa_sum: Mapped[float] = mapped_column(Float, default=0)
+    toe_kpa_sumsq: Mapped[float] = mapped_column(Float, default=0)
+    # SHA-256 do CSV de origem (import_sessions.py); evita importar o mesmo arquivo duas vezes
+    source_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     patient: Mapped[Patient] = relationship("Patient", back_populates="sessions")
     physiotherapist: Mapped[Physiotherapist] = relationship("Physiotherapist")
     samples: Mapped[list["PressureSample"]] = relationship(
         "PressureSample", back_populates="session", cascade="all, delete-orphan"
     )
+    chunks: Mapped[list["PressureChunk"]] = relationship(
+        "PressureChunk", back_populates="session", cascade="all, delete-orphan"
+    )
 
 
 class PressureSample(Base):
     __tablename__ = "pressure_samples"
+    __table_args__ = (Index("ix_pressure_samples_session_timestamp", "session_id", "timestamp"),)
 
     id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
-    session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id"), index=True)
-    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=datetime.utcnow)
+    session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id"))
+    timestamp: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
     pressures: Mapped[dict | None] = mapped_column(JSONB)
 
     session: Mapped[Session] = relationship("Session", back_populates="samples")
+
+
+class PressureChunk(Base):
+    """Bloco de amostras consecutivas de uma sessao em formato colunar (float32 little-endian)."""
+
+    __tablename__ = "pressure_chunks"
+    __table_args__ = (Index("ix_pressure_chunks_session_start", "session_id", "start_time"),)
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, default=_uuid)
+    session_id: Mapped[str] = mapped_column(String(36), ForeignKey("sessions.id"))
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    end_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    sample_count: Mapped[int] = mapped_column(Integer)
+    sensor_keys: Mapped[list[str]] = mapped_column(ARRAY(String(16)))
+    # segundos desde start_time (float32), um por amostra
+    offsets: Mapped[bytes] = mapped_column(LargeBinary)
+    # matriz amostras x sensor_keys (float32, row-major); NaN = sensor ausente na amostra
+    values: Mapped[bytes] = mapped_column(LargeBinary)
+
+    session: Mapped[Session] = relationship("Session", back_populates="chunks")
@@ -0,0 +1,78 @@
+"""Leitura e escrita das exportacoes em Parquet (pyarrow opcional)."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+TIMESTAMP_COLUMN = "timestamp"
+METADATA_PREFIX = "gaitvision."
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:  # pragma: no cover - import guard
+        raise RuntimeError("pyarrow nao instalado. Instale com 'pip install pyarrow' para usar Parquet.") from exc
+    return pa, pq
+
+
+class ParquetFrameWriter:
+    """Grava lotes (segundos desde o inicio x sensores) como row groups: float64 no tempo, float32 nos sensores.
+
+    Leituras ausentes (NaN) viram nulos; `metadata` vai para os metadados do schema.
+    """
+
+    def __init__(self, path: Path, sensor_keys: Sequence[str], metadata: Optional[Dict[str, str]] = None) -> None:
+        pa, pq = _pyarrow()
+        self._pa = pa
+        self._keys = list(sensor_keys)
+        fields = [pa.field(TIMESTAMP_COLUMN, pa.float64(), nullable=False)]
+        fields += [pa.field(key, pa.float32()) for key in self._keys]
+        encoded = {f"{METADATA_PREFIX}{key}": str(value) for key, value in (metadata or {}).items()}
+        self._schema = pa.schema(fields, metadata=encoded)
+        self._writer = pq.ParquetWriter(str(path), self._schema, compression="zstd")
+
+    def write_batch(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        pa = self._pa
+        columns = [pa.array(np.asarray(timestamps, dtype=np.float64))]
+        values = np.asarray(values, dtype=np.float32)
+        for idx in range(len(self._keys)):
+            column = values[:, idx]
+            columns.append(pa.array(column, mask=np.isnan(column)))
+        self._writer.write_table(pa.Table.from_arrays(columns, schema=self._schema))
+
+    def close(self) -> None:
+        self._writer.close()
+
+    def __enter__(self) -> "ParquetFrameWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def read_column_names(path: Path) -> List[str]:
+    _, pq = _pyarrow()
+    return list(pq.read_schema(str(path), memory_map=True).names)
+
+
+def read_metadata(path: Path) -> Dict[str, str]:
+    """Metadados da sessao gravados pelo exportador (session_id, paciente, numero, inicio)."""
+    _, pq = _pyarrow()
+    raw = pq.read_schema(str(path), memory_map=True).metadata or {}
+    prefix = METADATA_PREFIX.encode()
+    return {key[len(prefix) :].decode(): value.decode() for key, value in raw.items() if key.startswith(prefix)}
+
+
+def read_columns(path: Path, columns: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """Le apenas `columns` via memory-map; nulos voltam como NaN."""
+    _, pq = _pyarrow()
+    table = pq.read_table(str(path), columns=list(columns) if columns is not None else None, memory_map=True)
+    return {
+        name: table.column(name).to_numpy(zero_copy_only=False).astype(np.float64, copy=False)
+        for name in table.column_names
+    }
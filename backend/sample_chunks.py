@@ -0,0 +1,142 @@
+"""Armazenamento colunar das amostras: blocos float32 por sessao em vez de uma linha JSONB por quadro."""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_STORAGE = os.getenv("SAMPLE_STORAGE", "rows").lower()
+CHUNK_SECONDS = float(os.getenv("SAMPLE_CHUNK_SECONDS", "2.0"))
+CHUNK_MAX_SAMPLES = int(os.getenv("SAMPLE_CHUNK_MAX_SAMPLES", "1000"))
+
+
+class Frames(NamedTuple):
+    """Amostras de uma sessao em forma colunar (timestamps epoch em segundos x sensores)."""
+
+    timestamps: np.ndarray
+    values: np.ndarray
+    keys: List[str]
+
+
+def use_chunks() -> bool:
+    return SAMPLE_STORAGE == "chunks"
+
+
+def _sensor_order(key: str) -> Tuple[int, str]:
+    # fsr2 antes de fsr10; chaves fora do padrao vao para o fim
+    suffix = key[3:] if key.startswith("fsr") else ""
+    return (int(suffix), key) if suffix.isdigit() else (1 << 30, key)
+
+
+def _epoch(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _from_epoch(value: float) -> datetime:
+    return datetime.fromtimestamp(value, tz=timezone.utc)
+
+
+def empty_frames() -> Frames:
+    return Frames(np.empty(0, dtype=np.float64), np.empty((0, 0), dtype=np.float64), [])
+
+
+def pack_chunks(session_id: str, samples: Sequence[Tuple[datetime, dict]]) -> List[dict]:
+    """Agrupa (timestamp, leituras) em blocos de ate CHUNK_SECONDS / CHUNK_MAX_SAMPLES prontos para INSERT."""
+    if not samples:
+        return []
+    unordered = np.array([_epoch(timestamp) for timestamp, _ in samples], dtype=np.float64)
+    order = np.argsort(unordered, kind="stable")
+    ordered = [samples[idx] for idx in order]
+    epochs = unordered[order]
+
+    chunks: List[dict] = []
+    start = 0
+    while start < len(ordered):
+        limit = min(start + CHUNK_MAX_SAMPLES, len(ordered))
+        end = start + int(np.searchsorted(epochs[start:limit], epochs[start] + CHUNK_SECONDS, side="right"))
+        end = max(end, start + 1)
+        block = ordered[start:end]
+        keys = sorted({key for _, readings in block for key in readings}, key=_sensor_order)
+        values = np.full((len(block), len(keys)), np.nan, dtype="<f4")
+        column = {key: idx for idx, key in enumerate(keys)}
+        for row, (_, readings) in enumerate(block):
+            for key, value in readings.items():
+                if value is not None:
+                    values[row, column[key]] = value
+        offsets = (epochs[start:end] - epochs[start]).astype("<f4")
+        chunks.append(
+            {
+                "session_id": session_id,
+                "start_time": block[0][0],
+                "end_time": block[-1][0],
+                "sample_count": len(block),
+                "sensor_keys": keys,
+                "offsets": offsets.tobytes(),
+                "values": values.tobytes(),
+            }
+        )
+        start = end
+    return chunks
+
+
+def decode_chunk(start_time: datetime, sample_count: int, sensor_keys: Sequence[str], offsets: bytes, values: bytes) -> Frames:
+    timestamps = np.frombuffer(offsets, dtype="<f4").astype(np.float64) + _epoch(start_time)
+    matrix = np.frombuffer(values, dtype="<f4").reshape(sample_count, len(sensor_keys)).astype(np.float64)
+    return Frames(timestamps, matrix, list(sensor_keys))
+
+
+def rows_to_frames(rows: Iterable[Tuple[datetime, Optional[dict]]]) -> Frames:
+    """Converte linhas (timestamp, pressures JSONB) para o formato colunar."""
+    rows = list(rows)
+    if not rows:
+        return empty_frames()
+    keys = sorted({key for _, pressures in rows for key in (pressures or {})}, key=_sensor_order)
+    column = {key: idx for idx, key in enumerate(keys)}
+    values = np.full((len(rows), len(keys)), np.nan, dtype=np.float64)
+    for row, (_, pressures) in enumerate(rows):
+        for key, value in (pressures or {}).items():
+            if value is not None:
+                values[row, column[key]] = value
+    timestamps = np.array([_epoch(timestamp) for timestamp, _ in rows], dtype=np.float64)
+    return Frames(timestamps, values, keys)
+
+
+def merge_frames(parts: Iterable[Frames]) -> Frames:
+    """Une blocos com conjuntos de sensores possivelmente diferentes, em ordem cronologica."""
+    parts = [part for part in parts if len(part.timestamps)]
+    if not parts:
+        return empty_frames()
+    if len(parts) == 1 and np.all(np.diff(parts[0].timestamps) >= 0):
+        return parts[0]
+    keys = sorted({key for part in parts for key in part.keys}, key=_sensor_order)
+    column = {key: idx for idx, key in enumerate(keys)}
+    total = sum(len(part.timestamps) for part in parts)
+    timestamps = np.empty(total, dtype=np.float64)
+    values = np.full((total, len(keys)), np.nan, dtype=np.float64)
+    row = 0
+    for part in parts:
+        count = len(part.timestamps)
+        timestamps[row : row + count] = part.timestamps
+        values[row : row + count, [column[key] for key in part.keys]] = part.values
+        row += count
+    order = np.argsort(timestamps, kind="stable")
+    return Frames(timestamps[order], values[order], keys)
+
+
+def frames_to_samples(frames: Frames) -> List[dict]:
+    """Formato da API: [{"timestamp": iso, "pressures": {sensor: valor}}], omitindo sensores ausentes (NaN)."""
+    keys = frames.keys
+    samples = []
+    for timestamp, row in zip(frames.timestamps.tolist(), frames.values.tolist()):
+        samples.append(
+            {
+                "timestamp": _from_epoch(timestamp).isoformat(),
+                "pressures": {key: value for key, value in zip(keys, row) if value == value},
+            }
+        )
+    return samples
@@ -0,0 +1,354 @@
+"""Emulador de dispositivo serial: um pseudo-terminal (pty) local que envia quadros como o ESP32.
+
+Reproduz sessoes gravadas (CSV timestamp,fsr0..fsr6) ou uma marcha sintetica em texto, JSON ou binario, na
+taxa escolhida (1 Hz a alguns kHz). Apenas Linux/macOS (pty).
+
+    python serial_emulator.py --format binary --rate 100            # imprime ARDUINO_PORT=/dev/pts/N
+    python serial_emulator.py --csv ../data-analysis/input/controle_sessao_1.csv --format text
+    python serial_emulator.py --measure 5 --rate 100 1000 5000       # vazao e latencia do leitor
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import threading
+import time
+import tty
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from arduino_reader import (
+    ADC_MAX_VALUE,
+    ADC_REFERENCE_VOLTAGE,
+    BINARY_SENSOR_COUNT,
+    DeviceConfig,
+    PressureDevice,
+    devices,
+    encode_binary_frame,
+)
+
+SENSOR_KEYS = [f"fsr{i}" for i in range(BINARY_SENSOR_COUNT)]
+FORMATS = ("text", "json", "binary")
+MEASURE_DEVICE_ID = "emulator"
+# Intervalo maximo entre escritas: em taxas altas, os quadros vencidos saem juntos numa unica escrita.
+MAX_SLEEP = 0.05
+# Uma taxa e sustentada quando tudo chega, no ritmo pedido, sem fila crescendo no leitor.
+SUSTAINED_RATE_RATIO = 0.98
+SUSTAINED_P99_MS = float(os.getenv("EMULATOR_SUSTAINED_P99_MS", "50"))
+
+
+class VirtualSerialPort:
+    """Par pty: o emulador escreve no lado mestre e o leitor abre ``path`` como se fosse a porta serial."""
+
+    def __init__(self, *, blocking: bool = True) -> None:
+        self._master, self._slave = os.openpty()
+        # Sem eco nem traducao de fim de linha: os quadros binarios passam intactos.
+        tty.setraw(self._slave)
+        # Nao bloqueante: como uma UART real, bytes que nao cabem no buffer (ninguem lendo) sao perdidos.
+        os.set_blocking(self._master, blocking)
+        self.path = os.ttyname(self._slave)
+        self.dropped_bytes = 0
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._master, view)
+            except BlockingIOError:
+                self.dropped_bytes += len(view)
+                return
+            view = view[written:]
+
+    def close(self) -> None:
+        os.close(self._master)
+        os.close(self._slave)
+
+
+def csv_source(path: Path) -> Iterator[List[float]]:
+    """Repete as leituras do CSV em loop (a taxa do emulador substitui os timestamps gravados)."""
+    data = np.genfromtxt(path, delimiter=",", names=True, filling_values=0.0)
+    data = np.atleast_1d(data)
+    columns = [
+        data[key].astype(np.float64) if key in data.dtype.names else np.zeros(len(data)) for key in SENSOR_KEYS
+    ]
+    rows = np.column_stack(columns).tolist()
+    if not rows:
+        raise ValueError(f"{path} nao tem leituras")
+    return itertools.cycle(rows)
+
+
+def synthetic_source(rate: float, cadence: float = 0.9, peak: float = 2.0) -> Iterator[List[float]]:
+    """Marcha sintetica: a carga do apoio rola do retrope (fsr2 calcanhar, fsr4 medio pe) para o antepe (fsr1, fsr3).
+
+    Os sensores de cada par carregam juntos e nunca caem abaixo de 30% da carga do apoio: nenhum fica isolado acima
+    dos demais, entao o filtro de outliers do leitor (mediana + OUTLIER_FACTOR * MAD) nao desativa ninguem em
+    nenhuma taxa e a medicao percorre o caminho normal dos filtros.
+    O tempo de cada quadro e indice / taxa, entao a forma de onda nao depende da taxa escolhida.
+    """
+    stance = 0.6
+    floor = 0.3
+    for index in itertools.count():
+        phase = (index / rate * cadence) % 1.0
+        values = [0.0] * len(SENSOR_KEYS)
+        if phase <= stance:
+            load = peak * math.sin(math.pi * phase / stance)
+            # 0 no toque do calcanhar, 1 na saida dos dedos
+            roll = 0.5 - 0.5 * math.cos(math.pi * phase / stance)
+            rear = load * (floor + (1 - floor) * (1 - roll))
+            fore = load * (floor + (1 - floor) * roll)
+            values[2] = values[4] = rear
+            values[1] = values[3] = fore
+        yield values
+
+
+def encode_text(values: List[float], seq: int, device_ms: int) -> bytes:
+    # Serial.print(tensao, 3) separado por tab + println
+    return ("\t".join(f"{value:.3f}" for value in values) + "\r\n").encode()
+
+
+def encode_json(values: List[float], seq: int, device_ms: int) -> bytes:
+    return (json.dumps({key: round(value, 3) for key, value in zip(SENSOR_KEYS, values)}) + "\n").encode()
+
+
+def encode_binary(values: List[float], seq: int, device_ms: int) -> bytes:
+    top = int(ADC_MAX_VALUE)
+    adc = [min(max(int(round(value / ADC_REFERENCE_VOLTAGE * ADC_MAX_VALUE)), 0), top) for value in values]
+    return encode_binary_frame(seq, device_ms, adc)
+
+
+ENCODERS: Dict[str, Callable[[List[float], int, int], bytes]] = {
+    "text": encode_text,
+    "json": encode_json,
+    "binary": encode_binary,
+}
+
+
+class EmulatorStats(NamedTuple):
+    frames: int
+    elapsed: float
+    # instante (perf_counter) em que cada quadro foi entregue ao pty, na ordem de envio
+    sent_at: List[float]
+
+    @property
+    def rate(self) -> float:
+        return self.frames / self.elapsed if self.elapsed else 0.0
+
+
+def emulate(
+    port: VirtualSerialPort,
+    source: Iterator[List[float]],
+    output_format: str,
+    rate: float,
+    *,
+    duration: Optional[float] = None,
+    stop: Optional[threading.Event] = None,
+    record: bool = False,
+) -> EmulatorStats:
+    """Envia quadros na taxa pedida ate `duration` segundos (ou ate `stop`).
+
+    Quando o escritor atrasa (pty cheio ou taxa alta demais), os quadros vencidos saem juntos na proxima escrita.
+    """
+    encode = ENCODERS[output_format]
+    period = 1.0 / rate
+    started = time.perf_counter()
+    sent_at: List[float] = []
+    frames = 0
+    while not (stop is not None and stop.is_set()):
+        now = time.perf_counter()
+        elapsed = now - started
+        if duration is not None and elapsed >= duration:
+            break
+        due = int(elapsed / period) + 1
+        if due > frames:
+            chunk = bytearray()
+            for seq in range(frames, due):
+                chunk += encode(next(source), seq, int(seq * period * 1000))
+            if record:
+                # Antes da escrita: com o pty cheio, o leitor consome o inicio do bloco enquanto write() bloqueia.
+                sent_at.extend(itertools.repeat(time.perf_counter(), due - frames))
+            port.write(bytes(chunk))
+            frames = due
+        time.sleep(min(MAX_SLEEP, max(0.0, frames * period - (time.perf_counter() - started))))
+    return EmulatorStats(frames, time.perf_counter() - started, sent_at)
+
+
+class ReaderMeasurement(NamedTuple):
+    target_rate: float
+    sent_rate: float
+    received_rate: float
+    sent: int
+    received: int
+    latency_ms: Dict[str, float]
+
+    @property
+    def sustained(self) -> bool:
+        return (
+            self.received == self.sent
+            and self.received_rate >= self.target_rate * SUSTAINED_RATE_RATIO
+            and self.latency_ms["p99"] <= SUSTAINED_P99_MS
+        )
+
+
+async def _wait_until(predicate: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if predicate():
+            return True
+        await asyncio.sleep(0.01)
+    return predicate()
+
+
+def measure_reader(
+    port: VirtualSerialPort,
+    make_source: Callable[[float], Iterator[List[float]]],
+    output_format: str,
+    rates: List[float],
+    duration: float,
+) -> List[ReaderMeasurement]:
+    """Registra um dispositivo do arduino_reader neste processo apontado para o pty e mede vazao e latencia.
+
+    O leitor roda num event loop como no app; o emulador (o "hardware") escreve no pty numa thread a parte.
+    A latencia vai da escrita do quadro no pty ate o quadro filtrado chegar aos ouvintes do leitor
+    (leitura serial, decodificacao, filtros, historico e metricas ao vivo).
+    """
+    return asyncio.run(_measure_reader(port, make_source, output_format, rates, duration))
+
+
+async def _measure_reader(
+    port: VirtualSerialPort,
+    make_source: Callable[[float], Iterator[List[float]]],
+    output_format: str,
+    rates: List[float],
+    duration: float,
+) -> List[ReaderMeasurement]:
+    device = devices.add(DeviceConfig(MEASURE_DEVICE_ID, ports=(port.path,)))
+    try:
+        return await _measure_device(device, port, make_source, output_format, rates, duration)
+    finally:
+        await devices.remove(MEASURE_DEVICE_ID)
+
+
+async def _measure_device(
+    device: PressureDevice,
+    port: VirtualSerialPort,
+    make_source: Callable[[float], Iterator[List[float]]],
+    output_format: str,
+    rates: List[float],
+    duration: float,
+) -> List[ReaderMeasurement]:
+    received: List[float] = []
+    device.add_frame_listener(lambda frame: received.append(time.perf_counter()))
+
+    # O leitor espera SERIAL_SETTLE_SECONDS apos abrir a porta e descarta o que chegou: envia ate o primeiro passar.
+    warmup = threading.Event()
+    warmup_task = asyncio.create_task(
+        asyncio.to_thread(emulate, port, make_source(10.0), output_format, 10.0, stop=warmup)
+    )
+    connected = await _wait_until(lambda: bool(received), 15.0)
+    warmup.set()
+    await warmup_task
+    if not connected:
+        raise RuntimeError(f"O leitor nao recebeu nenhum quadro de {port.path}")
+
+    results = []
+    for rate in rates:
+        # Esvazia quadros ainda em transito da etapa anterior.
+        previous = -1
+        while previous != len(received):
+            previous = len(received)
+            await asyncio.sleep(0.3)
+        received.clear()
+        # Cada taxa comeca do mesmo estado: baseline e desativacoes da etapa anterior nao contaminam a medicao.
+        device.reset_filters()
+
+        stats = await asyncio.to_thread(
+            emulate, port, make_source(rate), output_format, rate, duration=duration, record=True
+        )
+        await _wait_until(lambda: len(received) >= stats.frames, max(2.0, duration))
+        arrivals = list(received)
+        matched = min(len(arrivals), len(stats.sent_at))
+        latency = (np.array(arrivals[:matched]) - np.array(stats.sent_at[:matched])) * 1000
+        # Pelo menos a duracao do envio: com poucos quadros, ultimo - primeiro cobre so n - 1 intervalos.
+        window = max(arrivals[-1] - stats.sent_at[0], stats.elapsed) if arrivals else 0.0
+        results.append(
+            ReaderMeasurement(
+                rate,
+                stats.rate,
+                len(arrivals) / window if window > 0 else 0.0,
+                stats.frames,
+                len(arrivals),
+                {
+                    "p50": float(np.percentile(latency, 50)) if matched else float("nan"),
+                    "p99": float(np.percentile(latency, 99)) if matched else float("nan"),
+                    "max": float(latency.max()) if matched else float("nan"),
+                },
+            )
+        )
+    return results
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=FORMATS, default="text", help="Formato dos quadros (padrao: text).")
+    parser.add_argument(
+        "--rate", type=float, nargs="+", default=[10.0], help="Quadros por segundo; varias taxas com --measure."
+    )
+    parser.add_argument("--csv", type=Path, help="Reproduz este CSV em loop em vez da marcha sintetica.")
+    parser.add_argument("--cadence", type=float, default=0.9, help="Passos por segundo da marcha sintetica.")
+    parser.add_argument("--duration", type=float, help="Encerra apos N segundos (padrao: ate Ctrl+C).")
+    parser.add_argument(
+        "--measure",
+        type=float,
+        metavar="SEGUNDOS",
+        help="Mede o arduino_reader neste processo: N segundos por taxa, com vazao e latencia.",
+    )
+    args = parser.parse_args(argv)
+    if any(rate <= 0 for rate in args.rate):
+        parser.error("--rate deve ser positivo")
+
+    def make_source(rate: float) -> Iterator[List[float]]:
+        return csv_source(args.csv) if args.csv else synthetic_source(rate, args.cadence)
+
+    # Na medicao o emulador espera o leitor (nenhum quadro perdido); sozinho, nunca trava sem leitor.
+    port = VirtualSerialPort(blocking=bool(args.measure))
+    try:
+        if args.measure:
+            print(f"Medindo o leitor em {port.path} ({args.format}, {args.measure:g} s por taxa)")
+            print(
+                f"{'alvo Hz':>9} {'enviado':>9} {'recebido':>9} {'quadros':>15} "
+                f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  sustentada"
+            )
+            results = measure_reader(port, make_source, args.format, sorted(args.rate), args.measure)
+            for m in results:
+                print(
+                    f"{m.target_rate:>9g} {m.sent_rate:>9.1f} {m.received_rate:>9.1f} {m.received:>7}/{m.sent:<7} "
+                    f"{m.latency_ms['p50']:>8.2f} {m.latency_ms['p99']:>8.2f} {m.latency_ms['max']:>8.2f}  "
+                    f"{'sim' if m.sustained else 'nao'}"
+                )
+            sustained = [m.target_rate for m in results if m.sustained]
+            print(f"Maior taxa sustentada: {max(sustained):g} Hz" if sustained else "Nenhuma taxa sustentada")
+            return
+        rate = args.rate[0]
+        print(f"ARDUINO_PORT={port.path}")
+        print(f"Enviando {args.format} a {rate:g} Hz ({args.csv or 'marcha sintetica'}). Ctrl+C para encerrar.")
+        try:
+            stats = emulate(port, make_source(rate), args.format, rate, duration=args.duration)
+        except KeyboardInterrupt:
+            return
+        print(
+            f"{stats.frames} quadros em {stats.elapsed:.1f} s ({stats.rate:.1f} Hz), "
+            f"{port.dropped_bytes} bytes perdidos sem leitor"
+        )
+    finally:
+        port.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Gravacao continua no servidor: cada quadro do leitor vai direto para a sessao ativa."""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Deque, Dict, List
+
+from arduino_reader import DEFAULT_DEVICE_ID, PressureDevice, devices
+from db import is_transient_error
+from metrics import Counter
+from session_store import append_samples
+
+RECORDER_FLUSH_INTERVAL = float(os.getenv("RECORDER_FLUSH_INTERVAL", "0.5"))
+RECORDER_MAX_BATCH = int(os.getenv("RECORDER_MAX_BATCH", "1000"))
+# Quadros retidos por sessao enquanto o banco estiver fora (~16 min a 100 Hz); acima disso, descarta os mais antigos.
+RECORDER_MAX_BUFFER = int(os.getenv("RECORDER_MAX_BUFFER", "100000"))
+
+RECORDER_DROPPED = Counter(
+    "gaitvision_recorder_dropped_samples_total",
+    "Quadros da gravacao no servidor descartados (buffer cheio ou lote recusado pelo banco).",
+    ("reason",),
+)
+
+
+class RecordingFlushFailed(RuntimeError):
+    """O banco falhou ao gravar o buffer final; a gravacao continua e o encerramento pode ser repetido."""
+
+
+class _BufferedSessionWriter:
+    """Acumula os quadros em memoria e grava em lotes numa thread propria."""
+
+    def __init__(self, session_id: str, device: PressureDevice) -> None:
+        self.session_id = session_id
+        self.device = device
+        self.written = 0
+        self.dropped = 0
+        self._buffer: Deque[Dict] = deque()
+        self._lock = threading.Lock()
+        self.start()
+
+    def start(self) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def on_frame(self, frame: dict) -> None:
+        # Executa no event loop, a cada quadro do leitor: apenas enfileira.
+        sample = {
+            "sensor_readings": frame["pressao"],
+            "timestamp": datetime.fromtimestamp(frame["timestamp"], tz=timezone.utc),
+        }
+        with self._lock:
+            if len(self._buffer) >= RECORDER_MAX_BUFFER:
+                self._buffer.popleft()
+                self._count_dropped(1, "buffer_full")
+            self._buffer.append(sample)
+
+    def _count_dropped(self, count: int, reason: str) -> None:
+        # Chamado com self._lock (on_frame roda no event loop, flush na thread do gravador).
+        self.dropped += count
+        RECORDER_DROPPED.labels(reason).inc(count)
+
+    def flush(self) -> None:
+        with self._lock:
+            batch = list(self._buffer)
+            self._buffer.clear()
+        for start in range(0, len(batch), RECORDER_MAX_BATCH):
+            chunk = batch[start : start + RECORDER_MAX_BATCH]
+            try:
+                append_samples(self.session_id, chunk)
+            except ValueError as exc:
+                # Sessao inexistente ou finalizada: nao adianta tentar de novo.
+                print(f"Descartando {len(batch) - start} amostras da sessao {self.session_id}: {exc}")
+                with self._lock:
+                    self._count_dropped(len(batch) - start, "rejected")
+                return
+            except Exception as exc:
+                if not is_transient_error(exc):
+                    # Lote recusado pelo banco (ex.: DataError): repetir falharia sempre.
+                    print(f"Descartando {len(chunk)} amostras da sessao {self.session_id}: {exc}")
+                    with self._lock:
+                        self._count_dropped(len(chunk), "rejected")
+                    continue
+                # Banco indisponivel: devolve o restante ao buffer, sem passar do limite.
+                with self._lock:
+                    self._buffer.extendleft(reversed(batch[start:]))
+                    overflow = len(self._buffer) - RECORDER_MAX_BUFFER
+                    for _ in range(max(overflow, 0)):
+                        self._buffer.popleft()
+                    if overflow > 0:
+                        self._count_dropped(overflow, "buffer_full")
+                raise
+            self.written += len(chunk)
+
+    def _run(self) -> None:
+        while not self._stop.wait(RECORDER_FLUSH_INTERVAL):
+            try:
+                self.flush()
+            except Exception as exc:
+                print(f"Erro ao gravar amostras da sessao {self.session_id}: {exc}")
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+
+_writers: Dict[str, _BufferedSessionWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def start_recording(session_id: str, device_id: str = DEFAULT_DEVICE_ID) -> None:
+    """Passa a gravar todos os quadros do dispositivo informado na sessao (ValueError se ele nao existir)."""
+    device = devices.get(device_id)
+    with _writers_lock:
+        if session_id in _writers:
+            return
+        writer = _BufferedSessionWriter(session_id, device)
+        _writers[session_id] = writer
+    device.add_frame_listener(writer.on_frame)
+
+
+def stop_recording(session_id: str) -> int:
+    """Interrompe a gravacao, grava o que restou no buffer e devolve o total gravado.
+
+    Se o banco falhar no flush final, o gravador continua registrado e gravando (o buffer nao se perde) e
+    RecordingFlushFailed e levantada para o encerramento ser repetido.
+    """
+    with _writers_lock:
+        writer = _writers.get(session_id)
+    if writer is None:
+        return 0
+    writer.device.remove_frame_listener(writer.on_frame)
+    try:
+        writer.close()
+    except Exception as exc:
+        writer.start()
+        writer.device.add_frame_listener(writer.on_frame)
+        raise RecordingFlushFailed(
+            f"Banco indisponível ao gravar as amostras da sessão {session_id}; tente encerrar de novo"
+        ) from exc
+    with _writers_lock:
+        _writers.pop(session_id, None)
+    return writer.written
+
+
+def is_recording(session_id: str) -> bool:
+    return session_id in _writers
+
+
+def recording_sessions(device_id: str) -> List[str]:
+    """Sessoes gravando os quadros do dispositivo (ele nao pode ser removido enquanto houver alguma)."""
+    with _writers_lock:
+        return [session_id for session_id, writer in _writers.items() if writer.device.device_id == device_id]
+
+
+def stop_all_recordings() -> None:
+    for session_id in list(_writers):
+        try:
+            stop_recording(session_id)
+        except Exception as exc:
+            print(f"Erro ao finalizar gravacao da sessao {session_id}: {exc}")
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Dict, List, Optional
+import csv
+import functools
+import io
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, TypeVar
 
-from sqlalchemy.orm import Session, object_session
+import numpy as np
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session, raiseload
 
 from db import SessionLocal
-from models import Patient, Physiotherapist, PressureSample, Session as DbSession
+from downsampling import lttb_indices
+from gait_analysis import analyze_signals, select_signal_columns
+from metrics import Histogram
+from models import Patient, Physiotherapist, PressureChunk, PressureSample, Session as DbSession
+from sample_chunks import Frames, decode_chunk, frames_to_samples, merge_frames, pack_chunks, rows_to_frames, use_chunks
 
 # Apenas os sensores ativos (fsr1 a fsr4) sao considerados no banco e nos calculos de regioes
 SENSOR_KEYS = ["fsr1", "fsr2", "fsr3", "fsr4"]
@@ -17,6 +31,23 @@ REGIONS: Dict[str, List[str]] = {
 }
 DEFAULT_PHYSIO_EMAIL = "fisioterapeuta@pbl2025.com"
 DEFAULT_PHYSIO_NAME = "Fisioterapeuta PBL"
+SESSION_STATUS_CACHE_SIZE = 4096
+
+
+class SessionNotFound(ValueError):
+    """Sessao inexistente; separa o 404 das demais recusas (ValueError) na API."""
+
+DB_COMMIT_SECONDS = Histogram(
+    "gaitvision_db_commit_seconds", "Duracao do commit ao gravar amostras.", ("operation",)
+)
+SUMMARIZE_SECONDS = Histogram(
+    "gaitvision_summarize_session_seconds",
+    "Tempo de calculo do resumo da sessao.",
+    buckets=(0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005),
+)
+_COMMIT_APPEND_SAMPLE = DB_COMMIT_SECONDS.labels("append_sample")
+_COMMIT_APPEND_SAMPLES = DB_COMMIT_SECONDS.labels("append_samples")
+_SUMMARIZE = SUMMARIZE_SECONDS.labels()
 
 
 def _volts_to_kpa(value: float) -> float:
@@ -24,8 +55,54 @@ def _volts_to_kpa(value: float) -> float:
     return 100 * (safe_value ** 1.5)
 
 
-def _get_db() -> Session:
-    return SessionLocal()
+def _region_kpa(sensor_readings: Dict[str, float]) -> Dict[str, float]:
+    """Media em kPa de cada regiao do pe para uma unica leitura."""
+    result: Dict[str, float] = {}
+    for region, sensors in REGIONS.items():
+        if sensors:
+            result[region] = sum(_volts_to_kpa(sensor_readings.get(sensor, 0.0)) for sensor in sensors) / len(sensors)
+        else:
+            result[region] = 0.0
+    return result
+
+
+def _region_column(region: str, suffix: str) -> str:
+    return f"{region.lower()}_kpa_{suffix}"
+
+
+def _accumulate_regions(session: DbSession, readings: List[Dict[str, float]]) -> None:
+    """Soma as leituras nas colunas agregadas da sessao (mesma transacao do INSERT)."""
+    totals = {region: 0.0 for region in REGIONS}
+    squares = {region: 0.0 for region in REGIONS}
+    for sensor_readings in readings:
+        for region, value in _region_kpa(sensor_readings).items():
+            totals[region] += value
+            squares[region] += value * value
+    for region in REGIONS:
+        sum_column = _region_column(region, "sum")
+        sumsq_column = _region_column(region, "sumsq")
+        setattr(session, sum_column, (getattr(session, sum_column) or 0.0) + totals[region])
+        setattr(session, sumsq_column, (getattr(session, sumsq_column) or 0.0) + squares[region])
+
+
+T = TypeVar("T")
+
+
+def uses_db(fn: Callable[..., T]) -> Callable[..., T]:
+    """Recebe a sessao do banco como primeiro argumento.
+
+    Quem chama pode passar ``db=`` (sessao da requisicao ou a sessao sincrona de ``AsyncSession.run_sync``);
+    sem ela, abre e fecha uma sessao propria.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(*args, db: Optional[Session] = None, **kwargs) -> T:
+        if db is not None:
+            return fn(db, *args, **kwargs)
+        with SessionLocal() as own:
+            return fn(own, *args, **kwargs)
+
+    return wrapper
 
 
 def _get_default_physio(db: Session) -> Physiotherapist:
@@ -39,42 +116,87 @@ def _get_default_physio(db: Session) -> Physiotherapist:
     return physio
 
 
-def list_patients() -> List[Dict]:
-    db = _get_db()
-    try:
-        patients = db.query(Patient).order_by(Patient.created_at.desc()).all()
-        return [
-            {
-                "id": patient.id,
-                "name": patient.name,
-                "identifier": patient.identifier,
-                "age": patient.age,
-                "created_at": patient.created_at.isoformat(),
-            }
-            for patient in patients
-        ]
-    finally:
-        db.close()
-
-
-def get_patient(patient_id: str) -> Dict:
-    db = _get_db()
-    try:
-        patient = db.get(Patient, patient_id)
-        if not patient:
-            raise ValueError("Paciente não encontrado")
-        return {
+# Cache em processo das consultas de referencia. O fisioterapeuta padrao nunca muda e uma sessao
+# encerrada nunca reabre; o estado "aberta" e invalidado por end_session.
+_lookup_lock = threading.Lock()
+_default_physio_id: Optional[str] = None
+_session_open: "OrderedDict[str, bool]" = OrderedDict()
+
+
+def _default_physio(db: Session) -> str:
+    global _default_physio_id
+    if _default_physio_id is None:
+        physio_id = _get_default_physio(db).id
+        with _lookup_lock:
+            _default_physio_id = physio_id
+    return _default_physio_id
+
+
+def _cached_session_open(session_id: str) -> Optional[bool]:
+    with _lookup_lock:
+        return _session_open.get(session_id)
+
+
+def _remember_session_status(session_id: str, is_open: bool) -> None:
+    with _lookup_lock:
+        _session_open[session_id] = is_open
+        _session_open.move_to_end(session_id)
+        while len(_session_open) > SESSION_STATUS_CACHE_SIZE:
+            _session_open.popitem(last=False)
+
+
+@uses_db
+def is_session_open(db: Session, session_id: str) -> bool:
+    """Indica se a sessao ainda aceita amostras, consultando o banco so na primeira vez."""
+    cached = _cached_session_open(session_id)
+    if cached is not None:
+        return cached
+    row = db.execute(select(DbSession.end_time).where(DbSession.id == session_id)).one_or_none()
+    if row is None:
+        raise SessionNotFound("Sessão não encontrada")
+    is_open = row.end_time is None
+    _remember_session_status(session_id, is_open)
+    return is_open
+
+
+def clear_lookup_cache() -> None:
+    global _default_physio_id
+    with _lookup_lock:
+        _default_physio_id = None
+        _session_open.clear()
+
+
+@uses_db
+def list_patients(db: Session) -> List[Dict]:
+    patients = db.query(Patient).order_by(Patient.created_at.desc()).all()
+    return [
+        {
             "id": patient.id,
             "name": patient.name,
             "identifier": patient.identifier,
             "age": patient.age,
             "created_at": patient.created_at.isoformat(),
         }
-    finally:
-        db.close()
+        for patient in patients
+    ]
 
 
-def create_patient(name: str, *, identifier: Optional[str] = None, age: Optional[int] = None) -> Dict:
+@uses_db
+def get_patient(db: Session, patient_id: str) -> Dict:
+    patient = db.get(Patient, patient_id)
+    if not patient:
+        raise ValueError("Paciente não encontrado")
+    return {
+        "id": patient.id,
+        "name": patient.name,
+        "identifier": patient.identifier,
+        "age": patient.age,
+        "created_at": patient.created_at.isoformat(),
+    }
+
+
+@uses_db
+def create_patient(db: Session, name: str, *, identifier: Optional[str] = None, age: Optional[int] = None) -> Dict:
     normalized = name.strip()
     if not normalized:
         raise ValueError("Nome do paciente obrigatório")
@@ -82,164 +204,366 @@ def create_patient(name: str, *, identifier: Optional[str] = None, age: Optional
     if age is not None and age <= 0:
         raise ValueError("Idade do paciente deve ser maior que zero")
 
-    db = _get_db()
-    try:
-        physio = _get_default_physio(db)
-        patient = Patient(
-            name=normalized,
-            identifier=normalized_identifier,
-            age=age,
-            physiotherapist_id=physio.id,
-        )
-        db.add(patient)
+    patient = Patient(
+        name=normalized,
+        identifier=normalized_identifier,
+        age=age,
+        physiotherapist_id=_default_physio(db),
+        created_at=datetime.now(timezone.utc),
+    )
+    db.add(patient)
+    # O id e preenchido no flush: dispensa o refresh depois do commit.
+    db.flush()
+    result = {
+        "id": patient.id,
+        "name": patient.name,
+        "identifier": patient.identifier,
+        "age": patient.age,
+        "created_at": patient.created_at.isoformat(),
+    }
+    db.commit()
+    return result
+
+
+@uses_db
+def start_session(db: Session, patient_id: str, note: Optional[str] = None) -> Dict:
+    patient = db.get(Patient, patient_id)
+    if not patient:
+        raise ValueError("Paciente não encontrado")
+    existing = (
+        db.query(DbSession)
+        .filter(DbSession.patient_id == patient_id, DbSession.end_time.is_(None))
+        .first()
+    )
+    if existing:
+        raise ValueError("Paciente já possui uma sessão em andamento")
+    physio_id = patient.physiotherapist_id
+    session = DbSession(
+        patient_id=patient_id, physiotherapist_id=physio_id, note=note, start_time=datetime.now(timezone.utc)
+    )
+    db.add(session)
+    db.flush()
+    summary = summarize_session(session)
+    db.commit()
+    _remember_session_status(summary["id"], True)
+    return summary
+
+
+@uses_db
+def append_sample(
+    db: Session, session_id: str, sensor_readings: Dict[str, float], timestamp: Optional[str] = None
+) -> Dict:
+    session = _lock_open_session(db, session_id)
+
+    sample = PressureSample(
+        session_id=session_id,
+        pressures=sensor_readings,
+        timestamp=_parse_timestamp(timestamp),
+    )
+    db.add(sample)
+
+    max_reading = max((_volts_to_kpa(sensor_readings.get(key, 0.0)) for key in SENSOR_KEYS), default=0.0)
+    session.sample_count = (session.sample_count or 0) + 1
+    session.max_pressure_kpa = max(session.max_pressure_kpa or 0, max_reading)
+    _accumulate_regions(session, [sensor_readings])
+
+    # A linha esta travada (FOR UPDATE): o resumo em memoria ja e o que sera gravado.
+    summary = summarize_session(session)
+    with _COMMIT_APPEND_SAMPLE.time():
         db.commit()
-        db.refresh(patient)
-        return {
-            "id": patient.id,
-            "name": patient.name,
-            "identifier": patient.identifier,
-            "age": patient.age,
-            "created_at": patient.created_at.isoformat(),
+    return summary
+
+
+@uses_db
+def append_samples(db: Session, session_id: str, samples: List[Dict], *, use_copy: bool = False) -> Dict:
+    """Registra um lote de leituras com um unico INSERT (ou COPY, com ``use_copy``) e um unico commit.
+
+    Cada item deve conter ``sensor_readings`` e, opcionalmente, ``timestamp``.
+    Retorna apenas uma confirmacao leve, sem recalcular o resumo da sessao.
+    """
+    if not samples:
+        raise ValueError("Lote de amostras vazio")
+
+    session = _lock_open_session(db, session_id)
+    rows = [
+        {
+            "session_id": session_id,
+            "pressures": item.get("sensor_readings") or {},
+            "timestamp": _parse_timestamp(item.get("timestamp")),
         }
-    finally:
-        db.close()
-
-
-def start_session(patient_id: str, note: Optional[str] = None) -> Dict:
-    db = _get_db()
-    try:
-        patient = db.get(Patient, patient_id)
-        if not patient:
-            raise ValueError("Paciente não encontrado")
-        existing = (
-            db.query(DbSession)
-            .filter(DbSession.patient_id == patient_id, DbSession.end_time.is_(None))
-            .first()
-        )
-        if existing:
-            raise ValueError("Paciente já possui uma sessão em andamento")
-        physio_id = patient.physiotherapist_id
-        session = DbSession(patient_id=patient_id, physiotherapist_id=physio_id, note=note)
-        db.add(session)
+        for item in samples
+    ]
+    write_sample_rows(db, session, rows, use_copy=use_copy)
+    result = {
+        "session_id": session_id,
+        "accepted": len(rows),
+        "sample_count": session.sample_count,
+        "max_pressure_kpa": round(session.max_pressure_kpa or 0.0, 2),
+    }
+    with _COMMIT_APPEND_SAMPLES.time():
         db.commit()
-        db.refresh(session)
-        return summarize_session(session)
-    finally:
-        db.close()
-
-
-def append_sample(session_id: str, sensor_readings: Dict[str, float], timestamp: Optional[str] = None) -> Dict:
-    db = _get_db()
-    try:
-        session = db.get(DbSession, session_id)
-        if not session:
-            raise ValueError("Sessão não encontrada")
-        if session.end_time is not None:
-            raise ValueError("Sessão já foi finalizada")
-
-        sample = PressureSample(
-            session_id=session_id,
-            pressures=sensor_readings,
-            timestamp=_parse_timestamp(timestamp),
-        )
-        db.add(sample)
-
-        max_reading = max((_volts_to_kpa(sensor_readings.get(key, 0.0)) for key in SENSOR_KEYS), default=0.0)
-        session.sample_count = (session.sample_count or 0) + 1
-        session.max_pressure_kpa = max(session.max_pressure_kpa or 0, max_reading)
-
+    return result
+
+
+def _lock_open_session(db: Session, session_id: str) -> DbSession:
+    """Trava a linha da sessao para atualizar os agregados; sessoes ja encerradas no cache nem chegam ao banco."""
+    if _cached_session_open(session_id) is False:
+        raise ValueError("Sessão já foi finalizada")
+    session = db.get(DbSession, session_id, with_for_update=True)
+    if not session:
+        raise SessionNotFound("Sessão não encontrada")
+    if session.end_time is not None:
+        _remember_session_status(session_id, False)
+        raise ValueError("Sessão já foi finalizada")
+    return session
+
+
+def write_sample_rows(db: Session, session: DbSession, rows: List[Dict], *, use_copy: bool = False) -> None:
+    """Grava as linhas (``session_id``, ``timestamp``, ``pressures``) e soma os agregados da sessao, sem commit.
+
+    Respeita SAMPLE_STORAGE (blocos colunares); ``use_copy`` troca o INSERT em pressure_samples por COPY.
+    """
+    if use_chunks():
+        chunks = pack_chunks(session.id, [(row["timestamp"], row["pressures"]) for row in rows])
+        db.execute(insert(PressureChunk), chunks)
+    elif use_copy:
+        _copy_samples(db, rows)
+    else:
+        db.execute(insert(PressureSample), rows)
+
+    max_reading = max(
+        (_volts_to_kpa(row["pressures"].get(key, 0.0)) for row in rows for key in SENSOR_KEYS), default=0.0
+    )
+    session.sample_count = (session.sample_count or 0) + len(rows)
+    session.max_pressure_kpa = max(session.max_pressure_kpa or 0, max_reading)
+    _accumulate_regions(session, [row["pressures"] for row in rows])
+
+
+def _copy_samples(db: Session, rows: List[Dict]) -> None:
+    """Grava as linhas em pressure_samples com COPY ... FROM STDIN na transacao atual (psycopg 3 ou psycopg2)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        pressures = json.dumps(row["pressures"])
+        writer.writerow([str(uuid.uuid4()), row["session_id"], row["timestamp"].isoformat(), pressures])
+    sql = "COPY pressure_samples (id, session_id, timestamp, pressures) FROM STDIN WITH (FORMAT csv)"
+    raw = db.connection().connection.driver_connection
+    with raw.cursor() as cursor:
+        if hasattr(cursor, "copy"):
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+        else:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+
+
+@uses_db
+def end_session(db: Session, session_id: str) -> Dict:
+    session = db.get(DbSession, session_id)
+    if not session:
+        raise SessionNotFound("Sessão não encontrada")
+    if session.end_time is None:
+        session.end_time = datetime.now(timezone.utc)
+        summary = summarize_session(session)
         db.commit()
-        db.refresh(session)
-        return summarize_session(session)
-    finally:
-        db.close()
-
-
-def end_session(session_id: str) -> Dict:
-    db = _get_db()
-    try:
-        session = db.get(DbSession, session_id)
-        if not session:
-            raise ValueError("Sessão não encontrada")
-        if session.end_time is None:
-            session.end_time = datetime.utcnow()
-            db.commit()
-            db.refresh(session)
-        return summarize_session(session)
-    finally:
-        db.close()
-
-
-def list_sessions(patient_id: str) -> List[Dict]:
-    db = _get_db()
-    try:
-        sessions = (
-            db.query(DbSession)
-            .filter(DbSession.patient_id == patient_id)
-            .order_by(DbSession.start_time.desc())
-            .all()
-        )
-        return [summarize_session(session) for session in sessions]
-    finally:
-        db.close()
-
-
-def get_session(session_id: str) -> Dict:
-    db = _get_db()
-    try:
-        session = db.get(DbSession, session_id)
-        if not session:
-            raise ValueError("Sessão não encontrada")
-        result = summarize_session(session)
-        samples = (
-            db.query(PressureSample)
-            .filter(PressureSample.session_id == session_id)
-            .order_by(PressureSample.timestamp)
-            .all()
-        )
-        result["samples"] = [
-            {
-                "timestamp": sample.timestamp.isoformat(),
-                "pressures": sample.pressures,
-            }
-            for sample in samples
-        ]
-        return result
-    finally:
-        db.close()
+    else:
+        summary = summarize_session(session)
+    _remember_session_status(session_id, False)
+    return summary
+
+
+@uses_db
+def list_sessions(db: Session, patient_id: str) -> List[Dict]:
+    # Uma unica consulta: os resumos vem das colunas agregadas e as amostras nunca sao carregadas.
+    sessions = (
+        db.query(DbSession)
+        .options(raiseload(DbSession.samples))
+        .filter(DbSession.patient_id == patient_id)
+        .order_by(DbSession.start_time.desc())
+        .all()
+    )
+    return [summarize_session(session) for session in sessions]
+
+
+class SessionRows(NamedTuple):
+    """Linhas JSONB e blocos colunares como vieram do banco; decode_session_rows monta a matriz."""
+
+    rows: Sequence[Any]
+    chunks: Sequence[Any]
+    start: Optional[datetime]
+    end: Optional[datetime]
+
+
+@uses_db
+def get_session(
+    db: Session,
+    session_id: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: Optional[int] = None,
+) -> Dict:
+    """
+    Detalhes da sessao com as amostras do intervalo [start, end].
+    Com max_points, a serie e reduzida no servidor (LTTB sobre a pressao total) para no maximo esse numero de pontos.
+    """
+    summary, raw = load_session_detail(session_id, start=start, end=end, db=db)
+    return session_detail(summary, raw, max_points)
+
+
+@uses_db
+def load_session_detail(
+    db: Session,
+    session_id: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> tuple[Dict, SessionRows]:
+    """Parte de I/O do get_session: resumo da sessao e linhas do intervalo, ainda sem decodificar."""
+    session = db.get(DbSession, session_id)
+    if not session:
+        raise SessionNotFound("Sessão não encontrada")
+    return summarize_session(session), fetch_session_rows(db, session_id, start=start, end=end)
+
+
+def session_detail(summary: Dict, raw: SessionRows, max_points: Optional[int] = None) -> Dict:
+    """Parte de CPU do get_session (decodificacao, reducao LTTB e serializacao), sem acesso ao banco."""
+    frames = decode_session_rows(raw)
+    result = dict(summary)
+    result["range_sample_count"] = len(frames.timestamps)
+    if max_points is not None:
+        frames = downsample_frames(frames, max_points)
+    result["samples"] = frames_to_samples(frames)
+    return result
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def fetch_session_rows(
+    db: Session,
+    session_id: str,
+    *,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> SessionRows:
+    """
+    Le as amostras da sessao (linhas JSONB e blocos colunares) sem decodificar.
+    No caminho async isto roda no event loop; o trabalho de CPU fica para decode_session_rows.
+    """
+    start, end = _as_utc(start), _as_utc(end)
+    rows_stmt = select(PressureSample.timestamp, PressureSample.pressures).where(
+        PressureSample.session_id == session_id
+    )
+    chunks_stmt = select(
+        PressureChunk.start_time,
+        PressureChunk.sample_count,
+        PressureChunk.sensor_keys,
+        PressureChunk.offsets,
+        PressureChunk.values,
+    ).where(PressureChunk.session_id == session_id)
+    if start is not None:
+        rows_stmt = rows_stmt.where(PressureSample.timestamp >= start)
+        chunks_stmt = chunks_stmt.where(PressureChunk.end_time >= start)
+    if end is not None:
+        rows_stmt = rows_stmt.where(PressureSample.timestamp <= end)
+        chunks_stmt = chunks_stmt.where(PressureChunk.start_time <= end)
+
+    rows = db.execute(rows_stmt.order_by(PressureSample.timestamp)).all()
+    chunks = db.execute(chunks_stmt.order_by(PressureChunk.start_time)).all()
+    return SessionRows(rows, chunks, start, end)
+
+
+def decode_session_rows(raw: SessionRows) -> Frames:
+    """Monta a matriz ordenada no tempo a partir das linhas e blocos; roda numa thread no caminho async."""
+    rows, chunks, start, end = raw
+    frames = merge_frames([rows_to_frames(rows), *(decode_chunk(*chunk) for chunk in chunks)])
+    if chunks and (start is not None or end is not None):
+        # Blocos nas bordas podem conter amostras fora do intervalo.
+        mask = np.ones(len(frames.timestamps), dtype=bool)
+        if start is not None:
+            mask &= frames.timestamps >= start.timestamp()
+        if end is not None:
+            mask &= frames.timestamps <= end.timestamp()
+        frames = Frames(frames.timestamps[mask], frames.values[mask], frames.keys)
+    return frames
+
+
+def downsample_frames(frames: Frames, max_points: int) -> Frames:
+    if len(frames.timestamps) <= max_points:
+        return frames
+    total = np.nansum(frames.values, axis=1)
+    selected = lttb_indices(frames.timestamps, total, max_points)
+    return Frames(frames.timestamps[selected], frames.values[selected], frames.keys)
+
+
+@uses_db
+def get_session_summary(db: Session, session_id: str) -> Dict:
+    session = db.get(DbSession, session_id)
+    if not session:
+        raise SessionNotFound("Sessão não encontrada")
+    return summarize_session(session)
+
+
+@uses_db
+def get_session_analysis(db: Session, session_id: str) -> Dict:
+    """Metricas de marcha do main_analise.m calculadas sobre as amostras gravadas."""
+    return analyze_session_rows(session_id, load_analysis_rows(session_id, db=db))
+
+
+@uses_db
+def load_analysis_rows(db: Session, session_id: str) -> SessionRows:
+    if not db.get(DbSession, session_id):
+        raise SessionNotFound("Sessão não encontrada")
+    return fetch_session_rows(db, session_id)
+
+
+def analyze_session_rows(session_id: str, raw: SessionRows) -> Dict:
+    return analyze_session_frames(session_id, decode_session_rows(raw))
+
+
+def analyze_session_frames(session_id: str, frames: Frames) -> Dict:
+    columns = select_signal_columns(frames.keys)
+    # Sem amostras nao ha colunas: analyze_signals recusa com "dados insuficientes".
+    if not columns and len(frames.timestamps):
+        raise ValueError("Sessão não possui leituras dos sensores fsr1..fsr4")
+    # Timestamps do banco ja estao em segundos: dispensa a heuristica de milissegundos dos CSVs.
+    metrics = analyze_signals(
+        frames.timestamps,
+        frames.values[:, columns],
+        [frames.keys[i] for i in columns],
+        detect_milliseconds=False,
+    )
+    result = {key: value for key, value in metrics._asdict().items()}
+    # JSON nao representa -Inf (taxa de carga sem nenhum passo de tempo valido)
+    if not np.isfinite(result["max_loading_rate"]):
+        result["max_loading_rate"] = None
+    return {"session_id": session_id, **result}
 
 
 def summarize_session(session: DbSession) -> Dict:
-    region_totals = {region: 0.0 for region in REGIONS}
-    summary_samples: List[PressureSample] = list(getattr(session, "samples", []) or [])
-
-    if not summary_samples:
-        db_session = object_session(session)
-        if db_session:
-            summary_samples = (
-                db_session.query(PressureSample)
-                .filter(PressureSample.session_id == session.id)
-                .order_by(PressureSample.timestamp)
-                .all()
-            )
-
-    sample_count = session.sample_count or len(summary_samples)
-
-    if summary_samples:
-        for sample in summary_samples:
-            pressures: Dict[str, float] = sample.pressures or {}
-            for region, sensors in REGIONS.items():
-                if sensors:
-                    avg = sum(_volts_to_kpa(pressures.get(sensor, 0.0)) for sensor in sensors) / len(sensors)
-                else:
-                    avg = 0.0
-                region_totals[region] += avg
-        region_averages = {
-            region: round(total / len(summary_samples), 2) if summary_samples else 0.0
-            for region, total in region_totals.items()
-        }
-    else:
-        region_averages = {region: 0.0 for region in REGIONS}
+    """Resumo O(1) da sessao a partir das somas acumuladas, sem ler as amostras."""
+    with _SUMMARIZE.time():
+        return _summarize_session(session)
+
+
+def _summarize_session(session: DbSession) -> Dict:
+    sample_count = session.sample_count or 0
+    region_averages: Dict[str, float] = {}
+    region_stddevs: Dict[str, float] = {}
+    for region in REGIONS:
+        total = getattr(session, _region_column(region, "sum")) or 0.0
+        total_sq = getattr(session, _region_column(region, "sumsq")) or 0.0
+        if sample_count:
+            mean = total / sample_count
+            variance = max(total_sq / sample_count - mean * mean, 0.0)
+        else:
+            mean = variance = 0.0
+        region_averages[region] = round(mean, 2)
+        region_stddevs[region] = round(variance ** 0.5, 2)
 
     return {
         "id": session.id,
@@ -251,6 +575,7 @@ def summarize_session(session: DbSession) -> Dict:
         "max_pressure_kpa": round(session.max_pressure_kpa or 0.0, 2),
         "duration_seconds": _duration_seconds(session.start_time, session.end_time),
         "region_averages": region_averages,
+        "region_stddevs": region_stddevs,
     }
 
 
@@ -260,8 +585,10 @@ def _duration_seconds(start: Optional[datetime], end: Optional[datetime]) -> Opt
     return round((end - start).total_seconds(), 2)
 
 
-def _parse_timestamp(value: Optional[str]) -> datetime:
+def _parse_timestamp(value: Optional[str | datetime]) -> datetime:
+    # Sempre com fuso: o asyncpg le um datetime ingenuo como horario local do servidor.
     if not value:
-        return datetime.utcnow()
-    cleaned = value.replace("Z", "+00:00")
-    return datetime.fromisoformat(cleaned)
+        return datetime.now(timezone.utc)
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return _as_utc(value)
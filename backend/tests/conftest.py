@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Os modulos do backend sao importados pelo nome (como no uvicorn main:app, rodando de backend/).
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,187 @@
+"""Os filtros do leitor (quadro a quadro e em bloco) devem reproduzir, bit a bit, a implementacao original (dicts)."""
+
+import statistics
+
+import numpy as np
+import pytest
+
+import arduino_reader as reader
+from arduino_reader import DeviceConfig, PressureDevice
+
+SENSOR_COUNT = 7
+FRAME_COUNT = 4000
+# Com o pe no ar o baseline aprende (alpha 0.02) e absorve um degrau de ruido em ~25 quadros, antes dos 80 do
+# padrao; um gatilho menor deixa a rajada desativar o sensor e cobre esse caminho nos dois pipelines.
+NOISE_TRIGGER_COUNT = 15
+
+
+class ReferenceFilters:
+    """Pipeline anterior a vetorizacao, copiado sem alteracoes (estado global trocado por atributos)."""
+
+    def __init__(self, sensor_keys):
+        self.sensor_keys = list(sensor_keys)
+        self.baseline = {sensor: None for sensor in self.sensor_keys}
+        self.noise_counters = {sensor: 0 for sensor in self.sensor_keys}
+        self.outlier_counters = {sensor: 0 for sensor in self.sensor_keys}
+        self.auto_disabled = set()
+
+    def _is_foot_active(self, payload):
+        active = sum(1 for value in payload.values() if value >= reader.CONTACT_MIN_VOLTAGE)
+        return active >= reader.MIN_ACTIVE_SENSORS
+
+    def _apply_baseline(self, payload, *, learn, foot_active):
+        corrected = {}
+        for sensor in self.sensor_keys:
+            value = float(payload.get(sensor, 0.0))
+            baseline = self.baseline.get(sensor)
+            if baseline is None:
+                if learn and not foot_active:
+                    baseline = value
+                else:
+                    baseline = 0.0
+                self.baseline[sensor] = baseline
+            if learn and not foot_active:
+                baseline = baseline + (value - baseline) * reader.BASELINE_LEARN_RATE
+                self.baseline[sensor] = baseline
+            corrected_value = value - baseline
+            if corrected_value < reader.BASELINE_OFFSET_TOLERANCE:
+                corrected_value = 0.0
+            corrected[sensor] = corrected_value
+        return corrected
+
+    def _update_noise_detection(self, payload, *, foot_active):
+        if foot_active:
+            for sensor in self.sensor_keys:
+                self.noise_counters[sensor] = 0
+            return
+        for sensor, value in payload.items():
+            if value > reader.NOISE_THRESHOLD_VOLTAGE:
+                self.noise_counters[sensor] = self.noise_counters.get(sensor, 0) + 1
+                if self.noise_counters[sensor] >= reader.NOISE_TRIGGER_COUNT:
+                    self.auto_disabled.add(sensor)
+            else:
+                self.noise_counters[sensor] = max(self.noise_counters.get(sensor, 0) - 1, 0)
+
+    def _update_outlier_detection(self, payload):
+        magnitudes = [abs(value) for value in payload.values() if value != 0]
+        if len(magnitudes) < 3:
+            for sensor in self.sensor_keys:
+                self.outlier_counters[sensor] = 0
+            return
+        median_val = statistics.median(magnitudes)
+        deviations = [abs(value - median_val) for value in magnitudes]
+        mad = statistics.median(deviations) or 0.0
+        threshold = max(reader.OUTLIER_MIN_THRESHOLD, median_val + reader.OUTLIER_FACTOR * mad)
+        for sensor, value in payload.items():
+            if abs(value) > threshold:
+                self.outlier_counters[sensor] = self.outlier_counters.get(sensor, 0) + 1
+                if self.outlier_counters[sensor] >= reader.OUTLIER_TRIGGER_COUNT:
+                    self.auto_disabled.add(sensor)
+            else:
+                self.outlier_counters[sensor] = 0
+
+    def _apply_disabled_sensors(self, payload):
+        disabled = reader.DISABLED_SENSORS | self.auto_disabled
+        if reader.ALLOWED_SENSORS:
+            for sensor in self.sensor_keys:
+                if sensor not in reader.ALLOWED_SENSORS:
+                    disabled.add(sensor)
+        if not disabled:
+            return payload
+        filtered = dict(payload)
+        for sensor in disabled:
+            if sensor in filtered:
+                filtered[sensor] = 0.0
+        return filtered
+
+    def apply(self, payload, *, learn=True):
+        structured = {sensor: float(payload.get(sensor, 0.0)) for sensor in self.sensor_keys}
+        foot_active = self._is_foot_active(structured)
+        corrected = self._apply_baseline(structured, learn=learn, foot_active=foot_active)
+        if learn:
+            self._update_noise_detection(corrected, foot_active=foot_active)
+            self._update_outlier_detection(corrected)
+        return self._apply_disabled_sensors(corrected)
+
+
+def _random_stream(seed: int) -> list[dict]:
+    """Marcha com deriva de baseline, rajadas de ruido, outliers sustentados e lacunas (sensores ausentes/NaN)."""
+    rng = np.random.default_rng(seed)
+    keys = [f"fsr{i}" for i in range(SENSOR_COUNT)]
+    t = np.arange(FRAME_COUNT) * 0.01
+    stance = (np.sin(2 * np.pi * 0.9 * t) > 0.2).astype(float)
+    # Paciente parado (pe no ar) e depois apoiado: trechos mais longos que os gatilhos de ruido/outlier.
+    stance[400:1400] = 0.0
+    stance[2000:2700] = 1.0
+    values = 0.05 + 0.02 * np.sin(0.05 * t)[:, None] + rng.normal(0, 0.01, (FRAME_COUNT, SENSOR_COUNT))
+    values += stance[:, None] * rng.uniform(0.5, 2.0, (FRAME_COUNT, SENSOR_COUNT))
+    # Rajadas de ruido com o pe no ar (abaixo do limiar de contato): desativam o sensor pelo contador de ruido.
+    for start in range(600, 1200, 150):
+        values[start : start + 40, 2] += rng.uniform(0.22, 0.28, 40)
+    # Outlier sustentado durante o apoio: desativa o sensor pelo contador de outliers.
+    values[2100:2600, 3] += 6.0
+    # Picos isolados que nao devem desativar ninguem.
+    spikes = rng.choice(FRAME_COUNT, 40, replace=False)
+    values[spikes, 1] += 8.0
+
+    frames = []
+    for row in values.tolist():
+        frame = dict(zip(keys, row))
+        roll = rng.random()
+        if roll < 0.01:
+            del frame[keys[int(rng.integers(SENSOR_COUNT))]]
+        elif roll < 0.015 and stance[len(frames)]:
+            # NaN so com o pe apoiado: o baseline nao aprende nesse quadro (no ar, ficaria NaN para sempre).
+            frame[keys[int(rng.integers(SENSOR_COUNT))]] = float("nan")
+        frames.append(frame)
+    return frames
+
+
+@pytest.fixture(autouse=True)
+def _noise_trigger(monkeypatch):
+    # Os dois pipelines leem o limite do modulo a cada quadro.
+    monkeypatch.setattr(reader, "NOISE_TRIGGER_COUNT", NOISE_TRIGGER_COUNT)
+
+
+def _new_device() -> PressureDevice:
+    # Nunca iniciado: so o pipeline de filtros e exercitado.
+    return PressureDevice(DeviceConfig("equivalence", ports=("/dev/null",)))
+
+
+def _as_matrix(frames: list[dict], keys: list[str]) -> np.ndarray:
+    return np.array([[frame[key] for key in keys] for frame in frames])
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_apply_sensor_filters_matches_reference(seed):
+    stream = _random_stream(seed)
+    device = _new_device()
+    reference = ReferenceFilters(device.sensor_keys)
+
+    expected = [reference.apply(frame) for frame in stream]
+    actual = [device.apply_sensor_filters(frame) for frame in stream]
+
+    keys = device.sensor_keys
+    np.testing.assert_array_equal(_as_matrix(actual, keys), _as_matrix(expected, keys))
+    assert device.auto_disabled == reference.auto_disabled
+    # Os dois gatilhos precisam ter disparado para o teste cobrir a desativacao automatica.
+    assert {"fsr2", "fsr3"} <= reference.auto_disabled
+
+    # Sem aprendizado (dados simulados): so baseline e sensores desativados.
+    probe = stream[:50]
+    np.testing.assert_array_equal(
+        _as_matrix([device.apply_sensor_filters(frame, learn=False) for frame in probe], keys),
+        _as_matrix([reference.apply(frame, learn=False) for frame in probe], keys),
+    )
+
+
+def test_apply_sensor_filters_batch_matches_reference():
+    stream = _random_stream(3)
+    device = _new_device()
+    reference = ReferenceFilters(device.sensor_keys)
+    keys = device.sensor_keys
+
+    expected = _as_matrix([reference.apply(frame) for frame in stream], keys)
+    block = np.array([[frame.get(key, 0.0) for key in keys] for frame in stream])
+    np.testing.assert_array_equal(device.apply_sensor_filters_batch(block), expected)
+    assert device.auto_disabled == reference.auto_disabled
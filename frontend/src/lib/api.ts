@@ -1,7 +1,18 @@
-import { Patient, Pressao, SessionDetail, SessionSummary } from "../types";
+import { LiveGaitMetrics, Patient, Pressao, PressureFrame, SampleBatchAck, SessionDetail, SessionSummary } from "../types";
 
 const API_BASE = import.meta.env.VITE_API_URL ?? "http://127.0.0.1:8000";
 
+// Resposta de erro da API; o status separa rejeicao (4xx) de falha do servidor (5xx).
+export class ApiError extends Error {
+  status: number;
+
+  constructor(message: string, status: number) {
+    super(message);
+    this.name = "ApiError";
+    this.status = status;
+  }
+}
+
 async function request<T>(path: string, init?: RequestInit): Promise<T> {
   const response = await fetch(`${API_BASE}${path}`, {
     headers: {
@@ -19,7 +30,7 @@ async function request<T>(path: string, init?: RequestInit): Promise<T> {
     } catch {
       detail = response.statusText || detail;
     }
-    throw new Error(detail);
+    throw new ApiError(detail, response.status);
   }
 
   if (response.status === 204) {
@@ -52,15 +63,31 @@ export async function fetchSessions(patientId: string): Promise<SessionSummary[]
   return request<SessionSummary[]>(`/patients/${patientId}/sessions`);
 }
 
-export async function startSession(patientId: string, note?: string | null): Promise<SessionSummary> {
+export async function startSession(
+  patientId: string,
+  note?: string | null,
+  serverCapture = true,
+): Promise<SessionSummary> {
   return request<SessionSummary>(`/patients/${patientId}/sessions`, {
     method: "POST",
-    body: JSON.stringify({ note }),
+    body: JSON.stringify({ note, server_capture: serverCapture }),
   });
 }
 
-export async function fetchSession(sessionId: string): Promise<SessionDetail> {
-  return request<SessionDetail>(`/sessions/${sessionId}`);
+export async function fetchSession(
+  sessionId: string,
+  options: { from?: string; to?: string; maxPoints?: number } = {},
+): Promise<SessionDetail> {
+  const params = new URLSearchParams();
+  if (options.from) params.set("from", options.from);
+  if (options.to) params.set("to", options.to);
+  if (options.maxPoints) params.set("max_points", String(options.maxPoints));
+  const query = params.toString();
+  return request<SessionDetail>(`/sessions/${sessionId}${query ? `?${query}` : ""}`);
+}
+
+export async function fetchSessionSummary(sessionId: string): Promise<SessionSummary> {
+  return request<SessionSummary>(`/sessions/${sessionId}/summary`);
 }
 
 export async function appendSessionSample(
@@ -74,6 +101,16 @@ export async function appendSessionSample(
   });
 }
 
+export async function appendSessionSamples(
+  sessionId: string,
+  samples: Array<{ sensor_readings: Pressao; timestamp: string }>,
+): Promise<SampleBatchAck> {
+  return request<SampleBatchAck>(`/sessions/${sessionId}/data/batch`, {
+    method: "POST",
+    body: JSON.stringify({ samples }),
+  });
+}
+
 export async function endSession(sessionId: string): Promise<SessionSummary> {
   return request<SessionSummary>(`/sessions/${sessionId}/end`, {
     method: "POST",
@@ -85,6 +122,28 @@ export async function fetchPressure(): Promise<Pressao | null> {
   return data.pressao ?? null;
 }
 
+export async function fetchLiveMetrics(): Promise<LiveGaitMetrics> {
+  return request<LiveGaitMetrics>("/pressao/metrics");
+}
+
+export function subscribePressure(
+  onFrame: (frame: PressureFrame) => void,
+  onError?: (event: Event) => void,
+): () => void {
+  const source = new EventSource(`${API_BASE}/pressao/stream`);
+  source.onmessage = (event) => {
+    try {
+      onFrame(JSON.parse(event.data) as PressureFrame);
+    } catch (err) {
+      console.error(err);
+    }
+  };
+  if (onError) {
+    source.onerror = onError;
+  }
+  return () => source.close();
+}
+
 export const api = {
   fetchPatients,
   fetchPatient,
@@ -92,9 +151,13 @@ export const api = {
   fetchSessions,
   startSession,
   fetchSession,
+  fetchSessionSummary,
   appendSessionSample,
+  appendSessionSamples,
   endSession,
   fetchPressure,
+  fetchLiveMetrics,
+  subscribePressure,
 };
 
 export default api;
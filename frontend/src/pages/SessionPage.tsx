@@ -2,13 +2,16 @@ import React, { useEffect, useRef, useState } from "react";
 import { useLocation, useNavigate, useParams } from "react-router-dom";
 import PlantarPressureCharts from "../components/PlantarPressureCharts";
 import FootHeatmap from "../FootHeatmap";
-import { Patient, Pressao, SessionDetail } from "../types";
+import { LiveGaitMetrics, Patient, Pressao, SessionDetail } from "../types";
 import {
-  appendSessionSample,
+  ApiError,
+  appendSessionSamples,
   endSession,
+  fetchLiveMetrics,
   fetchPatient,
-  fetchPressure,
   fetchSession,
+  fetchSessionSummary,
+  subscribePressure,
 } from "../lib/api";
 import { SENSOR_COORDS, SENSOR_KEYS, type SensorKey } from "../lib/sensors";
 
@@ -25,6 +28,11 @@ const REGION_LABELS: Record<RegionKey, string> = {
   calcanhar: "Calcanhar",
 };
 const MAX_HISTORY_POINTS = 120;
+const SAVE_INTERVAL_MS = 500;
+// Limite de amostras por POST /sessions/{id}/data/batch no backend (acima disso responde 422).
+const MAX_BATCH_SAMPLES = 2000;
+const SUMMARY_REFRESH_MS = 2000;
+const METRICS_REFRESH_MS = 1000;
 const MAX_COP_HISTORY = 200;
 const SENSOR_BOUNDS = computeSensorBounds(SENSOR_COORDS);
 
@@ -55,14 +63,36 @@ const SessionPage: React.FC = () => {
   const [pressureHistory, setPressureHistory] = useState<PressureSnapshot[]>([]);
   const [isEnding, setIsEnding] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  const [liveMetrics, setLiveMetrics] = useState<LiveGaitMetrics | null>(null);
   const savingRef = useRef(false);
+  const pendingSamplesRef = useRef<Array<{ sensor_readings: Pressao; timestamp: string }>>([]);
   const hydratingHistoryRef = useRef(false);
 
+  // Envia o pendente em fatias aceitas pelo backend. Falha de rede ou 5xx devolve a fatia ao inicio da fila
+  // (tenta de novo no proximo envio); um 4xx e rejeicao definitiva e a fatia e descartada.
+  const sendPendingSamples = async (id: string) => {
+    const pending = pendingSamplesRef.current;
+    while (pending.length > 0) {
+      const batch = pending.splice(0, MAX_BATCH_SAMPLES);
+      try {
+        const ack = await appendSessionSamples(id, batch);
+        setSession((prev) =>
+          prev ? { ...prev, sample_count: ack.sample_count, max_pressure_kpa: ack.max_pressure_kpa } : prev,
+        );
+      } catch (err) {
+        if (!(err instanceof ApiError) || err.status >= 500) {
+          pending.unshift(...batch);
+        }
+        throw err;
+      }
+    }
+  };
+
   useEffect(() => {
     if (!sessionId) return;
     const loadSession = async () => {
       try {
-        const data = await fetchSession(sessionId);
+        const data = await fetchSession(sessionId, { maxPoints: MAX_HISTORY_POINTS });
         setSession(data);
         if (!patient) {
           const fetched = await fetchPatient(data.patient_id);
@@ -75,28 +105,78 @@ const SessionPage: React.FC = () => {
     loadSession();
   }, [sessionId, patient]);
 
+  const sessionLoaded = Boolean(session);
+  const serverCapture = Boolean(session?.server_capture);
+
   useEffect(() => {
-    if (!sessionId) return;
+    if (!sessionId || !sessionLoaded) return;
     if (session?.end_time) return;
 
-    const timer = setInterval(async () => {
+    // Cada quadro do stream e guardado; a tela so re-renderiza uma vez por frame de animacao.
+    let latest: Pressao | null = null;
+    let animationFrame: number | null = null;
+    const unsubscribe = subscribePressure((frame) => {
+      // Com gravacao no servidor o backend ja persiste cada quadro; o navegador so exibe.
+      if (!serverCapture) {
+        pendingSamplesRef.current.push({
+          sensor_readings: frame.pressao,
+          timestamp: new Date(frame.timestamp * 1000).toISOString(),
+        });
+      }
+      latest = frame.pressao;
+      if (animationFrame === null) {
+        animationFrame = requestAnimationFrame(() => {
+          animationFrame = null;
+          if (latest) setPressao(latest);
+        });
+      }
+    });
+
+    const flushPending = async () => {
+      if (savingRef.current || pendingSamplesRef.current.length === 0) return;
+      savingRef.current = true;
       try {
-        const data = await fetchPressure();
-        if (!data) return;
-        setPressao(data);
-        if (savingRef.current) return;
-        savingRef.current = true;
-        const summary = await appendSessionSample(sessionId, data, new Date().toISOString());
-        setSession((prev) => (prev ? { ...prev, ...summary } : summary));
+        await sendPendingSamples(sessionId);
       } catch (err) {
         console.error(err);
       } finally {
         savingRef.current = false;
       }
-    }, 150);
+    };
+    const refreshSummary = async () => {
+      try {
+        const summary = await fetchSessionSummary(sessionId);
+        setSession((prev) => (prev ? { ...prev, ...summary } : prev));
+      } catch (err) {
+        console.error(err);
+      }
+    };
+    const timer = serverCapture
+      ? setInterval(refreshSummary, SUMMARY_REFRESH_MS)
+      : setInterval(flushPending, SAVE_INTERVAL_MS);
+
+    return () => {
+      unsubscribe();
+      clearInterval(timer);
+      if (animationFrame !== null) cancelAnimationFrame(animationFrame);
+      flushPending();
+    };
+  }, [sessionId, sessionLoaded, serverCapture, session?.end_time]);
 
+  useEffect(() => {
+    if (!sessionLoaded || session?.end_time) return;
+    // Metricas de marcha calculadas pelo leitor a cada quadro; aqui so lemos o estado atual.
+    const refreshMetrics = async () => {
+      try {
+        setLiveMetrics(await fetchLiveMetrics());
+      } catch (err) {
+        console.error(err);
+      }
+    };
+    refreshMetrics();
+    const timer = setInterval(refreshMetrics, METRICS_REFRESH_MS);
     return () => clearInterval(timer);
-  }, [sessionId, session?.end_time]);
+  }, [sessionLoaded, session?.end_time]);
 
   useEffect(() => {
     if (!pressao) return;
@@ -177,6 +257,7 @@ const SessionPage: React.FC = () => {
     if (!sessionId) return;
     setIsEnding(true);
     try {
+      await sendPendingSamples(sessionId);
       await endSession(sessionId);
       navigate("/home", { replace: true });
     } catch (err) {
@@ -239,7 +320,7 @@ const SessionPage: React.FC = () => {
           <div className="bg-white/5 rounded-3xl border border-white/10 p-6 space-y-4">
             <span className="text-xs uppercase tracking-widest text-slate-400">Heatmap plantar</span>
             <FootHeatmap sensorData={pressao} cop={cop} copHistory={copHistory} />
-            <p className="text-sm text-slate-400 text-center">Atualizando a cada 0,1s</p>
+            <p className="text-sm text-slate-400 text-center">Atualizando em tempo real</p>
           </div>
 
           <div className="space-y-4">
@@ -290,6 +371,18 @@ const SessionPage: React.FC = () => {
                     {session?.end_time ? "Encerrada" : "Em andamento"}
                   </dd>
                 </div>
+                <div className="flex justify-between">
+                  <dt>Cadência</dt>
+                  <dd>{liveMetrics?.cadence_hz != null ? `${liveMetrics.cadence_hz.toFixed(2)} Hz` : "—"}</dd>
+                </div>
+                <div className="flex justify-between">
+                  <dt>Passos detectados</dt>
+                  <dd>{liveMetrics?.step_count ?? 0}</dd>
+                </div>
+                <div className="flex justify-between">
+                  <dt>Impulso total</dt>
+                  <dd>{liveMetrics ? liveMetrics.impulse.toFixed(2) : "—"}</dd>
+                </div>
                 <div className="flex justify-between">
                   <dt>CoP atual</dt>
                   <dd>
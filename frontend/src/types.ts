@@ -1,5 +1,19 @@
 export type Pressao = Record<string, number>;
 
+export interface PressureFrame {
+  timestamp: number; // epoch em segundos
+  pressao: Pressao;
+}
+
+export interface LiveGaitMetrics {
+  cadence_hz: number | null;
+  impulse: number;
+  max_loading_rate: number | null;
+  step_count: number;
+  frame_count: number;
+  elapsed_seconds: number;
+}
+
 export interface Patient {
   id: string;
   name: string;
@@ -18,15 +32,25 @@ export interface SessionSummary {
   max_pressure_kpa: number;
   duration_seconds?: number | null;
   region_averages: Record<string, number>;
+  region_stddevs?: Record<string, number>;
+  server_capture?: boolean;
 }
 
 export interface SessionDetail extends SessionSummary {
+  range_sample_count?: number;
   samples?: Array<{
     timestamp: string;
     pressures: Pressao;
   }>;
 }
 
+export interface SampleBatchAck {
+  session_id: string;
+  accepted: number;
+  sample_count: number;
+  max_pressure_kpa: number;
+}
+
 export interface AuthUser {
   email: string;
   name: string;